@@ -2,15 +2,20 @@
 import asyncio
 import logging
 import os
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from threading import Lock
 
-from pyVmomi import vim  # pylint: disable=no-name-in-module
+from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.core import SupportsResponse, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 import homeassistant.helpers.config_validation as cv
-from homeassistant.util import Throttle
+from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 
 from homeassistant.const import (
     CONF_HOST,
@@ -22,13 +27,21 @@ from homeassistant.const import (
 )
 
 from .esxi import (
-    esx_connect,
-    esx_disconnect,
+    esx_checkin,
+    esx_checkout,
+    esx_close_pool,
+    esx_pool,
     check_license,
+    get_api_type,
     get_host_info,
     get_datastore_info,
-    get_license_info,
+    classify_licenses,
+    get_alarm_info,
+    get_guest_disk_info,
+    get_virtual_disks,
     get_vm_info,
+    get_conn_details,
+    get_round_trips,
     host_pwr,
     host_pwr_policy,
     vm_pwr,
@@ -36,26 +49,94 @@ from .esxi import (
     vm_snap_remove,
     list_esxi_hosts,
     list_esxi_power_policies,
+    retrieve_properties,
+)
+from .aggregate import get_cluster_info, get_membership, get_resource_pool_info
+from .breaker import CircuitBreaker
+from .events import EventListener
+from .federation import Federation
+from .forecast import FillRateEstimator, get_forecast_info
+from .history import MetricHistory
+from .openmetrics import ESXiStatsMetricsView
+from .operations import bulk_power_policy
+from .polling import AdaptiveInterval, count_changes, get_state_snapshot
+from .profiler import profile_cycle
+from .rolling import RollingReboot
+from .scope import InventoryScope
+from .shutdown import emergency_shutdown
+from .tags import TagMembership
+from .perf import (
+    DATASTORE_COUNTERS,
+    NETWORK_COUNTERS,
+    VIRTUAL_DISK_COUNTERS,
+    PerfCounters,
+    aggregate_datastore_perf,
+    get_connected_hosts,
+    get_datastore_perf_info,
+    get_network_info,
+    get_virtual_disk_info,
 )
 
 from .const import (
+    ALARM_PROPERTIES,
     AVAILABLE_CMND_VM_SNAP,
     AVAILABLE_CMND_VM_POWER,
     AVAILABLE_CMND_HOST_POWER,
     COMMAND,
+    CONF_CYCLE_TIMEOUT,
+    CONF_EVENTS,
+    CONF_METRICS,
+    CONF_FEDERATION_CALLS,
+    CONF_FEDERATION_CONCURRENCY,
+    CONF_MAX_POLL_INTERVAL,
+    CYCLE_PROFILES,
+    DEFAULT_CYCLE_TIMEOUT,
+    DEFAULT_EVENTS,
+    DEFAULT_METRICS,
+    DEFAULT_FEDERATION_CALLS,
+    DEFAULT_FEDERATION_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
     DEFAULT_OPTIONS,
     DOMAIN,
     DOMAIN_DATA,
+    LICENSE_CACHE_TTL,
+    MEMBERSHIP_TTL,
+    EVENTS_STORAGE_VERSION,
+    FORECAST_SAVE_DELAY,
+    FORECAST_STORAGE_VERSION,
     PLATFORMS,
     REQUIRED_FILES,
+    SIGNAL_OBJECT_UPDATED,
+    TASK_ACTIVE_STATES,
     HOST,
+    HOST_PROPERTIES,
     TARGET_HOST,
+    TARGET_HOSTS,
+    CLUSTER,
+    CANCEL,
+    MAX_DOWN,
+    ROLLING_MAX_DOWN,
+    GROUPS,
+    DEADLINE,
+    RUNTIME,
+    EXCLUDE,
+    FIRE_AND_FORGET_VM_POWER,
+    REFRESH_FOLLOW_UP,
+    SHUTDOWN_DEADLINE,
+    SHUTDOWN_HOSTS,
     VM,
+    VM_CLAIM_PROPERTIES,
+    VM_PROPERTIES,
     FORCE,
+    HISTORY_TYPES,
+    METRIC,
+    OBJECT,
+    TOP,
+    TYPE,
+    WINDOW,
 )
 
 _LOGGER = logging.getLogger(__name__)
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=45)
 
 HOST_PWR_SCHEMA = vol.Schema(
     {
@@ -83,6 +164,41 @@ HOST_PWR_POLICY_SCHEMA = vol.Schema(
         vol.Optional(TARGET_HOST): cv.string,
     }
 )
+BULK_PWR_POLICY_SCHEMA = vol.Schema(
+    {
+        vol.Required(HOST): cv.string,
+        vol.Required(COMMAND): cv.string,
+        vol.Optional(TARGET_HOSTS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CLUSTER): cv.string,
+    }
+)
+ROLLING_REBOOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(HOST): cv.string,
+        vol.Optional(TARGET_HOSTS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CLUSTER): cv.string,
+        vol.Optional(MAX_DOWN, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=ROLLING_MAX_DOWN)
+        ),
+        vol.Optional(CANCEL, default=False): cv.boolean,
+    }
+)
+SHUTDOWN_GROUP_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): cv.string,
+        vol.Required(VM): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(DEADLINE, default=SHUTDOWN_DEADLINE): cv.positive_int,
+    }
+)
+EMERGENCY_SHUTDOWN_SCHEMA = vol.Schema(
+    {
+        vol.Required(HOST): cv.string,
+        vol.Optional(GROUPS, default=[]): vol.All(cv.ensure_list, [SHUTDOWN_GROUP_SCHEMA]),
+        vol.Optional(RUNTIME): cv.positive_int,
+        vol.Optional(EXCLUDE, default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(SHUTDOWN_HOSTS, default=True): cv.boolean,
+    }
+)
 VM_PWR_SCHEMA = vol.Schema(
     {
         vol.Required(HOST): cv.string,
@@ -100,6 +216,21 @@ SNAP_REMOVE_SCHEMA = vol.Schema(
         vol.Required(COMMAND): cv.string,
     }
 )
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(HOST): cv.string,
+        vol.Required(TYPE): vol.In(HISTORY_TYPES),
+        vol.Required(OBJECT): cv.string,
+        vol.Required(METRIC): cv.string,
+        vol.Optional(WINDOW, default=timedelta(hours=1)): cv.positive_time_period,
+    }
+)
+PROFILE_REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Required(HOST): cv.string,
+        vol.Optional(TOP, default=20): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+    }
+)
 CONFIG_SCHEMA = vol.Schema(
     {DOMAIN: vol.Schema({}, extra=vol.ALLOW_EXTRA)}, extra=vol.ALLOW_EXTRA
 )
@@ -133,7 +264,11 @@ async def async_setup_entry(hass, config_entry):
     hass.data[DOMAIN_DATA][entry]["datastore"] = {}
     hass.data[DOMAIN_DATA][entry]["license"] = {}
     hass.data[DOMAIN_DATA][entry]["vm"] = {}
+    hass.data[DOMAIN_DATA][entry]["cluster"] = {}
+    hass.data[DOMAIN_DATA][entry]["resource_pool"] = {}
     hass.data[DOMAIN_DATA][entry]["monitored_conditions"] = []
+    hass.data[DOMAIN_DATA][entry]["history"] = MetricHistory()
+    hass.data[DOMAIN_DATA][entry]["rolling_reboot"] = None
 
     if config_entry.data["vmhost"]:
         hass.data[DOMAIN_DATA][entry]["monitored_conditions"].append("vmhost")
@@ -145,18 +280,58 @@ async def async_setup_entry(hass, config_entry):
     if config_entry.data["vm"]:
         hass.data[DOMAIN_DATA][entry]["monitored_conditions"].append("vm")
 
+    # aggregates are computed from the host/VM data (vCenter only)
+    if config_entry.data["vmhost"]:
+        hass.data[DOMAIN_DATA][entry]["monitored_conditions"].append("cluster")
+    if config_entry.data["vm"]:
+        hass.data[DOMAIN_DATA][entry]["monitored_conditions"].append("resource_pool")
+
     if not config_entry.options:
         async_update_options(hass, config_entry)
 
     # get global config
     _LOGGER.debug("Setting up host %s", config[DOMAIN].get(CONF_HOST))
     hass.data[DOMAIN_DATA][entry]["client"] = EsxiStats(hass, config, config_entry)
+    await hass.data[DOMAIN_DATA][entry]["client"].async_load_forecast()
+
+    # tag membership must be known before the first refresh
+    client = hass.data[DOMAIN_DATA][entry]["client"]
+    if client.scope.tags and (
+        await hass.async_add_executor_job(get_api_type, client.conn_details)
+        == "HostAgent"
+    ):
+        # standalone hosts have no tagging API, setup would never complete
+        _LOGGER.warning(
+            "Tags are only available through vCenter - ignoring the tags option of %s",
+            client.host,
+        )
+        client.scope.tags = []
+    if client.scope.tags:
+        tags = TagMembership(hass, client)
+        hass.data[DOMAIN_DATA][entry]["tags"] = tags
+        await tags.async_start()
 
     lic = await hass.async_add_executor_job(connect, hass, config, entry)
 
     # load platforms
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    # follow the event stream for near real-time updates
+    if config_entry.options.get(CONF_EVENTS, DEFAULT_EVENTS):
+        listener = EventListener(hass, hass.data[DOMAIN_DATA][entry]["client"])
+        hass.data[DOMAIN_DATA][entry]["events"] = listener
+        await listener.async_start()
+
+    # views cannot be removed, the view checks the option of every entry
+    if config_entry.options.get(CONF_METRICS, DEFAULT_METRICS) and not hass.data.get(
+        f"{DOMAIN}_metrics_view"
+    ):
+        hass.data[f"{DOMAIN}_metrics_view"] = ESXiStatsMetricsView()
+        hass.http.register_view(hass.data[f"{DOMAIN}_metrics_view"])
+
+    # read-only services do not need an API write license
+    async_add_query_services(hass)
+
     # if lisense allows API write, register services
     if lic:
         async_add_services(hass, config_entry)
@@ -179,34 +354,36 @@ async def async_reload_entry(hass, config_entry):
 def connect(hass, config, entry):
     """Connect."""
     conn = None
+    discard = False
+    conn_details = hass.data[DOMAIN_DATA][entry]["client"].conn_details
     try:
-        conn_details = {
-            "host": config[DOMAIN]["host"],
-            "user": config[DOMAIN]["username"],
-            "pwd": config[DOMAIN]["password"],
-            "port": config[DOMAIN]["port"],
-            "ssl": config[DOMAIN]["verify_ssl"],
-        }
-
-        conn = esx_connect(**conn_details)
+        conn = esx_checkout(conn_details)
         if conn:
             _LOGGER.debug("Product Line: %s", conn.content.about.productLineId)
 
-            # get license type and objects
-            lic = check_license(conn.RetrieveContent().licenseManager)
-            hass.data[DOMAIN_DATA][entry]["client"].update_data()
+            client = hass.data[DOMAIN_DATA][entry]["client"]
+            client.update_data()
+
+            # license type comes from the first refresh when licenses are collected
+            lic = client.license_api
+            if lic is None:
+                lic = check_license(conn.RetrieveContent().licenseManager)
         else:
             lic = "n/a"
     except Exception as exception:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.error(exception)
         raise ConfigEntryNotReady from exception
     finally:
-        if conn:
-            esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
 
     return lic
 
 
+class CycleDeadlineExceeded(Exception):
+    """Raised when a refresh cycle runs past its deadline."""
+
+
 class EsxiStats:
     """This class handles communication, services, and stores the data."""
 
@@ -220,207 +397,695 @@ class EsxiStats:
         self.port = config[DOMAIN].get(CONF_PORT)
         self.ssl = config[DOMAIN].get(CONF_VERIFY_SSL)
         self.entry = config_entry.entry_id
+        self.conn_details = get_conn_details(self.config, config_entry.options)
+        self.breaker = CircuitBreaker(self.host)
+        self.cycle_timeout = config_entry.options.get(
+            CONF_CYCLE_TIMEOUT, DEFAULT_CYCLE_TIMEOUT
+        )
+        self.license_api = None
+        self.vcenter = False
+        self.scope = InventoryScope(config_entry.options)
+        self.federation = hass.data.setdefault(f"{DOMAIN}_federation", Federation())
+        self.federation.configure(
+            self.entry,
+            config_entry.options.get(
+                CONF_FEDERATION_CONCURRENCY, DEFAULT_FEDERATION_CONCURRENCY
+            ),
+            config_entry.options.get(CONF_FEDERATION_CALLS, DEFAULT_FEDERATION_CALLS),
+            config_entry.options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL),
+        )
+        self.claimed_away = set()
+        self.poll = AdaptiveInterval(
+            config_entry.options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL)
+        )
+        self._update_lock = Lock()
+        self._snapshot = None
+        self._in_flight = 0
+        self._follow_ups = {}
+        self._recorded = {}
+        self._alarm_names = {}
+        self.perf = PerfCounters()
+        self._license_hint = None
+        self._license_expires = 0.0
+        self.metrics = {
+            "cycles": 0,
+            "object_refreshes": 0,
+            "deadline_exceeded": 0,
+            "timeouts": 0,
+            "last_cycle_seconds": None,
+        }
+        self.profiles = deque(maxlen=CYCLE_PROFILES)
+        self._profile = None
+        self.morefs = {}
+        self.membership = None
+        self._membership_seen = set()
+        self._membership_expires = 0.0
+        self.forecast = {}
+        self._forecast_store = Store(
+            hass, FORECAST_STORAGE_VERSION, f"{DOMAIN}.{self.entry}.forecast"
+        )
+
+    async def async_load_forecast(self):
+        """Restore datastore fill-rate estimators saved before a restart."""
+        stored = await self._forecast_store.async_load() or {}
+        for ds_name, state in stored.items():
+            self.forecast[ds_name] = FillRateEstimator(state)
+        _LOGGER.debug("Restored %s datastore forecast(s)", len(self.forecast))
+
+    @callback
+    def async_save_forecast(self):
+        """Schedule saving of datastore fill-rate estimators."""
+        self._forecast_store.async_delay_save(
+            lambda: {name: est.as_dict() for name, est in self.forecast.items()},
+            FORECAST_SAVE_DELAY,
+        )
+
+    @property
+    def available(self):
+        """Return True unless the host is marked unreachable."""
+        return self.breaker.available
+
+    def update_data(self, no_throttle=False):
+        """Update data once the adaptive refresh interval has passed.
+
+        Calls while a refresh is running return right away, no_throttle
+        refreshes regardless of the interval.
+        """
+        if not self._update_lock.acquire(blocking=False):
+            return
+        try:
+            if no_throttle or self.poll.due():
+                self._update_data()
+        finally:
+            self._update_lock.release()
+
+    def _update_data(self):
+        """Run one refresh cycle."""
+        # do not tie up an executor thread on a host that keeps failing
+        if not self.breaker.allow():
+            _LOGGER.debug("ESXi host is marked unreachable - skipping update")
+            return
+        # entities are created from the first cycle, it waits for a free slot
+        if not self.federation.acquire(
+            self.host, None if self.metrics["cycles"] else self.cycle_timeout
+        ):
+            # retry soon instead of after a full interval
+            self.poll.defer()
+            return
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    def update_data(self):
-        """Update data."""
         conn = None
+        discard = False
+        # the wait for a session counts against the cycle deadline
+        deadline = time.monotonic() + self.cycle_timeout
         try:
-            # connect and get data from host
-            conn = esx_connect(self.host, self.user, self.passwd, self.port, self.ssl)
+            # borrow a pooled connection and get data from host
+            try:
+                conn = esx_pool(self.conn_details).acquire(self.cycle_timeout)
+            except TimeoutError:
+                # all sessions are busy with actions - not a host failure
+                self.metrics["timeouts"] += 1
+                _LOGGER.warning(
+                    "No session to %s was free within %s seconds - skipping update",
+                    self.host,
+                    self.cycle_timeout,
+                )
+                return
             content = conn.RetrieveContent()
         except Exception as error:  # pylint: disable=broad-except
+            # a pooled session that fails is not handed out again
+            discard = True
+            self.breaker.record_failure()
             _LOGGER.debug("ESXi host is not reachable - skipping update - %s", error)
         else:
-            # get host stats
-            if self.config.get("vmhost") is True:
-                # create/destroy view objects
-                host_objview = content.viewManager.CreateContainerView(
-                    content.rootFolder, [vim.HostSystem], True
+            self.breaker.record_success()
+            started = time.monotonic()
+            round_trips = get_round_trips(conn)
+            self._profile = {
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "outcome": "ok",
+                "sections": {},
+                "_lap": started,
+            }
+            try:
+                self._collect(content, deadline)
+            except CycleDeadlineExceeded:
+                # abandon the cycle - the next one starts on schedule
+                self._profile["outcome"] = "deadline_exceeded"
+                self.metrics["deadline_exceeded"] += 1
+                _LOGGER.warning(
+                    "Refresh of %s exceeded %s seconds - abandoning cycle",
+                    self.host,
+                    self.cycle_timeout,
+                )
+            except OSError as error:
+                # socket timeouts and resets leave the session in an unknown state
+                discard = True
+                self._profile["outcome"] = "timeout"
+                self.metrics["timeouts"] += 1
+                _LOGGER.warning("Refresh of %s aborted: %s", self.host, error)
+            except Exception:
+                # e.g. NotAuthenticated after a vCenter restart
+                discard = True
+                raise
+            finally:
+                self.metrics["cycles"] += 1
+                self.metrics["last_cycle_seconds"] = round(time.monotonic() - started, 2)
+                round_trips = get_round_trips(conn) - round_trips
+                self.federation.charge(round_trips)
+                self._finish_profile(round_trips)
+                self._adapt_interval(started)
+        finally:
+            try:
+                esx_checkin(self.conn_details, conn, discard)
+            finally:
+                self.federation.release()
+
+    def _adapt_interval(self, started):
+        """Shorten the refresh interval on changes, stretch it when idle."""
+        entry_data = self.hass.data[DOMAIN_DATA][self.entry]
+        snapshot = get_state_snapshot(entry_data, entry_data["monitored_conditions"])
+        changes = count_changes(self._snapshot, snapshot)
+        self._snapshot = snapshot
+
+        in_flight = self._in_flight
+        orchestrator = entry_data.get("rolling_reboot")
+        if orchestrator is not None and orchestrator.running:
+            in_flight += 1
+        self.poll.record_cycle(
+            started, self.metrics["last_cycle_seconds"], changes, in_flight
+        )
+
+    def _collect_tasks(self, content):
+        """Return the number of queued and running tasks."""
+        try:
+            props = retrieve_properties(
+                content, vim.Task, ["info.state"], objects=content.taskManager.recentTask
+            )
+        except vmodl.MethodFault as error:
+            # tasks that completed in between are gone
+            _LOGGER.debug("Could not read recent tasks: %s", error.msg)
+            return 0
+        return sum(
+            1
+            for task_props in props.values()
+            if str(task_props.get("info.state")) in TASK_ACTIVE_STATES
+        )
+
+    def _lap(self, section):
+        """Record the time spent in a section of the current cycle."""
+        now = time.monotonic()
+        self._profile["sections"][section] = round(now - self._profile["_lap"], 3)
+        self._profile["_lap"] = now
+
+    def _finish_profile(self, round_trips):
+        """Keep the profile of the finished cycle for diagnostics."""
+        profile = self._profile
+        profile.pop("_lap")
+        profile["duration"] = self.metrics["last_cycle_seconds"]
+        profile["round_trips"] = round_trips
+        profile["objects"] = {
+            cond: len(self.hass.data[DOMAIN_DATA][self.entry][cond])
+            for cond in self.hass.data[DOMAIN_DATA][self.entry]["monitored_conditions"]
+        }
+        self.profiles.append(profile)
+        self._profile = None
+
+    def refresh_object(self, moref):
+        """Re-read a single VM or host and push its state to its entities.
+
+        moref is the managed object id (e.g. "vm-42") of an object seen in a
+        previous cycle. Returns False if the object is unknown or unreachable.
+        """
+        target = self.morefs.get(moref)
+        if target is None or not self.breaker.available:
+            return False
+        cond, name = target
+
+        conn = None
+        discard = False
+        try:
+            conn = esx_checkout(self.conn_details)
+            round_trips = get_round_trips(conn)
+            content = conn.RetrieveContent()
+            if cond == "vm":
+                obj = vim.VirtualMachine(moref, conn._stub)  # pylint: disable=protected-access
+                data = get_vm_info(obj)
+            else:
+                obj = vim.HostSystem(moref, conn._stub)  # pylint: disable=protected-access
+                data = get_host_info(obj)
+            props = self._collect_properties(
+                content, type(obj), ALARM_PROPERTIES, objects=[obj]
+            )
+            data.update(get_alarm_info(moref, props.get(moref, {}), self._alarm_names))
+        except vmodl.fault.ManagedObjectNotFound:
+            # removed - the next full cycle drops it
+            self.morefs.pop(moref, None)
+            return False
+        except Exception as error:  # pylint: disable=broad-except
+            # e.g. NotAuthenticated after a vCenter restart, do not reuse it
+            discard = True
+            _LOGGER.debug("Could not refresh %s %s: %s", cond, name, error)
+            return False
+        finally:
+            if conn is not None:
+                self.federation.charge(get_round_trips(conn) - round_trips)
+            esx_checkin(self.conn_details, conn, discard)
+
+        _LOGGER.debug("Refreshed %s: %s", cond, name)
+        self.poll.mark_activity()
+        # keep values that are only collected by the full cycle (e.g. counters)
+        self.hass.data[DOMAIN_DATA][self.entry][cond][name] = {
+            **self.hass.data[DOMAIN_DATA][self.entry][cond].get(name, {}),
+            **data,
+        }
+        self.metrics["object_refreshes"] += 1
+        dispatcher_send(
+            self.hass, SIGNAL_OBJECT_UPDATED.format(self.entry, cond, name)
+        )
+        return True
+
+    def find_moref(self, cond, name):
+        """Return the managed object id of a VM or host seen in a cycle."""
+        return next(
+            (moref for moref, target in self.morefs.items() if target == (cond, name)),
+            None,
+        )
+
+    async def async_refresh_after_action(self, cond, name, follow_up=False):
+        """Refresh a VM or host right after an action on it completed.
+
+        With follow_up the object is refreshed again after REFRESH_FOLLOW_UP
+        seconds, for commands that return before they take effect (guest
+        shutdown/reboot, host reboot/shutdown).
+        """
+        moref = self.find_moref(cond, name)
+        if moref is None:
+            return
+        self.poll.mark_activity()
+        await self.hass.async_add_executor_job(self.refresh_object, moref)
+
+        # a new action replaces the follow-ups of an earlier one
+        for unsub in self._follow_ups.pop(moref, []):
+            unsub()
+        if follow_up:
+
+            @callback
+            def _follow_up(_now):
+                self.hass.async_add_executor_job(self.refresh_object, moref)
+
+            self._follow_ups[moref] = [
+                async_call_later(self.hass, delay, _follow_up)
+                for delay in REFRESH_FOLLOW_UP
+            ]
+
+    @callback
+    def async_cancel_follow_ups(self):
+        """Cancel pending follow-up refreshes."""
+        for unsubs in self._follow_ups.values():
+            for unsub in unsubs:
+                unsub()
+        self._follow_ups = {}
+
+    def _collect_properties(self, content, obj_type, path_set, container=None, objects=None):
+        """Read properties, including triggered alarms, of many objects at once.
+
+        Alarm names are cached, only alarms not seen before are looked up.
+        """
+        props = retrieve_properties(
+            content, obj_type, path_set, container=container, objects=objects
+        )
+
+        unknown = {}
+        for obj_props in props.values():
+            for alarm_state in obj_props.get("triggeredAlarmState", []):
+                alarm_id = alarm_state.alarm._moId  # pylint: disable=protected-access
+                if alarm_id not in self._alarm_names:
+                    unknown[alarm_id] = alarm_state.alarm
+        if unknown:
+            names = retrieve_properties(
+                content, vim.alarm.Alarm, ["info.name"], objects=list(unknown.values())
+            )
+            for alarm_id, alarm_props in names.items():
+                self._alarm_names[alarm_id] = alarm_props.get("info.name", alarm_id)
+
+        return props
+
+    def _collect_counters(self, content, entities, counters):
+        """Return performance counters of VMs or hosts, queried in one call."""
+        try:
+            return self.perf.query(content.perfManager, entities, counters)
+        except vmodl.MethodFault as error:
+            _LOGGER.debug("Performance counters are not available: %s", error)
+            return None
+
+    def _collect_datastore_perf(self, content, esxi_hosts=None, states=None):
+        """Return datastore IOPS, throughput and latency totals by volume id.
+
+        All connected hosts are queried in one QueryPerf call. esxi_hosts and
+        states are all hosts and their properties if the cycle read them.
+        """
+        try:
+            host_values = self.perf.query(
+                content.perfManager,
+                get_connected_hosts(content, esxi_hosts, states),
+                DATASTORE_COUNTERS,
+            )
+        except vmodl.MethodFault as error:
+            _LOGGER.debug("Datastore performance counters are not available: %s", error)
+            return {}
+        return aggregate_datastore_perf(host_values)
+
+    def invalidate_membership(self):
+        """Re-read cluster/resource pool membership in the next cycle."""
+        self._membership_expires = 0.0
+        self.scope.invalidate()
+
+    def _scoped_objects(self, content, obj_type, path_set):
+        """Return the monitored objects of obj_type and their properties."""
+        if self.scope.unrestricted:
+            objview = content.viewManager.CreateContainerView(
+                content.rootFolder, [obj_type], True
+            )
+            objects = objview.view
+            props = self._collect_properties(
+                content, obj_type, path_set, container=objview
+            )
+            objview.Destroy()
+            return objects, props
+
+        objects = self.scope.select(content, obj_type)
+        return objects, self._collect_properties(
+            content, obj_type, path_set, objects=objects
+        )
+
+    def _collect_aggregates(self, content):
+        """Compute cluster and resource pool aggregates from collected data.
+
+        Membership is read once and only again when it expires, when events
+        invalidate it or when objects appear that were not seen before.
+        """
+        if (
+            self._membership_expires <= time.monotonic()
+            or set(self.morefs) - self._membership_seen
+        ):
+            self.membership = get_membership(content)
+            self._membership_seen = set(self.morefs)
+            self._membership_expires = time.monotonic() + MEMBERSHIP_TTL
+
+        data = self.hass.data[DOMAIN_DATA][self.entry]
+        history = data["history"]
+        clusters = {}
+        pools = {}
+        for moid, (cond, name) in self.morefs.items():
+            obj_data = data[cond].get(name)
+            if obj_data is None:
+                continue
+            if cond == "vmhost" and moid in self.membership["host_cluster"]:
+                clusters.setdefault(self.membership["host_cluster"][moid], []).append(obj_data)
+            elif cond == "vm":
+                for pool in self.membership["vm_pools"].get(moid, []):
+                    pools.setdefault(pool, []).append(obj_data)
+
+        if self.config.get("vmhost") is True:
+            for cluster, hosts in clusters.items():
+                data["cluster"][cluster] = get_cluster_info(hosts)
+                history.record("cluster", cluster, data["cluster"][cluster])
+            self._forget_gone("cluster", clusters)
+        if self.config.get("vm") is True:
+            recorded = set()
+            for pool, cluster in self.membership["pool_cluster"].items():
+                # pools without monitored VMs are out of scope
+                if pool not in pools and not self.scope.unrestricted:
+                    continue
+                data["resource_pool"][pool] = get_resource_pool_info(
+                    pools.get(pool, []), cluster, self.membership["pool_names"].get(pool)
+                )
+                history.record("resource_pool", pool, data["resource_pool"][pool])
+                recorded.add(pool)
+            self._forget_gone("resource_pool", recorded)
+
+    def _forget_gone(self, cond, names):
+        """Drop the history of objects recorded last cycle but not in this one."""
+        names = set(names)
+        history = self.hass.data[DOMAIN_DATA][self.entry]["history"]
+        for name in self._recorded.get(cond, set()) - names:
+            history.forget(cond, name)
+        self._recorded[cond] = names
+
+    def _collect_licenses(self, content, host_names):
+        """Classify licenses, reusing the cached result while it is fresh.
+
+        Licenses rarely change, so they are only read again when the cache
+        expires or when the set of hosts seen in this cycle changes.
+        """
+        hint = (
+            tuple(sorted(host["original_name"] for host in host_names))
+            if host_names is not None
+            else None
+        )
+        if (
+            self._license_expires > time.monotonic()
+            and (hint is None or hint == self._license_hint)
+        ):
+            _LOGGER.debug("Using cached license data")
+            return
+
+        if host_names is None:
+            # hosts were not collected in this cycle - list them for context
+            host_objview = content.viewManager.CreateContainerView(
+                content.rootFolder, [vim.HostSystem], True
+            )
+            esxi_hosts = host_objview.view
+            host_objview.Destroy()
+            host_names = [
+                {
+                    "name": esxi_host.summary.config.name.replace(" ", "_").lower(),
+                    "original_name": esxi_host.summary.config.name,
+                }
+                for esxi_host in esxi_hosts
+            ]
+            hint = tuple(sorted(host["original_name"] for host in host_names))
+
+        licenses, self.license_api = classify_licenses(
+            content.licenseManager.licenses, host_names, self.host
+        )
+        self.hass.data[DOMAIN_DATA][self.entry]["license"].update(licenses)
+        self._license_hint = hint
+        self._license_expires = time.monotonic() + LICENSE_CACHE_TTL
+
+    def _check_deadline(self, deadline):
+        """Raise if the refresh cycle has run past its deadline."""
+        if time.monotonic() > deadline:
+            raise CycleDeadlineExceeded
+
+    def _collect(self, content, deadline):
+        """Collect data for all monitored conditions."""
+        history = self.hass.data[DOMAIN_DATA][self.entry]["history"]
+        self.vcenter = content.about.apiType == "VirtualCenter"
+        self._in_flight = 0
+
+        # host names of this cycle, reused for license classification
+        host_names = None
+        # all hosts and their states, reused for datastore counters
+        all_hosts = host_props = None
+
+        # get host stats
+        if self.config.get("vmhost") is True:
+            esxi_hosts, props = self._scoped_objects(
+                content, vim.HostSystem, HOST_PROPERTIES
+            )
+            if self.scope.unrestricted:
+                all_hosts, host_props = esxi_hosts, props
+            host_net = self._collect_counters(
+                content,
+                [
+                    esxi_host
+                    for esxi_host in esxi_hosts
+                    if props.get(esxi_host._moId, {}).get("runtime.connectionState")  # pylint: disable=protected-access
+                    == "connected"
+                ],
+                NETWORK_COUNTERS,
+            )
+
+            # Look through object list and get data
+            _LOGGER.debug("Found %s host(s)", len(esxi_hosts))
+            host_names = []
+            for esxi_host in esxi_hosts:
+                self._check_deadline(deadline)
+                host_name = esxi_host.summary.config.name.replace(" ", "_").lower()
+
+                _LOGGER.debug("Getting stats for vmhost: %s", host_name)
+                host_data = get_host_info(esxi_host)
+                host_data.update(
+                    get_alarm_info(
+                        esxi_host._moId,  # pylint: disable=protected-access
+                        props.get(esxi_host._moId, {}),  # pylint: disable=protected-access
+                        self._alarm_names,
+                    )
                 )
-                esxi_hosts = host_objview.view
-                host_objview.Destroy()
-
-                # Look through object list and get data
-                _LOGGER.debug("Found %s host(s)", len(esxi_hosts))
-                for esxi_host in esxi_hosts:
-                    host_name = esxi_host.summary.config.name.replace(" ", "_").lower()
-
-                    _LOGGER.debug("Getting stats for vmhost: %s", host_name)
-                    self.hass.data[DOMAIN_DATA][self.entry]["vmhost"][
-                        host_name
-                    ] = get_host_info(esxi_host)
-
-            # get datastore stats
-            if self.config.get("datastore") is True:
-                # create/destroy view objects
-                ds_objview = content.viewManager.CreateContainerView(
-                    content.rootFolder, [vim.Datastore], True
+                host_data.update(
+                    get_network_info(
+                        host_net.get(esxi_host._moId, {})  # pylint: disable=protected-access
+                        if host_net is not None
+                        else None
+                    )
                 )
-                ds_list = ds_objview.view
-                ds_objview.Destroy()
-
-                # Look through object list and get data
-                _LOGGER.debug("Found %s datastore(s)", len(ds_list))
-                for datastore in ds_list:
-                    ds_name = datastore.summary.name.replace(" ", "_").lower()
-
-                    _LOGGER.debug("Getting stats for datastore: %s", ds_name)
-                    self.hass.data[DOMAIN_DATA][self.entry]["datastore"][
-                        ds_name
-                    ] = get_datastore_info(datastore)
-
-            # get license stats
-            if self.config.get("license") is True:
-                lic_list = content.licenseManager
-
-                # Get all hosts for better context
-                host_objview = content.viewManager.CreateContainerView(
-                    content.rootFolder, [vim.HostSystem], True
+                self.hass.data[DOMAIN_DATA][self.entry]["vmhost"][host_name] = host_data
+                host_names.append({
+                    "name": host_name,
+                    "original_name": self.hass.data[DOMAIN_DATA][self.entry]["vmhost"][host_name]["original_name"],
+                })
+                self.morefs[esxi_host._moId] = ("vmhost", host_name)  # pylint: disable=protected-access
+                history.record(
+                    "vmhost", host_name, self.hass.data[DOMAIN_DATA][self.entry]["vmhost"][host_name]
                 )
-                esxi_hosts = host_objview.view
-                host_objview.Destroy()
-
-                _LOGGER.debug("Found %s license(s) and %s host(s)", len(lic_list.licenses), len(esxi_hosts))
-
-                # Collect host names for reference
-                host_names = []
-                for esxi_host in esxi_hosts:
-                    host_names.append({
-                        'name': esxi_host.summary.config.name.replace(" ", "_").lower(),
-                        'original_name': esxi_host.summary.config.name
-                    })
-
-                # Process each license and assign meaningful names
-                vcenter_license_count = 0
-                esxi_license_count = 0
-                other_license_count = 0
-                processed_license_keys = set()  # Track processed license keys to avoid duplicates
-                valid_licenses = []  # Collect valid licenses first (skip only clearly invalid products)
-
-                # First pass: collect all valid licenses (skip only clearly invalid ones)
-                for lic in lic_list.licenses:
-                    product_name = None  # Start with None to detect missing ProductName
-                    license_key = getattr(lic, 'licenseKey', None) or getattr(lic, 'name', None)
-                    license_name = getattr(lic, 'name', '')
-
-                    for key in lic.properties:
-                        if key.key == "ProductName":
-                            product_name = key.value
-                            break
-
-                    _LOGGER.debug("Checking license: name='%s', product='%s'", license_name, product_name)
-
-                    # Skip licenses without a valid ProductName (will result in product='n/a' in entity)
-                    if product_name is None or product_name == "n/a":
-                        _LOGGER.warning("Filtering out invalid license: name='%s', product='%s'", license_name, product_name)
-                        continue
-
-                    valid_licenses.append(lic)
-
-                # Second pass: process valid licenses
-                for lic in valid_licenses:
-                    # Determine product type for better naming
-                    product_name = "unknown"
-                    license_key = getattr(lic, 'licenseKey', None) or getattr(lic, 'name', None)
-                    license_name = getattr(lic, 'name', '')
-
-                    for key in lic.properties:
-                        if key.key == "ProductName":
-                            product_name = key.value
-                            break
-
-                    product_name_lower = product_name.lower()
-
-                    # Skip if we've already processed this license key (same license used by multiple hosts)
-                    if license_key and license_key in processed_license_keys:
-                        continue
-
-                    # Determine entity name based on product and environment
-                    if "vcenter" in product_name_lower or "vpx" in product_name_lower or "virtualcenter" in product_name_lower:
-                        # vCenter Server license - create one entity
-                        entity_name = "vcenter_license"
-                        associated_host = self.host  # vCenter server itself
-
-                        # Mark this license key as processed
-                        if license_key:
-                            processed_license_keys.add(license_key)
-
-                        _LOGGER.debug("Created vCenter license entity")
-                        self.hass.data[DOMAIN_DATA][self.entry]["license"][
-                            entity_name
-                        ] = get_license_info(lic, associated_host)
-
-                    elif ("esx" in product_name_lower or
-                          "vmware_esx" in product_name_lower or
-                          product_name_lower.startswith("vmware esx") or
-                          "esxi" in product_name_lower):
-                        # ESXi host license - create separate entities for each host, even with shared licenses
-                        for host_info in host_names:
-                            entity_name = f"{host_info['name']}_license"
-                            associated_host = host_info['original_name']
-
-                            self.hass.data[DOMAIN_DATA][self.entry]["license"][
-                                entity_name
-                            ] = get_license_info(lic, associated_host)
-
-                        # Mark this license key as processed
-                        if license_key:
-                            processed_license_keys.add(license_key)
-                        esxi_license_count += 1
-                    else:
-                        # Other/unknown license types
-                        _LOGGER.warning("Unknown license product type: '%s' - please report this for better detection", product_name)
-                        other_license_count += 1
-
-                        # For unknown licenses, create entities for each host if we have hosts
-                        if len(esxi_hosts) > 0:
-                            _LOGGER.info("Treating unknown license as ESXi license for hosts: %s", ", ".join([host['original_name'] for host in host_names]))
-                            for host_info in host_names:
-                                entity_name = f"{host_info['name']}_unknown_license_{other_license_count}"
-                                associated_host = host_info['original_name']
-
-                                self.hass.data[DOMAIN_DATA][self.entry]["license"][
-                                    entity_name
-                                ] = get_license_info(lic, associated_host)
-                        else:
-                            # No hosts - create generic entity
-                            clean_product = product_name_lower.replace(" ", "_").replace("-", "_")
-                            if clean_product == "unknown":
-                                entity_name = f"unknown_license_{other_license_count}"
-                            else:
-                                entity_name = f"{clean_product}_license"
-                            associated_host = self.host
-
-                            self.hass.data[DOMAIN_DATA][self.entry]["license"][
-                                entity_name
-                            ] = get_license_info(lic, associated_host)
-
-                        # Mark this license key as processed
-                        if license_key:
-                            processed_license_keys.add(license_key)            # get vm stats
-            if self.config.get("vm") is True:
-                # create/destroy view objects
-                vm_objview = content.viewManager.CreateContainerView(
-                    content.rootFolder, [vim.VirtualMachine], True
+
+            self._forget_gone("vmhost", [host["name"] for host in host_names])
+            self._lap("vmhost")
+
+        # get datastore stats
+        if self.config.get("datastore") is True:
+            ds_list, alarm_props = self._scoped_objects(
+                content, vim.Datastore, ALARM_PROPERTIES
+            )
+            ds_perf = self._collect_datastore_perf(content, all_hosts, host_props)
+
+            # Look through object list and get data
+            _LOGGER.debug("Found %s datastore(s)", len(ds_list))
+            ds_names = []
+            for datastore in ds_list:
+                self._check_deadline(deadline)
+                ds_name = datastore.summary.name.replace(" ", "_").lower()
+
+                _LOGGER.debug("Getting stats for datastore: %s", ds_name)
+                ds_data = get_datastore_info(datastore)
+
+                # feed the fill-rate estimator and publish its forecast
+                estimator = self.forecast.setdefault(ds_name, FillRateEstimator())
+                estimator.add_sample(
+                    time.time(), ds_data["free_space_gb"], ds_data["total_space_gb"]
                 )
-                vm_list = vm_objview.view
-                vm_objview.Destroy()
-
-                # Look through object list and get data
-                _LOGGER.debug("Found %s VM(s)", len(vm_list))
-                for virtual_machine in vm_list:
-                    vm_name = virtual_machine.summary.config.name.replace(
-                        " ", "_"
-                    ).lower()
-
-                    _LOGGER.debug("Getting stats for vm: %s", vm_name)
-                    self.hass.data[DOMAIN_DATA][self.entry]["vm"][
-                        vm_name
-                    ] = get_vm_info(virtual_machine)
-        finally:
-            if conn is not None:
-                esx_disconnect(conn)
+                ds_data.update(get_forecast_info(estimator))
+                ds_data.update(get_datastore_perf_info(ds_perf.get(ds_data["uuid"])))
+                ds_data.update(
+                    get_alarm_info(
+                        datastore._moId,  # pylint: disable=protected-access
+                        alarm_props.get(datastore._moId, {}),  # pylint: disable=protected-access
+                        self._alarm_names,
+                    )
+                )
+
+                self.hass.data[DOMAIN_DATA][self.entry]["datastore"][
+                    ds_name
+                ] = ds_data
+                history.record(
+                    "datastore", ds_name, self.hass.data[DOMAIN_DATA][self.entry]["datastore"][ds_name]
+                )
+                ds_names.append(ds_name)
+
+            self._forget_gone("datastore", ds_names)
+
+            # persist estimator state outside of the executor thread
+            self.hass.loop.call_soon_threadsafe(self.async_save_forecast)
+            self._lap("datastore")
+
+        # get license stats
+        if self.config.get("license") is True:
+            self._check_deadline(deadline)
+            self._collect_licenses(content, host_names)
+            self._lap("license")
+
+        # get vm stats
+        if self.config.get("vm") is True:
+            # VMs seen by several entries are collected once, preferably via
+            # vCenter - claim them before the full property read
+            vm_list, ids = self._scoped_objects(
+                content, vim.VirtualMachine, VM_CLAIM_PROPERTIES
+            )
+            claimed = []
+            claimed_away = set()
+            for virtual_machine in vm_list:
+                vm_ids = ids.get(virtual_machine._moId, {})  # pylint: disable=protected-access
+                if not vm_ids.get("config.instanceUuid") or self.federation.claim(
+                    vm_ids["config.instanceUuid"], self.entry, self.vcenter
+                ):
+                    claimed.append(virtual_machine)
+                else:
+                    claimed_away.add(vm_ids.get("name", "").replace(" ", "_").lower())
+                    self.morefs.pop(virtual_machine._moId, None)  # pylint: disable=protected-access
+            # entities of VMs another entry collects become unavailable
+            for vm_name in claimed_away:
+                self.hass.data[DOMAIN_DATA][self.entry]["vm"].pop(vm_name, None)
+            self.claimed_away = claimed_away
+            vm_list = claimed
+            props = self._collect_properties(
+                content, vim.VirtualMachine, VM_PROPERTIES, objects=vm_list
+            )
+            # network and virtual disk counters of all VMs in a single query
+            vm_perf = self._collect_counters(
+                content,
+                [
+                    virtual_machine
+                    for virtual_machine in vm_list
+                    if props.get(virtual_machine._moId, {}).get("runtime.powerState")  # pylint: disable=protected-access
+                    == "poweredOn"
+                ],
+                {**NETWORK_COUNTERS, **VIRTUAL_DISK_COUNTERS},
+            )
+
+            # Look through object list and get data
+            _LOGGER.debug("Found %s VM(s)", len(vm_list))
+            vm_names = []
+            for virtual_machine in vm_list:
+                self._check_deadline(deadline)
+                vm_name = virtual_machine.summary.config.name.replace(
+                    " ", "_"
+                ).lower()
+
+                _LOGGER.debug("Getting stats for vm: %s", vm_name)
+                vm_data = get_vm_info(virtual_machine)
+                vm_data.update(
+                    get_alarm_info(
+                        virtual_machine._moId,  # pylint: disable=protected-access
+                        props.get(virtual_machine._moId, {}),  # pylint: disable=protected-access
+                        self._alarm_names,
+                    )
+                )
+                vm_values = (
+                    vm_perf.get(virtual_machine._moId, {})  # pylint: disable=protected-access
+                    if vm_perf is not None
+                    else None
+                )
+                vm_data.update(get_network_info(vm_values))
+                vm_data.update(
+                    get_guest_disk_info(props.get(virtual_machine._moId, {}))  # pylint: disable=protected-access
+                )
+                vm_data.update(
+                    get_virtual_disk_info(
+                        get_virtual_disks(props.get(virtual_machine._moId, {})),  # pylint: disable=protected-access
+                        vm_values,
+                    )
+                )
+                self.hass.data[DOMAIN_DATA][self.entry]["vm"][vm_name] = vm_data
+                self.morefs[virtual_machine._moId] = ("vm", vm_name)  # pylint: disable=protected-access
+                history.record(
+                    "vm", vm_name, self.hass.data[DOMAIN_DATA][self.entry]["vm"][vm_name]
+                )
+                vm_names.append(vm_name)
+
+            self._forget_gone("vm", vm_names)
+            self._lap("vm")
+
+        # get cluster and resource pool aggregates
+        if self.config.get("vmhost") is True or self.config.get("vm") is True:
+            self._check_deadline(deadline)
+            self._collect_aggregates(content)
+            self._lap("aggregates")
+
+        # operations in flight keep the refresh interval short
+        self._check_deadline(deadline)
+        self._in_flight = self._collect_tasks(content)
+        self._lap("tasks")
 
 
 def check_files(hass):
@@ -441,6 +1106,71 @@ def check_files(hass):
     return returnvalue
 
 
+@callback
+def async_get_entry_id(hass, host):
+    """Return the config entry id for a configured host/vCenter."""
+    for _entry in hass.config_entries.async_entries(DOMAIN):
+        if host == _entry.data.get("host") and _entry.entry_id in hass.data.get(
+            DOMAIN_DATA, {}
+        ):
+            return _entry.entry_id
+
+    raise ValueError("Host is not configured in HomeAssistant")
+
+
+@callback
+def async_add_query_services(hass):
+    """Add ESXi Stats read-only services."""
+
+    # Metric history query service
+    async def query_history(call):
+        entry = async_get_entry_id(hass, call.data["host"])
+        cond = call.data["type"]
+        obj = call.data["object"].replace(" ", "_").lower()
+        metric = call.data["metric"]
+        window = call.data["window"]
+
+        history = hass.data[DOMAIN_DATA][entry]["history"]
+        result = history.query(cond, obj, metric, window.total_seconds())
+        if result is None:
+            raise ValueError(
+                f"No history for {cond} '{obj}' metric '{metric}'. "
+                f"Available metrics: {', '.join(history.metrics(cond, obj)) or 'none'}"
+            )
+
+        return {
+            "type": cond,
+            "object": obj,
+            "metric": metric,
+            "window_seconds": int(window.total_seconds()),
+            **result,
+        }
+
+    # Refresh cycle profiler service
+    async def profile_refresh(call):
+        entry = async_get_entry_id(hass, call.data["host"])
+        client = hass.data[DOMAIN_DATA][entry]["client"]
+
+        return await hass.async_add_executor_job(
+            profile_cycle, client, hass.config.path(), call.data["top"]
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        "query_history",
+        query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "profile_refresh",
+        profile_refresh,
+        schema=PROFILE_REFRESH_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
 @callback
 def async_add_services(hass, config_entry):
     """Add ESXi Stats services."""
@@ -460,13 +1190,7 @@ def async_add_services(hass, config_entry):
     def async_get_conn_details(host):
         for _entry in hass.config_entries.async_entries(DOMAIN):
             if host == _entry.data.get("host"):
-                return {
-                    "host": _entry.data.get("host"),
-                    "user": _entry.data.get("username"),
-                    "pwd": _entry.data.get("password"),
-                    "port": _entry.data.get("port"),
-                    "ssl": _entry.data.get("verify_ssl"),
-                }
+                return get_conn_details(_entry.data, _entry.options)
 
         raise ValueError("Host is not configured in HomeAssistant")
 
@@ -483,6 +1207,16 @@ def async_add_services(hass, config_entry):
                 await hass.async_add_executor_job(
                     host_pwr, hass, target_host, cmnd, conn_details, forc, notify
                 )
+                entry_data = hass.data[DOMAIN_DATA][async_get_entry_id(hass, host)]
+                host_names = (
+                    [target_host.replace(" ", "_").lower()]
+                    if target_host
+                    else list(entry_data["vmhost"])
+                )
+                if len(host_names) == 1:
+                    await entry_data["client"].async_refresh_after_action(
+                        "vmhost", host_names[0], follow_up=True
+                    )
             except Exception as error:  # pylint: disable=broad-except
                 _LOGGER.error(str(error))
         else:
@@ -532,6 +1266,58 @@ def async_add_services(hass, config_entry):
         except Exception as error:  # pylint: disable=broad-except
             _LOGGER.error(str(error))
 
+    # Power policy of many hosts service
+    async def host_power_policy_bulk(call):
+        conn_details = async_get_conn_details(call.data["host"])
+
+        return await hass.async_add_executor_job(
+            bulk_power_policy,
+            conn_details,
+            call.data["command"],
+            call.data.get("target_hosts"),
+            call.data.get("cluster"),
+        )
+
+    # Rolling reboot service (vCenter)
+    async def rolling_reboot(call):
+        entry = async_get_entry_id(hass, call.data["host"])
+        orchestrator = hass.data[DOMAIN_DATA][entry]["rolling_reboot"]
+
+        if call.data["cancel"]:
+            if orchestrator is None or not orchestrator.running:
+                raise ValueError("No rolling reboot is running")
+            orchestrator.cancel()
+            return {"state": "cancelling"}
+
+        if orchestrator is None:
+            orchestrator = RollingReboot(hass, hass.data[DOMAIN_DATA][entry]["client"])
+            hass.data[DOMAIN_DATA][entry]["rolling_reboot"] = orchestrator
+        plan = await hass.async_add_executor_job(
+            orchestrator.prepare,
+            call.data.get("target_hosts"),
+            call.data.get("cluster"),
+            call.data["max_down"],
+        )
+        orchestrator.start()
+        return {"state": "started", **plan}
+
+    # Emergency shutdown service (e.g. UPS on battery)
+    async def emergency_shutdown_service(call):
+        conn_details = async_get_conn_details(call.data["host"])
+        groups = [
+            {"name": group["name"], "vms": group["vm"], "deadline": group["deadline"]}
+            for group in call.data["groups"]
+        ]
+
+        return await hass.async_add_executor_job(
+            emergency_shutdown,
+            conn_details,
+            groups,
+            call.data.get("runtime"),
+            call.data["exclude"],
+            call.data["hosts"],
+        )
+
     # VM power service
     async def vm_power(call):
         host = call.data["host"]
@@ -545,6 +1331,10 @@ def async_add_services(hass, config_entry):
                 await hass.async_add_executor_job(
                     vm_pwr, hass, host, vm_name, vm_uuid, cmnd, conn_details, notify
                 )
+                client = hass.data[DOMAIN_DATA][async_get_entry_id(hass, host)]["client"]
+                await client.async_refresh_after_action(
+                    "vm", vm_name, follow_up=cmnd in FIRE_AND_FORGET_VM_POWER
+                )
             except Exception as error:  # pylint: disable=broad-except
                 _LOGGER.error(str(error))
         else:
@@ -635,6 +1425,27 @@ def async_add_services(hass, config_entry):
         host_power_policy,
         schema=HOST_PWR_POLICY_SCHEMA,
     )
+    hass.services.async_register(
+        DOMAIN,
+        "host_power_policy_bulk",
+        host_power_policy_bulk,
+        schema=BULK_PWR_POLICY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "rolling_reboot",
+        rolling_reboot,
+        schema=ROLLING_REBOOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "emergency_shutdown",
+        emergency_shutdown_service,
+        schema=EMERGENCY_SHUTDOWN_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
 
 
 async def async_unload_entry(hass, config_entry):
@@ -646,17 +1457,51 @@ async def async_unload_entry(hass, config_entry):
             )
         )
     else:
+        listener = hass.data[DOMAIN_DATA][config_entry.entry_id].get("events")
+        if listener is not None:
+            await hass.async_add_executor_job(listener.stop)
+        tags = hass.data[DOMAIN_DATA][config_entry.entry_id].get("tags")
+        if tags is not None:
+            tags.stop()
+        # hosts in progress are finished, no new ones are started
+        orchestrator = hass.data[DOMAIN_DATA][config_entry.entry_id]["rolling_reboot"]
+        if orchestrator is not None:
+            orchestrator.cancel()
+        hass.data[DOMAIN_DATA][config_entry.entry_id]["client"].federation.remove(
+            config_entry.entry_id
+        )
+        hass.data[DOMAIN_DATA][config_entry.entry_id]["client"].async_cancel_follow_ups()
+
         await asyncio.gather(
             *[
                 hass.config_entries.async_forward_entry_unload(config_entry, platform)
                 for platform in PLATFORMS
             ]
         )
+        # log out pooled sessions of this host/vCenter
+        await hass.async_add_executor_job(
+            esx_close_pool, get_conn_details(config_entry.data)
+        )
+        # the view outlives the entry, a reload creates a new client
+        view = hass.data.get(f"{DOMAIN}_metrics_view")
+        if view is not None:
+            view.forget(config_entry.entry_id)
+        hass.data[DOMAIN_DATA].pop(config_entry.entry_id, None)
         _LOGGER.info("Successfully removed the ESXi Stats integration")
 
     return True
 
 
+async def async_remove_entry(hass, config_entry):
+    """Remove data stored for an entry that is being deleted."""
+    await Store(
+        hass, FORECAST_STORAGE_VERSION, f"{DOMAIN}.{config_entry.entry_id}.forecast"
+    ).async_remove()
+    await Store(
+        hass, EVENTS_STORAGE_VERSION, f"{DOMAIN}.{config_entry.entry_id}.events"
+    ).async_remove()
+
+
 @callback
 def async_update_options(hass, config_entry):
     """Update config entry options"""
@@ -0,0 +1,149 @@
+"""Cluster and resource pool aggregates for ESXi Stats."""
+import logging
+
+from pyVmomi import vim  # pylint: disable=no-name-in-module
+
+from .esxi import retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _key(name):
+    return name.replace(" ", "_").lower()
+
+
+def get_membership(content):
+    """Read host to cluster and VM to resource pool membership.
+
+    Returns a dict with "host_cluster" (host id to cluster key), "vm_pools"
+    (VM id to the keys of its pool and all parent pools), "pool_cluster"
+    (pool key to cluster key) and "pool_names" (pool key to display name).
+    Root pools ("Resources") are skipped. Pools are keyed by name, pools
+    whose name is not unique by their path (cluster and parent pools).
+    """
+    cluster_view = content.viewManager.CreateContainerView(
+        content.rootFolder, [vim.ClusterComputeResource], True
+    )
+    clusters = retrieve_properties(
+        content, vim.ClusterComputeResource, ["name", "host"], container=cluster_view
+    )
+    cluster_view.Destroy()
+
+    pool_view = content.viewManager.CreateContainerView(
+        content.rootFolder, [vim.ResourcePool], True
+    )
+    pools = retrieve_properties(
+        content, vim.ResourcePool, ["name", "parent", "owner", "vm"], container=pool_view
+    )
+    pool_view.Destroy()
+
+    cluster_names = {moid: _key(props["name"]) for moid, props in clusters.items()}
+    host_cluster = {
+        host._moId: cluster_names[moid]  # pylint: disable=protected-access
+        for moid, props in clusters.items()
+        for host in props.get("host", [])
+    }
+
+    def is_pool(moid):
+        parent = pools[moid].get("parent")
+        return isinstance(parent, vim.ResourcePool)
+
+    def path(moid):
+        # names of the pool and its parent pools below the root, root first
+        names = []
+        while moid in pools and is_pool(moid):
+            names.insert(0, _key(pools[moid]["name"]))
+            moid = pools[moid]["parent"]._moId  # pylint: disable=protected-access
+        return names
+
+    # pool names are only unique per parent, duplicates are keyed by path
+    names = [_key(props["name"]) for moid, props in pools.items() if is_pool(moid)]
+    pool_keys = {}
+    pool_cluster = {}
+    pool_names = {}
+    for moid, props in pools.items():
+        if not is_pool(moid):
+            continue
+        owner = props.get("owner")
+        cluster = cluster_names.get(owner._moId) if owner is not None else None  # pylint: disable=protected-access
+        pool_key = _key(props["name"])
+        if names.count(pool_key) > 1:
+            pool_key = "_".join(([cluster] if cluster is not None else []) + path(moid))
+        if pool_key in pool_cluster:
+            # same path in a standalone host or a folder, fall back to the id
+            pool_key = f"{pool_key}_{moid}"
+        pool_keys[moid] = pool_key
+        pool_cluster[pool_key] = cluster
+        pool_names[pool_key] = props["name"]
+
+    vm_pools = {}
+    for moid, props in pools.items():
+        if not is_pool(moid):
+            continue
+        # a VM counts towards its pool and every parent pool below the root
+        lineage = []
+        current = moid
+        while current in pools and is_pool(current):
+            lineage.append(pool_keys[current])
+            current = pools[current]["parent"]._moId  # pylint: disable=protected-access
+        for virtual_machine in props.get("vm", []):
+            vm_pools.setdefault(virtual_machine._moId, []).extend(lineage)  # pylint: disable=protected-access
+
+    _LOGGER.debug(
+        "Found %s cluster(s) and %s resource pool(s)",
+        len(clusters),
+        sum(1 for moid in pools if is_pool(moid)),
+    )
+
+    return {
+        "host_cluster": host_cluster,
+        "vm_pools": vm_pools,
+        "pool_cluster": pool_cluster,
+        "pool_names": pool_names,
+    }
+
+
+def _total(items, key):
+    return sum(
+        item[key]
+        for item in items
+        if isinstance(item.get(key), (int, float)) and not isinstance(item.get(key), bool)
+    )
+
+
+def get_cluster_info(hosts):
+    """Get cluster information from the data of its hosts."""
+    cpu_total = _total(hosts, "cputotal_ghz")
+    cpu_usage = _total(hosts, "cpuusage_ghz")
+    mem_total = _total(hosts, "memtotal_gb")
+    mem_usage = _total(hosts, "memusage_gb")
+
+    cluster_data = {
+        "hosts": len(hosts),
+        "hosts_connected": sum(1 for host in hosts if host.get("cputotal_ghz") != "n/a"),
+        "cputotal_ghz": round(cpu_total, 1),
+        "cpuusage_ghz": round(cpu_usage, 1),
+        "cpu_usage_pct": round(100 * cpu_usage / cpu_total, 1) if cpu_total else "n/a",
+        "memtotal_gb": round(mem_total, 2),
+        "memusage_gb": round(mem_usage, 2),
+        "mem_usage_pct": round(100 * mem_usage / mem_total, 1) if mem_total else "n/a",
+        "vms": _total(hosts, "vms"),
+    }
+
+    return cluster_data
+
+
+def get_resource_pool_info(vms, cluster, name=None):
+    """Get resource pool information from the data of its VMs."""
+    pool_data = {
+        "name": name,
+        "cluster": cluster or "n/a",
+        "vms": len(vms),
+        "vms_running": sum(1 for vm in vms if vm.get("state") == "running"),
+        "vcpus": _total(vms, "cpu_count"),
+        "memory_allocated_gb": round(_total(vms, "memory_allocated_mb") / 1024, 2),
+        "memory_used_gb": round(_total(vms, "memory_used_mb") / 1024, 2),
+        "used_space_gb": round(_total(vms, "used_space_gb"), 2),
+    }
+
+    return pool_data
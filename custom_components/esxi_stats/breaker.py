@@ -0,0 +1,93 @@
+"""Circuit breaker for unreachable hosts."""
+import logging
+import random
+import time
+from threading import Lock
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive failures before the breaker opens
+BREAKER_THRESHOLD = 3
+# Backoff between probes, doubled after every failed probe
+BREAKER_BASE_DELAY = 30
+BREAKER_MAX_DELAY = 900
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Skip connection attempts to a host that keeps failing.
+
+    After BREAKER_THRESHOLD consecutive failures the breaker opens and only a
+    single probe is let through once the backoff delay has passed. A failed
+    probe doubles the delay (with jitter), a successful one closes the breaker.
+    """
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, base_delay=BREAKER_BASE_DELAY, max_delay=BREAKER_MAX_DELAY):
+        """Initialize the breaker closed."""
+        self.name = name
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.retry_at = 0.0
+        self._lock = Lock()
+
+    @property
+    def available(self):
+        """Return True unless the breaker is open or probing."""
+        return self.state == STATE_CLOSED
+
+    def allow(self):
+        """Return True if a connection attempt may be made now."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.monotonic() >= self.retry_at:
+                self.state = STATE_HALF_OPEN
+                _LOGGER.debug("Probing %s after backoff", self.name)
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful attempt."""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                _LOGGER.info("%s is reachable again", self.name)
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.opened = 0
+
+    def record_failure(self):
+        """Count a failed attempt and open the breaker when needed."""
+        with self._lock:
+            self.failures += 1
+            if self.state != STATE_HALF_OPEN and self.failures < self.threshold:
+                return
+
+            delay = min(self.max_delay, self.base_delay * 2 ** self.opened)
+            # equal jitter keeps entries that failed together from probing together
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            self.opened += 1
+            self.state = STATE_OPEN
+            self.retry_at = time.monotonic() + delay
+            _LOGGER.warning(
+                "%s is unreachable after %s attempt(s) - next attempt in %.0f seconds",
+                self.name,
+                self.failures,
+                delay,
+            )
+
+    def as_dict(self):
+        """Return breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": max(0.0, round(self.retry_at - time.monotonic(), 1))
+            if self.state == STATE_OPEN
+            else 0.0,
+        }
@@ -8,7 +8,8 @@ from .const import (
     DOMAIN_DATA,
     DEFAULT_NAME,
 )
-from .esxi import host_pwr, vm_pwr, vm_snap_take, vm_snap_remove
+from .entity import ESXiEntity
+from .esxi import get_conn_details, host_pwr, vm_pwr, vm_snap_take, vm_snap_remove
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         async_add_entities(buttons, True)
 
 
-class ESXiHostRebootButton(ButtonEntity):
+class ESXiHostRebootButton(ESXiEntity, ButtonEntity):
     """ESXi Host Reboot Button."""
 
     def __init__(self, hass, config, host_name, config_entry):
@@ -48,13 +49,12 @@ class ESXiHostRebootButton(ButtonEntity):
         self._host_name = host_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vmhost", host_name)
         self._host_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._host_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vmhost"][self._host_name]
         except KeyError:
             _LOGGER.error("Host %s not found in data", self._host_name)
@@ -78,6 +78,8 @@ class ESXiHostRebootButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Only available if host is powered on
         if not self._host_data:
             return False
@@ -120,13 +122,7 @@ class ESXiHostRebootButton(ButtonEntity):
                 )
                 return
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             # Use the original host name from stored data for exact matching
             target_host = self._host_data.get("original_name", self._host_name)
@@ -145,8 +141,10 @@ class ESXiHostRebootButton(ButtonEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new state, the host goes down after the task
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vmhost", self._host_name, follow_up=True
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to reboot host %s: %s", self._host_name, e)
@@ -162,7 +160,7 @@ class ESXiHostRebootButton(ButtonEntity):
         return None  # This is a control button, not a config button
 
 
-class ESXiVMRebootButton(ButtonEntity):
+class ESXiVMRebootButton(ESXiEntity, ButtonEntity):
     """ESXi VM Reboot Button."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -172,13 +170,12 @@ class ESXiVMRebootButton(ButtonEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._vm_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
         except KeyError:
             _LOGGER.error("VM %s not found in data", self._vm_name)
@@ -203,6 +200,8 @@ class ESXiVMRebootButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Only available if VM is powered on
         if not self._vm_data:
             return False
@@ -265,13 +264,7 @@ class ESXiVMRebootButton(ButtonEntity):
 
             _LOGGER.info("VM %s: Using %s", self._vm_name, reboot_method)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_pwr,
@@ -284,8 +277,10 @@ class ESXiVMRebootButton(ButtonEntity):
                 False  # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new state, a guest reboot is followed up
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name, follow_up=reboot_command == "reboot"
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to reboot VM %s: %s", self._vm_name, e)
@@ -301,7 +296,7 @@ class ESXiVMRebootButton(ButtonEntity):
         return None  # This is a control button, not a config button
 
 
-class ESXiVMSnapshotCreateButton(ButtonEntity):
+class ESXiVMSnapshotCreateButton(ESXiEntity, ButtonEntity):
     """ESXi VM Create Snapshot Button."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -311,13 +306,12 @@ class ESXiVMSnapshotCreateButton(ButtonEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._vm_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
         except KeyError:
             _LOGGER.error("VM %s not found in data", self._vm_name)
@@ -342,6 +336,8 @@ class ESXiVMSnapshotCreateButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Available regardless of VM power state
         return self._vm_data is not None and "state" in self._vm_data
 
@@ -388,13 +384,7 @@ class ESXiVMSnapshotCreateButton(ButtonEntity):
 
             _LOGGER.info("Creating snapshot '%s' for VM %s", snap_name, vm_proper_name)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_snap_take,
@@ -410,8 +400,10 @@ class ESXiVMSnapshotCreateButton(ButtonEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new snapshot count to the VM's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to create snapshot for VM %s: %s", self._vm_name, e)
@@ -427,7 +419,7 @@ class ESXiVMSnapshotCreateButton(ButtonEntity):
         return None  # This is a control button, not a config button
 
 
-class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
+class ESXiVMSnapshotRemoveAllButton(ESXiEntity, ButtonEntity):
     """ESXi VM Remove All Snapshots Button."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -437,13 +429,12 @@ class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._vm_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
         except KeyError:
             _LOGGER.error("VM %s not found in data", self._vm_name)
@@ -468,6 +459,8 @@ class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Only available if VM has snapshots
         if not self._vm_data:
             return False
@@ -514,13 +507,7 @@ class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
             vm_proper_name = self._vm_data.get("vm_name", self._vm_name)
             _LOGGER.info("Removing all snapshots for VM %s", vm_proper_name)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_snap_remove,
@@ -533,8 +520,10 @@ class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new snapshot count to the VM's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to remove all snapshots for VM %s: %s", self._vm_name, e)
@@ -550,7 +539,7 @@ class ESXiVMSnapshotRemoveAllButton(ButtonEntity):
         return None  # This is a control button, not a config button
 
 
-class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
+class ESXiVMSnapshotRemoveFirstButton(ESXiEntity, ButtonEntity):
     """ESXi VM Remove First Snapshot Button."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -560,13 +549,12 @@ class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._vm_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
         except KeyError:
             _LOGGER.error("VM %s not found in data", self._vm_name)
@@ -591,6 +579,8 @@ class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Only available if VM has snapshots
         if not self._vm_data:
             return False
@@ -637,13 +627,7 @@ class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
             vm_proper_name = self._vm_data.get("vm_name", self._vm_name)
             _LOGGER.info("Removing first snapshot for VM %s", vm_proper_name)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_snap_remove,
@@ -656,8 +640,10 @@ class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new snapshot count to the VM's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to remove first snapshot for VM %s: %s", self._vm_name, e)
@@ -673,7 +659,7 @@ class ESXiVMSnapshotRemoveFirstButton(ButtonEntity):
         return None  # This is a control button, not a config button
 
 
-class ESXiVMSnapshotRemoveLastButton(ButtonEntity):
+class ESXiVMSnapshotRemoveLastButton(ESXiEntity, ButtonEntity):
     """ESXi VM Remove Last Snapshot Button."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -683,13 +669,12 @@ class ESXiVMSnapshotRemoveLastButton(ButtonEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._vm_data = {}
 
-    def update(self):
-        """Update the button state."""
+    def _read_data(self):
+        """Read the button state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
         except KeyError:
             _LOGGER.error("VM %s not found in data", self._vm_name)
@@ -714,6 +699,8 @@ class ESXiVMSnapshotRemoveLastButton(ButtonEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         # Only available if VM has snapshots
         if not self._vm_data:
             return False
@@ -760,13 +747,7 @@ class ESXiVMSnapshotRemoveLastButton(ButtonEntity):
             vm_proper_name = self._vm_data.get("vm_name", self._vm_name)
             _LOGGER.info("Removing last snapshot for VM %s", vm_proper_name)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_snap_remove,
@@ -779,8 +760,10 @@ class ESXiVMSnapshotRemoveLastButton(ButtonEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new snapshot count to the VM's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to remove last snapshot for VM %s: %s", self._vm_name, e)
@@ -7,17 +7,44 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 
 from .const import (
+    CONF_ATTRIBUTES,
+    CONF_CLUSTERS,
+    CONF_CONNECT_TIMEOUT,
+    CONF_CYCLE_TIMEOUT,
     CONF_DS_STATE,
+    CONF_EVENTS,
+    CONF_EXCLUDE,
+    CONF_FEDERATION_CALLS,
+    CONF_FEDERATION_CONCURRENCY,
+    CONF_FOLDERS,
+    CONF_INCLUDE,
     CONF_LIC_STATE,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_METRICS,
     CONF_NOTIFY,
+    CONF_READ_TIMEOUT,
+    CONF_RESOURCE_POOLS,
+    CONF_TAGS,
+    CONF_TEMPLATES,
     DOMAIN,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_CYCLE_TIMEOUT,
+    DEFAULT_EVENTS,
+    DEFAULT_FEDERATION_CALLS,
+    DEFAULT_FEDERATION_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_METRICS,
+    DEFAULT_OPTIONS,
     DEFAULT_PORT,
+    DEFAULT_READ_TIMEOUT,
     DEFAULT_DS_STATE,
     DEFAULT_LIC_STATE,
+    DEFAULT_TEMPLATES,
     DATASTORE_STATES,
     LICENSE_STATES,
 )
 from .esxi import esx_connect, esx_disconnect
+from .sizing import estimate_cost, probe_inventory
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,6 +66,8 @@ class ESXiStatsFlowHandler(config_entries.ConfigFlow):
     def __init__(self):
         """Initialize."""
         self._errors = {}
+        self._data = None
+        self._sizing = None
 
     async def async_step_user(self, user_input={}):  # pylint: disable=dangerous-default-value
         """Handle a flow initialized by the user."""
@@ -62,6 +91,9 @@ class ESXiStatsFlowHandler(config_entries.ConfigFlow):
                 user_input["password"],
             )
             if valid:
+                self._data = user_input
+                if self._sizing is not None:
+                    return await self.async_step_sizing()
                 return self.async_create_entry(
                     title=user_input["host"], data=user_input
                 )
@@ -120,6 +152,57 @@ class ESXiStatsFlowHandler(config_entries.ConfigFlow):
             step_id="user", data_schema=vol.Schema(data_schema), errors=self._errors
         )
 
+    async def async_step_sizing(self, user_input=None):
+        """Show the projected cost of the configuration before creating it.
+
+        Scoping options can be set here so the first refresh is already scoped.
+        """
+        if user_input is not None:
+            return self.async_create_entry(
+                title=self._data["host"],
+                data=self._data,
+                options={**DEFAULT_OPTIONS, **user_input},
+            )
+
+        conditions = [
+            cond
+            for cond in ["vmhost", "datastore", "license", "vm"]
+            if self._data.get(cond)
+        ]
+        cost = estimate_cost(self._sizing, conditions)
+        suggestions = (
+            "Consider to " + "; ".join(cost["suggestions"]) + "."
+            if cost["suggestions"]
+            else ""
+        )
+
+        return self.async_show_form(
+            step_id="sizing",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_INCLUDE, default=""): str,
+                    vol.Optional(CONF_EXCLUDE, default=""): str,
+                    vol.Optional(CONF_FOLDERS, default=""): str,
+                    vol.Optional(CONF_CLUSTERS, default=""): str,
+                    vol.Optional(CONF_TAGS, default=""): str,
+                    vol.Optional(CONF_TEMPLATES, default=DEFAULT_TEMPLATES): bool,
+                }
+            ),
+            description_placeholders={
+                "hosts": str(self._sizing["vmhost"]),
+                "vms": str(self._sizing["vm"]),
+                "templates": str(self._sizing["templates"]),
+                "datastores": str(self._sizing["datastore"]),
+                "clusters": str(self._sizing["cluster"]),
+                "resource_pools": str(self._sizing["resource_pool"]),
+                "entities": str(cost["entities"]),
+                "api_calls": str(cost["api_calls"]),
+                "cycle_seconds": str(cost["cycle_seconds"]),
+                "interval": str(cost["interval"]),
+                "suggestions": suggestions,
+            },
+        )
+
     async def async_step_import(self, user_input):
         """Import a config entry.
 
@@ -139,9 +222,19 @@ class ESXiStatsFlowHandler(config_entries.ConfigFlow):
     def _test_communication(self, host, port, verify_ssl, username, password):
         """Return true if the communication is ok."""
         try:
-            conn = esx_connect(host, username, password, port, verify_ssl)
+            conn = esx_connect(
+                host, username, password, port, verify_ssl,
+                DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT,
+            )
             _LOGGER.debug(conn)
 
+            # a failed probe only skips the sizing step
+            try:
+                self._sizing = probe_inventory(conn)
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.debug("Could not size the inventory: %s", exception)
+                self._sizing = None
+
             esx_disconnect(conn)
             return True
         except Exception as exception:  # pylint: disable=broad-except
@@ -184,6 +277,88 @@ class ESXiStatsOptionsFlow(config_entries.OptionsFlow):
                         CONF_NOTIFY,
                         default=self.config_entry.options.get(CONF_NOTIFY, True),
                     ): bool,
+                    vol.Optional(
+                        CONF_CONNECT_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+                    vol.Optional(
+                        CONF_READ_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                    vol.Optional(
+                        CONF_CYCLE_TIMEOUT,
+                        default=self.config_entry.options.get(
+                            CONF_CYCLE_TIMEOUT, DEFAULT_CYCLE_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Optional(
+                        CONF_EVENTS,
+                        default=self.config_entry.options.get(
+                            CONF_EVENTS, DEFAULT_EVENTS
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_METRICS,
+                        default=self.config_entry.options.get(
+                            CONF_METRICS, DEFAULT_METRICS
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MAX_POLL_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=15, max=3600)),
+                    vol.Optional(
+                        CONF_FEDERATION_CONCURRENCY,
+                        default=self.config_entry.options.get(
+                            CONF_FEDERATION_CONCURRENCY, DEFAULT_FEDERATION_CONCURRENCY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                    vol.Optional(
+                        CONF_FEDERATION_CALLS,
+                        default=self.config_entry.options.get(
+                            CONF_FEDERATION_CALLS, DEFAULT_FEDERATION_CALLS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_INCLUDE,
+                        default=self.config_entry.options.get(CONF_INCLUDE, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_EXCLUDE,
+                        default=self.config_entry.options.get(CONF_EXCLUDE, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_FOLDERS,
+                        default=self.config_entry.options.get(CONF_FOLDERS, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_CLUSTERS,
+                        default=self.config_entry.options.get(CONF_CLUSTERS, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_RESOURCE_POOLS,
+                        default=self.config_entry.options.get(CONF_RESOURCE_POOLS, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_TEMPLATES,
+                        default=self.config_entry.options.get(
+                            CONF_TEMPLATES, DEFAULT_TEMPLATES
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_TAGS,
+                        default=self.config_entry.options.get(CONF_TAGS, ""),
+                    ): str,
+                    vol.Optional(
+                        CONF_ATTRIBUTES,
+                        default=self.config_entry.options.get(CONF_ATTRIBUTES, ""),
+                    ): str,
                 }
             ),
         )
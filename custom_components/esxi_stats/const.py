@@ -1,4 +1,6 @@
 """Constants for ESXi Stats."""
+from datetime import timedelta
+
 DOMAIN = "esxi_stats"
 DOMAIN_DATA = f"{DOMAIN}_data"
 
@@ -11,6 +13,24 @@ REQUIRED_FILES = [
     "switch.py",
     "button.py",
     "select.py",
+    "history.py",
+    "forecast.py",
+    "pool.py",
+    "breaker.py",
+    "perf.py",
+    "aggregate.py",
+    "profiler.py",
+    "openmetrics.py",
+    "scope.py",
+    "tags.py",
+    "federation.py",
+    "sizing.py",
+    "operations.py",
+    "entity.py",
+    "rolling.py",
+    "polling.py",
+    "shutdown.py",
+    "events.py",
     "config_flow.py",
     "services.yaml",
     "translations/en.json",
@@ -32,42 +52,226 @@ CONF_NAME = "name"
 CONF_DS_STATE = "datastore"
 CONF_LIC_STATE = "license"
 CONF_NOTIFY = "notify"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_CYCLE_TIMEOUT = "cycle_timeout"
+CONF_EVENTS = "events"
+CONF_METRICS = "metrics_endpoint"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+CONF_FEDERATION_CONCURRENCY = "concurrent_refreshes"
+CONF_FEDERATION_CALLS = "api_calls_per_minute"
+CONF_INCLUDE = "include"
+CONF_EXCLUDE = "exclude"
+CONF_FOLDERS = "folders"
+CONF_CLUSTERS = "clusters"
+CONF_RESOURCE_POOLS = "resource_pools"
+CONF_TEMPLATES = "templates"
+CONF_TAGS = "tags"
+CONF_ATTRIBUTES = "attributes"
 
 DEFAULT_NAME = "ESXi"
 DEFAULT_PORT = 443
 DEFAULT_DS_STATE = "free_space_gb"
 DEFAULT_LIC_STATE = "status"
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_CYCLE_TIMEOUT = 120
+# Idle seconds before a keep-alive HTTP connection of the SOAP stub is closed
+KEEPALIVE_TIMEOUT = 300
+# Seconds an action waits for a pooled session before it gives up
+CHECKOUT_TIMEOUT = 120
+# Opt-in, the stream holds an extra session per entry
+DEFAULT_EVENTS = False
+DEFAULT_METRICS = False
+DEFAULT_MAX_POLL_INTERVAL = 300
+# Refresh cycles of all entries share these limits, 0 calls is no limit
+DEFAULT_FEDERATION_CONCURRENCY = 2
+DEFAULT_FEDERATION_CALLS = 1200
+DEFAULT_TEMPLATES = True
 
 DEFAULT_OPTIONS = {
     "datastore": "free_space_gb",
     "license": "status",
     "notify": "true",
+    "connect_timeout": DEFAULT_CONNECT_TIMEOUT,
+    "read_timeout": DEFAULT_READ_TIMEOUT,
+    "cycle_timeout": DEFAULT_CYCLE_TIMEOUT,
+    "events": DEFAULT_EVENTS,
+    "metrics_endpoint": DEFAULT_METRICS,
+    "max_poll_interval": DEFAULT_MAX_POLL_INTERVAL,
+    "concurrent_refreshes": DEFAULT_FEDERATION_CONCURRENCY,
+    "api_calls_per_minute": DEFAULT_FEDERATION_CALLS,
+    "include": "",
+    "exclude": "",
+    "folders": "",
+    "clusters": "",
+    "resource_pools": "",
+    "templates": DEFAULT_TEMPLATES,
+    "tags": "",
+    "attributes": "",
 }
 
 DATASTORE_STATES = [
     "connected_hosts",
+    "days_until_full",
     "free_space_gb",
+    "growth_gb_per_day",
     "total_space_gb",
     "type",
     "virtual_machines",
 ]
 
 LICENSE_STATES = ["expiration_days", "status"]
+# Seconds license data is reused before it is read again
+LICENSE_CACHE_TTL = 6 * 3600
+
+# Datastore forecast attributes that also get their own sensors
+DATASTORE_FORECAST_STATES = ["days_until_full", "growth_gb_per_day"]
+FORECAST_STORAGE_VERSION = 1
+FORECAST_SAVE_DELAY = 300
+
+# Datastore performance attributes that also get their own (disabled) sensors
+DATASTORE_PERF_STATES = [
+    "latency_ms",
+    "read_iops",
+    "read_mbps",
+    "write_iops",
+    "write_mbps",
+]
+
+# Alarm properties read in one batch per object type
+ALARM_PROPERTIES = ["overallStatus", "triggeredAlarmState"]
+# Properties read in one batch per object type
+HOST_PROPERTIES = ALARM_PROPERTIES + ["runtime.connectionState"]
+# Read first, VMs another entry collects are skipped in the full read
+VM_CLAIM_PROPERTIES = ["name", "config.instanceUuid"]
+VM_PROPERTIES = ALARM_PROPERTIES + [
+    "runtime.powerState",
+    "config.hardware.device",
+    "layoutEx.disk",
+    "layoutEx.file",
+    "guest.disk",
+]
+# Per virtual disk metrics, published as disk_<controller><bus>_<unit>_<metric>
+VIRTUAL_DISK_PREFIX = "disk_"
+VIRTUAL_DISK_STATES = [
+    "committed_gb",
+    "latency_ms",
+    "provisioned_gb",
+    "read_iops",
+    "write_iops",
+]
+# Datastore alarm attributes that also get their own sensors
+DATASTORE_ALARM_STATES = ["active_alarms"]
+# Attribute sensors that expose a detail list as their attributes
+ATTRIBUTE_DETAILS = {
+    "active_alarms": "alarms",
+    "net_rx_kbps": "nics",
+    "net_tx_kbps": "nics",
+    "used_space_gb": "disks",
+    "guest_disk_used_pct": "guest_filesystems",
+}
+# Attribute sensors that are disabled by default
+DISABLED_ATTRIBUTES = ["net_rx_dropped", "net_tx_dropped"]
+
+# Seconds cluster/resource pool membership is reused before it is read again
+MEMBERSHIP_TTL = 3600
+# Seconds a VM stays claimed by an entry that stopped seeing it, at least
+# FEDERATION_CLAIM_INTERVALS of the entry's maximum refresh interval
+FEDERATION_CLAIM_TTL = 600
+FEDERATION_CLAIM_INTERVALS = 2
+# Projection of the config flow sizing step, entities and API calls are
+# rough averages per object (e.g. one virtual disk per VM)
+SIZING_ENTITIES_PER_OBJECT = {
+    "vmhost": 25,
+    "datastore": 9,
+    "vm": 36,
+    "cluster": 9,
+    "resource_pool": 6,
+}
+SIZING_CALLS_PER_OBJECT = {"vmhost": 8, "datastore": 3, "vm": 6}
+SIZING_FIXED_CALLS = 20
+SIZING_MIN_INTERVAL = 45
+SIZING_SCOPE_ENTITIES = 2000
+# Tag membership is read from the vCenter REST API on a slow timer
+TAG_REFRESH_INTERVAL = timedelta(minutes=15)
+TAG_REQUEST_TIMEOUT = 30
+TAG_OBJECT_TYPES = ["HostSystem", "Datastore", "VirtualMachine"]
+# Events that change cluster or resource pool membership
+MEMBERSHIP_EVENTS = [
+    "ClusterCreatedEvent",
+    "ClusterDestroyedEvent",
+    "DrsVmMigratedEvent",
+    "HostAddedEvent",
+    "HostRemovedEvent",
+    "ResourcePoolCreatedEvent",
+    "ResourcePoolDestroyedEvent",
+    "ResourcePoolMovedEvent",
+    "VmClonedEvent",
+    "VmCreatedEvent",
+    "VmDeployedEvent",
+    "VmMigratedEvent",
+    "VmRegisteredEvent",
+    "VmRelocatedEvent",
+    "VmRemovedEvent",
+    "VmResourcePoolMovedEvent",
+]
+
+# Diagnostics
+CYCLE_PROFILES = 10
+DIAGNOSTICS_SAMPLE_OBJECTS = 3
+DIAGNOSTICS_MAX_LIST = 10
+
+# Event stream
+EVENT_ESXI_STATS = f"{DOMAIN}_event"
+EVENTS_STORAGE_VERSION = 1
+EVENTS_SAVE_DELAY = 30
+EVENTS_PAGE_SIZE = 100
+EVENTS_WAIT_SECONDS = 30
+# Dispatcher signal sent when a single object was refreshed (entry, cond, name)
+SIGNAL_OBJECT_UPDATED = f"{DOMAIN}_object_updated_{{}}_{{}}_{{}}"
+# Dispatcher signal of rolling reboot progress, formatted with the entry id
+SIGNAL_ROLLING_REBOOT = f"{DOMAIN}_rolling_reboot_{{}}"
 
 MAP_TO_MEASUREMENT = {
     "cpu_count": "CPUs",
     "cpuusage_ghz": "GHz",
+    "days_until_full": "Days",
     "expiration_days": "Days",
     "free_space_gb": "GB",
+    "growth_gb_per_day": "GB/day",
+    "committed_gb": "GB",
+    "latency_ms": "ms",
+    "net_rx_dropped": "packets/s",
+    "net_rx_kbps": "KB/s",
+    "net_tx_dropped": "packets/s",
+    "net_tx_kbps": "KB/s",
+    "provisioned_gb": "GB",
+    "read_iops": "IOPS",
+    "read_mbps": "MB/s",
+    "write_iops": "IOPS",
+    "write_mbps": "MB/s",
     "memusage_gb": "GB",
     "total_space_gb": "GB",
     "uptime_hours": "Hours",
     "virtual_machines": "VMs",
     "vms": "VMs",
     "name": None,  # Name text, no unit
+    "active_alarms": None,  # Count, no unit
+    "overall_status": None,  # Status text
 
     # VM attributes
     "cpu_use_pct": "%",
+    "cpu_usage_pct": "%",
+    "mem_usage_pct": "%",
+    "hosts": "Hosts",
+    "hosts_connected": "Hosts",
+    "vms_running": "VMs",
+    "vcpus": "vCPUs",
+    "memory_allocated_gb": "GB",
+    "memory_used_gb": "GB",
+    "cluster": None,  # Text
+    "guest_disk_used_pct": "%",
     "memory_allocated_mb": "MB",
     "memory_used_mb": "MB",
     "memory_active_mb": "MB",
@@ -104,6 +308,58 @@ AVAILABLE_CMND_VM_SNAP = ["all", "first", "last"]
 AVAILABLE_CMND_HOST_POWER = ["shutdown", "reboot"]
 HOST = "host"
 TARGET_HOST = "target_host"
+TARGET_HOSTS = "target_hosts"
+CLUSTER = "cluster"
 VM = "vm"
 COMMAND = "command"
 FORCE = "force"
+TYPE = "type"
+OBJECT = "object"
+METRIC = "metric"
+WINDOW = "window"
+TOP = "top"
+# Adaptive refresh interval (seconds): floor, growth per quiet cycle and
+# how long the floor is kept after changes or activity
+POLL_MIN_INTERVAL = 15
+POLL_BACKOFF = 1.5
+POLL_ACTIVITY_HOLD = 120
+# Values whose change between cycles counts as activity
+POLL_CHANGE_KEYS = [
+    "state",
+    "status",
+    "overall_status",
+    "active_alarms",
+    "maintenance_mode",
+    "tools_status",
+    "guest_ip",
+    "snapshots",
+    "host_name",
+    "connected_hosts",
+    "virtual_machines",
+]
+TASK_ACTIVE_STATES = ["queued", "running"]
+# Follow-up refreshes (seconds) after commands that take effect later
+REFRESH_FOLLOW_UP = [10, 30, 90]
+# VM commands that return before they take effect
+FIRE_AND_FORGET_VM_POWER = ["reboot", "shutdown"]
+# Concurrent API calls of operations on many hosts
+BULK_WORKERS = 8
+# Rolling reboot limits and timeouts (seconds)
+ROLLING_MAX_DOWN = 16
+ROLLING_MAINTENANCE_TIMEOUT = 3600
+ROLLING_TASK_TIMEOUT = 300
+ROLLING_REBOOT_TIMEOUT = 1800
+ROLLING_POLL_INTERVAL = 15
+MAX_DOWN = "max_down"
+CANCEL = "cancel"
+# Emergency shutdown timings (seconds), the host reserve is kept of the runtime
+SHUTDOWN_DEADLINE = 120
+SHUTDOWN_HOST_RESERVE = 60
+SHUTDOWN_POWEROFF_TIMEOUT = 60
+SHUTDOWN_POLL_INTERVAL = 5
+GROUPS = "groups"
+DEADLINE = "deadline"
+RUNTIME = "runtime"
+EXCLUDE = "exclude"
+SHUTDOWN_HOSTS = "hosts"
+HISTORY_TYPES = ["vmhost", "datastore", "vm", "cluster", "resource_pool"]
@@ -8,23 +8,78 @@ from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
 
 from .const import (
+    DIAGNOSTICS_MAX_LIST,
+    DIAGNOSTICS_SAMPLE_OBJECTS,
     DOMAIN_DATA,
 )
+from .esxi import esx_pool_stats
 
-REDACT_KEYS = {CONF_HOST, CONF_PASSWORD, CONF_USERNAME, "name"}
+REDACT_KEYS = {
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "name",
+    "vm_name",
+    "original_name",
+    "host_name",
+    "guest_ip",
+    "mac_address",
+    "license_key",
+    "uuid",
+    "file",
+    "path",
+}
+
+
+def _truncate(value):
+    """Shorten long lists so the download stays small."""
+    if isinstance(value, list) and len(value) > DIAGNOSTICS_MAX_LIST:
+        return value[:DIAGNOSTICS_MAX_LIST] + [f"... {len(value) - DIAGNOSTICS_MAX_LIST} more"]
+    return value
 
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
 ) -> Dict[str, Any]:
-    """Return diagnostics for a config entry."""
+    """Return diagnostics for a config entry.
+
+    Only the requesting entry is included. Inventories are summarized by
+    object counts plus a few sample objects, so the size does not grow with
+    the estate.
+    """
+    entry_data = hass.data.get(DOMAIN_DATA, {}).get(config_entry.entry_id, {})
+    client = entry_data.get("client")
+    conditions = entry_data.get("monitored_conditions", [])
 
-    entities = hass.data[DOMAIN_DATA]
     diag: dict[str, Any] = {}
     diag["config"] = config_entry.as_dict()
+    diag["objects"] = {cond: len(entry_data.get(cond, {})) for cond in conditions}
+
+    if client is not None:
+        listener = entry_data.get("events")
+        diag["collection"] = {
+            "metrics": dict(client.metrics),
+            "breaker": client.breaker.as_dict(),
+            "pool": esx_pool_stats(client.conn_details),
+            "federation": client.federation.as_dict(),
+            "poll": client.poll.as_dict(),
+            "events": listener.as_dict() if listener is not None else None,
+            "license_api": client.license_api,
+            "cycle_profiles": list(client.profiles),
+        }
 
-    for entity in entities.items():
-        diag["storage_data"] = entity
+    # object names are replaced by their position
+    diag["sample_data"] = {
+        cond: {
+            f"object_{index}": {
+                key: _truncate(value) for key, value in obj_data.items()
+            }
+            for index, obj_data in enumerate(
+                list(entry_data.get(cond, {}).values())[:DIAGNOSTICS_SAMPLE_OBJECTS], 1
+            )
+        }
+        for cond in conditions
+    }
 
     return async_redact_data(diag, REDACT_KEYS)
@@ -0,0 +1,62 @@
+"""Shared entity behaviour for ESXi Stats."""
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN_DATA, SIGNAL_OBJECT_UPDATED
+
+
+class ESXiEntity:
+    """Mixin for entities that show data collected by an entry's client.
+
+    Must come before the Home Assistant entity class in the bases.
+    Subclasses read their state in _read_data and set _target to the
+    (cond, name) of their VM or host to follow its targeted refreshes.
+    """
+
+    _target = None
+
+    async def async_added_to_hass(self):
+        """Subscribe to targeted refreshes of the entity's object."""
+        if self._entry_id is None or self._target is None:
+            return
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_OBJECT_UPDATED.format(self._entry_id, *self._target),
+                self._async_object_updated,
+            )
+        )
+
+    @callback
+    def _async_object_updated(self):
+        """Show the data refresh_object stored, without a full refresh."""
+        self._read_data()
+        self.async_write_ha_state()
+
+    def update(self):
+        """Refresh all data when due, then read the entity's state."""
+        self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
+        if not self._claimed_away():
+            self._read_data()
+
+    def _claimed_away(self):
+        """Return True if another entry collects the entity's VM."""
+        if self._target is None or self._target[0] != "vm":
+            return False
+        client = self.hass.data[DOMAIN_DATA][self._entry_id]["client"]
+        return self._target[1] in client.claimed_away
+
+    def _read_data(self):
+        """Read the entity's state from the collected data."""
+        raise NotImplementedError
+
+    @property
+    def available(self):
+        """Return False while the host/vCenter is unreachable."""
+        # Host/vCenter is unreachable - skip stale data
+        if self._entry_id is None:
+            return True
+        return (
+            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].available
+            and not self._claimed_away()
+        )
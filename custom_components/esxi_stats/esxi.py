@@ -5,27 +5,45 @@ import logging
 from pyVim.connect import SmartConnect, Disconnect
 from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
 
-from .const import SUPPORTED_PRODUCTS
+from .const import (
+    CHECKOUT_TIMEOUT,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    KEEPALIVE_TIMEOUT,
+    SUPPORTED_PRODUCTS,
+)
+from .pool import close_pool, find_pool, get_pool
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def esx_connect(host, user, pwd, port, ssl):
+def esx_connect(host, user, pwd, port, ssl, connect_timeout=None, read_timeout=None):
     """Establish connection with host/vcenter."""
     service_instance = None
 
+    # httpConnectionTimeout bounds the login, connectionPoolTimeout keeps
+    # idle HTTP connections of the SOAP stub alive between calls
+    timeouts = {"connectionPoolTimeout": KEEPALIVE_TIMEOUT}
+    if connect_timeout:
+        timeouts["httpConnectionTimeout"] = connect_timeout
+
     try:
         # connect depending on SSL_VERIFY setting
         if ssl is False:
             service_instance = SmartConnect(
-                host=host, user=user, pwd=pwd, port=port, disableSslCertValidation=True
+                host=host, user=user, pwd=pwd, port=port, disableSslCertValidation=True, **timeouts
             )
         else:
-            service_instance = SmartConnect(host=host, user=user, pwd=pwd, port=port)
+            service_instance = SmartConnect(host=host, user=user, pwd=pwd, port=port, **timeouts)
 
         if service_instance:
             current_session = service_instance.content.sessionManager.currentSession.key
             _LOGGER.debug("Logged in - session %s", current_session)
+            _count_round_trips(service_instance)
+            if read_timeout:
+                set_read_timeout(service_instance, read_timeout)
         else:
             _LOGGER.error("Failed to create service instance for %s", host)
             return None
@@ -40,12 +58,46 @@ def esx_connect(host, user, pwd, port, ssl):
     return service_instance
 
 
+def _count_round_trips(service_instance):
+    """Count the SOAP calls made through a service instance."""
+    stub = service_instance._stub  # pylint: disable=protected-access
+    invoke = stub.InvokeMethod
+    stub.round_trips = 0
+
+    # property reads (InvokeAccessor) are sent through InvokeMethod as well
+    def counted_invoke(*args, **kwargs):
+        stub.round_trips += 1
+        return invoke(*args, **kwargs)
+
+    stub.InvokeMethod = counted_invoke
+
+
+def get_round_trips(service_instance):
+    """Return the number of SOAP calls made through a service instance."""
+    return getattr(service_instance._stub, "round_trips", 0)  # pylint: disable=protected-access
+
+
+def set_read_timeout(service_instance, timeout):
+    """Apply a socket read timeout to all calls made through a service instance."""
+    try:
+        stub = service_instance._stub  # pylint: disable=protected-access
+        # used for every new HTTP connection of the stub
+        stub.schemeArgs["timeout"] = timeout
+        # and for the keep-alive connections it already holds
+        for http_conn, _ in stub.pool:
+            if http_conn.sock is not None:
+                http_conn.sock.settimeout(timeout)
+    except Exception as error:  # pylint: disable=broad-except
+        _LOGGER.debug("Could not set read timeout: %s", error)
+
+
 def esx_disconnect(conn):
     """Kill connection from host/vcenter."""
 
     if conn:
-        current_session = conn.content.sessionManager.currentSession.key
         try:
+            # reading the session is a remote call, it fails on dead sessions
+            current_session = conn.content.sessionManager.currentSession.key
             Disconnect(conn)
             ## This is an old method to disconnect without leaving an active session on the ESXi host
             ## Keeping this commented out, but will remove in future release
@@ -55,6 +107,111 @@ def esx_disconnect(conn):
             _LOGGER.debug(error)
 
 
+def get_conn_details(config, options=None):
+    """Return connection details for a host/vcenter from entry data and options."""
+    options = options or {}
+    return {
+        "host": config["host"],
+        "user": config["username"],
+        "pwd": config["password"],
+        "port": config["port"],
+        "ssl": config["verify_ssl"],
+        "connect_timeout": options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        "read_timeout": options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+    }
+
+
+def _pool_key(conn_details):
+    return (conn_details["host"], conn_details["port"], conn_details["user"])
+
+
+def esx_pool(conn_details):
+    """Return the shared connection pool for a host/vcenter."""
+    return get_pool(
+        _pool_key(conn_details),
+        conn_details["host"],
+        lambda: esx_connect(**conn_details),
+        esx_disconnect,
+    )
+
+
+def esx_checkout(conn_details, timeout=CHECKOUT_TIMEOUT):
+    """Borrow an authenticated connection from the shared pool.
+
+    Waits at most timeout seconds for a free session, returns None on failure.
+    """
+    try:
+        return esx_pool(conn_details).acquire(timeout)
+    except Exception as error:  # pylint: disable=broad-except
+        _LOGGER.error("Failed to connect to %s: %s", conn_details.get("host", "host"), error)
+        return None
+
+
+def esx_checkin(conn_details, conn, discard=False):
+    """Return a borrowed connection to the shared pool.
+
+    discard=True logs the session out instead, e.g. after a read timeout.
+    """
+    if conn:
+        pool = find_pool(_pool_key(conn_details))
+        if pool is not None:
+            pool.release(conn, discard)
+        else:
+            esx_disconnect(conn)
+
+
+def get_api_type(conn_details):
+    """Return "VirtualCenter" or "HostAgent" for a host/vcenter, None if unreachable."""
+    conn = esx_checkout(conn_details)
+    if conn is None:
+        return None
+    discard = False
+    try:
+        return conn.content.about.apiType
+    except Exception as error:  # pylint: disable=broad-except
+        discard = True
+        _LOGGER.debug("Could not read the API type of %s: %s", conn_details["host"], error)
+        return None
+    finally:
+        esx_checkin(conn_details, conn, discard)
+
+
+def esx_pool_stats(conn_details):
+    """Return the state of the shared pool of a host/vcenter, if any."""
+    pool = find_pool(_pool_key(conn_details))
+    return pool.as_dict() if pool is not None else None
+
+
+def esx_close_pool(conn_details):
+    """Log out all pooled connections of a host/vcenter."""
+    close_pool(_pool_key(conn_details))
+
+
+def _parse_license(lic):
+    """Read all properties of a license in a single pass."""
+    info = {"product": None, "expiration": "n/a", "vimapi": False}
+
+    for key in getattr(lic, "properties", None) or []:
+        if key.key == "ProductName":
+            info["product"] = key.value
+        elif key.key == "count_disabled":
+            info["expiration"] = "never"
+        elif key.key == "expirationHours":
+            info["expiration"] = round((key.value / 24))
+        elif key.key == "feature" and getattr(key.value, "key", None) == "vimapi":
+            info["vimapi"] = True
+
+    return info
+
+
+def _license_api_enabled(info):
+    """Return True if a parsed license allows API write access."""
+    # vCenter Server (index 1) or ESX Server (index 0) with vSphere API feature
+    if info["product"] == SUPPORTED_PRODUCTS[1]:
+        return True
+    return info["product"] == SUPPORTED_PRODUCTS[0] and info["vimapi"]
+
+
 def check_license(lic):
     """Retrieve license from connected system."""
     _LOGGER.debug("Checking license type")
@@ -64,51 +221,27 @@ def check_license(lic):
         return False
 
     for license_obj in lic.licenses:
-        if not hasattr(license_obj, 'properties'):
+        info = _parse_license(license_obj)
+        if info["product"] not in SUPPORTED_PRODUCTS:
             continue
 
-        product_name = None
-        for key in license_obj.properties:
-            if key.key == "ProductName":
-                product_name = key.value
-                break
-
-        if not product_name or product_name not in SUPPORTED_PRODUCTS:
-            continue
-
-        _LOGGER.debug("Found %s license", product_name)
-
-        # Check for vCenter Server (index 1)
-        if product_name == SUPPORTED_PRODUCTS[1]:
+        _LOGGER.debug("Found %s license", info["product"])
+        if _license_api_enabled(info):
+            _LOGGER.debug("vSphere API feature enabled")
             return True
 
-        # Check for ESX Server (index 0) with vSphere API feature
-        if product_name == SUPPORTED_PRODUCTS[0]:
-            for feature in license_obj.properties:
-                if (feature.key == "feature" and
-                    hasattr(feature.value, 'key') and
-                    feature.value.key == "vimapi"):
-                    _LOGGER.debug("vSphere API feature enabled")
-                    return True
-
     _LOGGER.warning("No supported license found")
     return False
 
 
-def get_license_info(lic, host):
+def get_license_info(lic, host, info=None):
     """Get license information."""
-    expiration = "n/a"
-    product = "n/a"
+    if info is None:
+        info = _parse_license(lic)
+    expiration = info["expiration"]
+    product = info["product"] or "n/a"
     status = "n/a"
 
-    for key in lic.properties:
-        if key.key == "ProductName":
-            product = key.value
-        if key.key == "count_disabled":
-            expiration = "never"
-        if key.key == "expirationHours":
-            expiration = round((key.value / 24))
-
     if isinstance(expiration, int):
         if expiration > 30:
             status = "Ok"
@@ -133,6 +266,77 @@ def get_license_info(lic, host):
     return license_data
 
 
+def classify_licenses(licenses, host_names, vcenter_host):
+    """Assign licenses to entity names in a single pass.
+
+    host_names is a list of {"name", "original_name"} dicts of the hosts seen
+    in the same refresh. Returns the license data keyed by entity name and
+    whether any license allows API write access.
+    """
+    license_data = {}
+    api_enabled = False
+    processed_license_keys = set()  # same license used by multiple hosts
+    other_license_count = 0
+
+    for lic in licenses:
+        info = _parse_license(lic)
+        product_name = info["product"]
+        license_key = getattr(lic, 'licenseKey', None) or getattr(lic, 'name', None)
+        license_name = getattr(lic, 'name', '')
+
+        _LOGGER.debug("Checking license: name='%s', product='%s'", license_name, product_name)
+
+        # Skip licenses without a valid ProductName (would result in product='n/a' in entity)
+        if product_name is None or product_name == "n/a":
+            _LOGGER.warning("Filtering out invalid license: name='%s', product='%s'", license_name, product_name)
+            continue
+
+        api_enabled = api_enabled or _license_api_enabled(info)
+
+        if license_key and license_key in processed_license_keys:
+            continue
+        if license_key:
+            processed_license_keys.add(license_key)
+
+        # license details do not depend on the host, build them once
+        base_data = get_license_info(lic, vcenter_host, info)
+        product_name_lower = product_name.lower()
+
+        if "vcenter" in product_name_lower or "vpx" in product_name_lower or "virtualcenter" in product_name_lower:
+            # vCenter Server license - one entity for the vCenter itself
+            _LOGGER.debug("Created vCenter license entity")
+            license_data["vcenter_license"] = base_data
+
+        elif "esx" in product_name_lower:
+            # ESXi host license - separate entities for each host, even with shared licenses
+            for host_info in host_names:
+                license_data[f"{host_info['name']}_license"] = {
+                    **base_data, "host": host_info["original_name"]
+                }
+
+        else:
+            # Other/unknown license types
+            _LOGGER.warning("Unknown license product type: '%s' - please report this for better detection", product_name)
+            other_license_count += 1
+
+            if host_names:
+                _LOGGER.info("Treating unknown license as ESXi license for hosts: %s", ", ".join([host['original_name'] for host in host_names]))
+                for host_info in host_names:
+                    license_data[f"{host_info['name']}_unknown_license_{other_license_count}"] = {
+                        **base_data, "host": host_info["original_name"]
+                    }
+            else:
+                # No hosts - create generic entity
+                clean_product = product_name_lower.replace(" ", "_").replace("-", "_")
+                if clean_product == "unknown":
+                    entity_name = f"unknown_license_{other_license_count}"
+                else:
+                    entity_name = f"{clean_product}_license"
+                license_data[entity_name] = base_data
+
+    return license_data, api_enabled
+
+
 def get_cpu_temperature(host, host_name):
     """Get CPU1 temperature from ESXi host sensors.
 
@@ -343,9 +547,17 @@ def get_datastore_info(datastore):
     ds_capacity = round(ds_summary.capacity / 1073741824, 2)
     ds_freespace = round(ds_summary.freeSpace / 1073741824, 2)
     ds_type = ds_summary.type.lower()
+    # volume id, used as instance by the datastore.* performance counters;
+    # inaccessible or unmounted datastores have no url
+    ds_uuid = (
+        ds_summary.url.rstrip("/").split("/")[-1]
+        if ds_summary.url
+        else datastore._moId  # pylint: disable=protected-access
+    )
 
     ds_data = {
         "name": ds_name,
+        "uuid": ds_uuid,
         "type": ds_type,
         "free_space_gb": ds_freespace,
         "total_space_gb": ds_capacity,
@@ -358,6 +570,153 @@ def get_datastore_info(datastore):
     return ds_data
 
 
+def retrieve_properties(content, obj_type, path_set, container=None, objects=None):
+    """Read properties of many objects in one PropertyCollector round trip.
+
+    Objects are either all obj_type objects of a ContainerView (container) or
+    an explicit list of managed objects (objects). Returns a dict of managed
+    object id to a dict of the properties that are set.
+    """
+    pc_spec = vmodl.query.PropertyCollector
+    if container is not None:
+        traversal = pc_spec.TraversalSpec(
+            name="view", path="view", skip=False, type=vim.view.ContainerView
+        )
+        object_set = [pc_spec.ObjectSpec(obj=container, skip=True, selectSet=[traversal])]
+    else:
+        object_set = [pc_spec.ObjectSpec(obj=obj) for obj in objects or []]
+    if not object_set:
+        return {}
+
+    filter_spec = pc_spec.FilterSpec(
+        objectSet=object_set,
+        propSet=[pc_spec.PropertySpec(type=obj_type, pathSet=path_set)],
+    )
+    collector = content.propertyCollector
+    result = collector.RetrievePropertiesEx([filter_spec], pc_spec.RetrieveOptions())
+
+    properties = {}
+    while result is not None:
+        for obj_content in result.objects:
+            properties[obj_content.obj._moId] = {  # pylint: disable=protected-access
+                prop.name: prop.val for prop in obj_content.propSet
+            }
+        if not result.token:
+            break
+        result = collector.ContinueRetrievePropertiesEx(result.token)
+
+    return properties
+
+
+def get_alarm_info(moid, props, alarm_names):
+    """Get triggered alarm information of a host, VM or datastore."""
+    alarms = []
+    for alarm_state in props.get("triggeredAlarmState", []):
+        # alarms of descendant objects are reported on their own entity
+        if alarm_state.entity._moId != moid:  # pylint: disable=protected-access
+            continue
+        alarm_id = alarm_state.alarm._moId  # pylint: disable=protected-access
+        alarms.append(
+            {
+                "name": alarm_names.get(alarm_id, alarm_id),
+                "status": str(alarm_state.overallStatus),
+                "time": alarm_state.time.isoformat(),
+                "acknowledged": bool(alarm_state.acknowledged),
+            }
+        )
+
+    alarm_data = {
+        "overall_status": str(props.get("overallStatus", "gray")),
+        "active_alarms": len(alarms),
+        "alarms": alarms,
+    }
+
+    return alarm_data
+
+
+def _controller_prefix(controller):
+    """Return the performance counter instance prefix of a disk controller."""
+    if isinstance(controller, vim.vm.device.VirtualSCSIController):
+        return "scsi"
+    if isinstance(controller, vim.vm.device.VirtualIDEController):
+        return "ide"
+    if isinstance(controller, vim.vm.device.VirtualSATAController):
+        return "sata"
+    if isinstance(controller, vim.vm.device.VirtualNVMEController):
+        return "nvme"
+    return "disk"
+
+
+def get_virtual_disks(props):
+    """Get provisioned and committed size of each virtual disk of a VM.
+
+    props are the batched config.hardware.device and layoutEx properties.
+    Committed size includes the delta disks of snapshots.
+    """
+    devices = props.get("config.hardware.device", [])
+    controllers = {
+        device.key: device
+        for device in devices
+        if isinstance(device, vim.vm.device.VirtualController)
+    }
+    file_sizes = {file.key: file.size for file in props.get("layoutEx.file", [])}
+    chains = {disk.key: disk.chain for disk in props.get("layoutEx.disk", [])}
+
+    disks = []
+    for device in devices:
+        if not isinstance(device, vim.vm.device.VirtualDisk):
+            continue
+        controller = controllers.get(device.controllerKey)
+        bus = controller.busNumber if controller is not None else 0
+        committed = sum(
+            file_sizes.get(file_key, 0)
+            for unit in chains.get(device.key) or []
+            for file_key in unit.fileKey
+        )
+        disks.append(
+            {
+                "disk": f"{_controller_prefix(controller)}{bus}:{device.unitNumber}",
+                "label": device.deviceInfo.label,
+                "file": getattr(device.backing, "fileName", "n/a"),
+                "provisioned_gb": round(device.capacityInBytes / 1073741824, 2),
+                "committed_gb": round(committed / 1073741824, 2),
+            }
+        )
+
+    return disks
+
+
+def get_guest_disk_info(props):
+    """Get guest filesystem usage reported by VMware Tools.
+
+    props are the batched runtime.powerState and guest.disk properties.
+    Filesystems are listed fullest first.
+    """
+    filesystems = []
+    if props.get("runtime.powerState") == "poweredOn":
+        for guest_disk in props.get("guest.disk", []):
+            if not guest_disk.capacity:
+                continue
+            filesystems.append(
+                {
+                    "path": guest_disk.diskPath,
+                    "capacity_gb": round(guest_disk.capacity / 1073741824, 2),
+                    "free_gb": round(guest_disk.freeSpace / 1073741824, 2),
+                    "used_pct": round(
+                        100 * (1 - guest_disk.freeSpace / guest_disk.capacity), 1
+                    ),
+                }
+            )
+    filesystems.sort(key=lambda filesystem: filesystem["used_pct"], reverse=True)
+
+    guest_disk_data = {
+        "guest_disk_used_pct": filesystems[0]["used_pct"] if filesystems else "n/a",
+        "guest_filesystems": filesystems,
+    }
+
+    return guest_disk_data
+
+
 def get_vm_info(virtual_machine):
     """Get VM information."""
     vm_conf = virtual_machine.configStatus
@@ -493,16 +852,11 @@ def list_snapshots(snapshots, tree=False):
     return snapshot_data
 
 
-def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
-    """Host power commands - supports both ESXi and vCenter."""
-    import time
-    start_time = time.time()
-
-    conn = esx_connect(**conn_details)
-    if not conn:
-        _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
-        return False
+def _select_target_hosts(conn, target_host_name):
+    """Return the host named target_host_name, or the only host, as a list.
 
+    Returns an empty list and logs the available hosts if there is no match.
+    """
     content = conn.RetrieveContent()
     obj_view = content.viewManager.CreateContainerView(
         content.rootFolder, [vim.HostSystem], True
@@ -512,7 +866,6 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
 
     _LOGGER.info("Found %s host(s) in environment", len(esxi_hosts))
 
-    # Determine target host(s)
     target_hosts = []
 
     if len(esxi_hosts) == 1:
@@ -528,8 +881,7 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
                     "Target host '%s' does not match available host '%s'",
                     target_host_name, host.summary.config.name
                 )
-                esx_disconnect(conn)
-                return False
+                return []
         else:
             # No target specified, use the single available host
             target_hosts = esxi_hosts
@@ -544,8 +896,7 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
                 "Multiple hosts found in vCenter. You must specify target_host. "
                 "Available hosts: %s", ", ".join(available_hosts)
             )
-            esx_disconnect(conn)
-            return False
+            return []
         else:
             # Find the specified target host
             for host in esxi_hosts:
@@ -560,17 +911,33 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
                     "Target host '%s' not found. Available hosts: %s",
                     target_host_name, ", ".join(available_hosts)
                 )
-                esx_disconnect(conn)
-                return False
+                return []
 
     else:
         # No hosts found
         _LOGGER.error("No ESXi hosts found")
-        esx_disconnect(conn)
+        return []
+
+    return target_hosts
+
+
+def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
+    """Host power commands - supports both ESXi and vCenter."""
+    import time
+    start_time = time.time()
+
+    conn = esx_checkout(conn_details)
+    if not conn:
+        _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
         return False
 
-    # Execute power command on target host(s)
+    discard = False
     try:
+        target_hosts = _select_target_hosts(conn, target_host_name)
+        if not target_hosts:
+            return False
+
+        # Execute power command on target host(s)
         for esxi_host in target_hosts:
             host_name = esxi_host.summary.config.name
 
@@ -616,19 +983,23 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
                 _LOGGER.info("'%s' command does not provide task feedback", target_cmnd)
 
     except vmodl.MethodFault as error:
+        discard = True
         _LOGGER.error("VMware method fault: %s", error.msg)
         return False
     except vmodl.HostConfigFault as error:
+        discard = True
         _LOGGER.error("Host configuration fault: %s", str(error))
         return False
     except vmodl.RuntimeFault as error:
+        discard = True
         _LOGGER.error("VMware runtime fault: %s", error.msg)
         return False
     except Exception as error:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.error("Unexpected error during host power operation: %s", str(error))
         return False
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
         operation_time = time.time() - start_time
         _LOGGER.info("Host power operation '%s' completed in %.2f seconds", target_cmnd, operation_time)
 
@@ -637,79 +1008,18 @@ def host_pwr(hass, target_host_name, target_cmnd, conn_details, force, notify):
 
 def host_pwr_policy(target_host_name, host_cmnd, conn_details):
     """Host power policy command - supports both ESXi and vCenter."""
-    conn = esx_connect(**conn_details)
+    conn = esx_checkout(conn_details)
     if not conn:
         _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
         return False
 
-    content = conn.RetrieveContent()
-    obj_view = content.viewManager.CreateContainerView(
-        content.rootFolder, [vim.HostSystem], True
-    )
-    esxi_hosts = obj_view.view
-    obj_view.Destroy()
-
-    _LOGGER.info("Found %s host(s) in environment", len(esxi_hosts))
-
-    # Determine target host(s)
-    target_hosts = []
-
-    if len(esxi_hosts) == 1:
-        # Single ESXi host scenario
-        if target_host_name:
-            # Verify the target host name matches
-            host = esxi_hosts[0]
-            if (host.summary.config.name.lower() == target_host_name.lower() or
-                host.name.lower() == target_host_name.lower()):
-                target_hosts = [host]
-            else:
-                _LOGGER.error(
-                    "Target host '%s' does not match available host '%s'",
-                    target_host_name, host.summary.config.name
-                )
-                esx_disconnect(conn)
-                return False
-        else:
-            # No target specified, use the single available host
-            target_hosts = esxi_hosts
-            _LOGGER.info("No target host specified, using single available host")
-
-    elif len(esxi_hosts) > 1:
-        # vCenter with multiple hosts scenario
-        if not target_host_name:
-            # List available hosts for user reference
-            available_hosts = [host.summary.config.name for host in esxi_hosts]
-            _LOGGER.error(
-                "Multiple hosts found in vCenter. You must specify target_host. "
-                "Available hosts: %s", ", ".join(available_hosts)
-            )
-            esx_disconnect(conn)
+    discard = False
+    try:
+        target_hosts = _select_target_hosts(conn, target_host_name)
+        if not target_hosts:
             return False
-        else:
-            # Find the specified target host
-            for host in esxi_hosts:
-                if (host.summary.config.name.lower() == target_host_name.lower() or
-                    host.name.lower() == target_host_name.lower()):
-                    target_hosts = [host]
-                    break
 
-            if not target_hosts:
-                available_hosts = [host.summary.config.name for host in esxi_hosts]
-                _LOGGER.error(
-                    "Target host '%s' not found. Available hosts: %s",
-                    target_host_name, ", ".join(available_hosts)
-                )
-                esx_disconnect(conn)
-                return False
-
-    else:
-        # No hosts found
-        _LOGGER.error("No ESXi hosts found")
-        esx_disconnect(conn)
-        return False
-
-    # Apply power policy to target host(s)
-    try:
+        # Apply power policy to target host(s)
         for vm_host in target_hosts:
             host_name = vm_host.summary.config.name
             _LOGGER.info(
@@ -739,19 +1049,23 @@ def host_pwr_policy(target_host_name, host_cmnd, conn_details):
                 )
 
     except vmodl.MethodFault as error:
+        discard = True
         _LOGGER.error("VMware method fault: %s", error.msg)
         return False
     except vmodl.HostConfigFault as error:
+        discard = True
         _LOGGER.error("Host configuration fault: %s", str(error))
         return False
     except vmodl.RuntimeFault as error:
+        discard = True
         _LOGGER.error("VMware runtime fault: %s", error.msg)
         return False
     except Exception as error:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.error("Unexpected error during power policy configuration: %s", str(error))
         return False
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
 
     return True
 
@@ -760,19 +1074,20 @@ def vm_pwr(
     hass, target_host, target_vm, target_vm_uuid, target_cmnd, conn_details, notify
 ):
     """VM power commands."""
-    conn = esx_connect(**conn_details)
+    conn = esx_checkout(conn_details)
     if not conn:
         _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
         return False
 
-    content = conn.RetrieveContent()
-    obj_view = content.viewManager.CreateContainerView(
-        content.rootFolder, [vim.VirtualMachine], True
-    )
-    data = obj_view.view
-    obj_view.Destroy()
-
+    discard = False
     try:
+        content = conn.RetrieveContent()
+        obj_view = content.viewManager.CreateContainerView(
+            content.rootFolder, [vim.VirtualMachine], True
+        )
+        data = obj_view.view
+        obj_view.Destroy()
+
         for vm in [vm for vm in data if vm.summary.config.uuid in target_vm_uuid]:
             _LOGGER.info("Sending '%s' command to vm '%s'", target_cmnd, vm.name)
 
@@ -819,11 +1134,13 @@ def vm_pwr(
                 target_host,
             )
     except vmodl.MethodFault as error:
+        discard = True
         _LOGGER.info(error.msg)
     except Exception as error:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.info(str(error))
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
 
     return True
 
@@ -841,15 +1158,20 @@ def vm_snap_take(
     notify,
 ):
     """Take Snapshot commands."""
-    conn = esx_connect(**conn_details)
-    content = conn.RetrieveContent()
-    obj_view = content.viewManager.CreateContainerView(
-        content.rootFolder, [vim.VirtualMachine], True
-    )
-    data = obj_view.view
-    obj_view.Destroy()
+    conn = esx_checkout(conn_details)
+    if not conn:
+        _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
+        return False
 
+    discard = False
     try:
+        content = conn.RetrieveContent()
+        obj_view = content.viewManager.CreateContainerView(
+            content.rootFolder, [vim.VirtualMachine], True
+        )
+        data = obj_view.view
+        obj_view.Destroy()
+
         for vm in [vm for vm in data if vm.summary.config.uuid in target_vm_uuid]:
             _LOGGER.info("Sending create snapshot command to vm '%s'", vm.name)
 
@@ -883,13 +1205,15 @@ def vm_snap_take(
                 target_host,
             )
     except vmodl.MethodFault as error:
+        discard = True
         _LOGGER.error("VMware method fault during snapshot creation: %s", error.msg)
         return False
     except Exception as error:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.error("Unexpected error during snapshot creation: %s", str(error))
         return False
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
 
     return True
 
@@ -898,15 +1222,20 @@ def vm_snap_remove(
     hass, target_host, target_vm, target_vm_uuid, target_cmnd, conn_details, notify
 ):
     """Remove Snapshot commands."""
-    conn = esx_connect(**conn_details)
-    content = conn.RetrieveContent()
-    obj_view = content.viewManager.CreateContainerView(
-        content.rootFolder, [vim.VirtualMachine], True
-    )
-    data = obj_view.view
-    obj_view.Destroy()
+    conn = esx_checkout(conn_details)
+    if not conn:
+        _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
+        return False
 
+    discard = False
     try:
+        content = conn.RetrieveContent()
+        obj_view = content.viewManager.CreateContainerView(
+            content.rootFolder, [vim.VirtualMachine], True
+        )
+        data = obj_view.view
+        obj_view.Destroy()
+
         for vm in [vm for vm in data if vm.summary.config.uuid in target_vm_uuid]:
             if vm.name == target_vm:
                 _LOGGER.debug(
@@ -960,11 +1289,13 @@ def vm_snap_remove(
                 target_host,
             )
     except vmodl.MethodFault as error:
+        discard = True
         _LOGGER.info(error.msg)
     except Exception as error:  # pylint: disable=broad-except
+        discard = True
         _LOGGER.info(str(error))
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn, discard)
 
     return True
 
@@ -1016,7 +1347,7 @@ def task_status(hass, task, command, notify):
 
 def list_esxi_hosts(hass, conn_details):
     """List all ESXi hosts available in the environment (useful for vCenter)."""
-    conn = esx_connect(**conn_details)
+    conn = esx_checkout(conn_details)
     if not conn:
         _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
         return
@@ -1073,12 +1404,12 @@ def list_esxi_hosts(hass, conn_details):
     except Exception as error:  # pylint: disable=broad-except
         _LOGGER.error("Failed to list ESXi hosts: %s", error)
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn)
 
 
 def list_esxi_power_policies(hass, target_host_name, conn_details):
     """List available power policies for a specific host."""
-    conn = esx_connect(**conn_details)
+    conn = esx_checkout(conn_details)
     if not conn:
         _LOGGER.error("Failed to connect to %s", conn_details.get('host', 'host'))
         return
@@ -1210,4 +1541,4 @@ def list_esxi_power_policies(hass, target_host_name, conn_details):
     except Exception as error:  # pylint: disable=broad-except
         _LOGGER.error("Failed to list power policies: %s", error)
     finally:
-        esx_disconnect(conn)
+        esx_checkin(conn_details, conn)
@@ -0,0 +1,230 @@
+"""vCenter/ESXi event stream for ESXi Stats."""
+import logging
+from datetime import datetime
+from threading import Event, Thread
+
+from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    EVENT_ESXI_STATS,
+    MEMBERSHIP_EVENTS,
+    EVENTS_PAGE_SIZE,
+    EVENTS_SAVE_DELAY,
+    EVENTS_STORAGE_VERSION,
+    EVENTS_WAIT_SECONDS,
+)
+from .esxi import esx_connect, esx_disconnect
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between reconnect attempts, doubled up to the maximum
+RETRY_DELAY = 10
+RETRY_MAX_DELAY = 300
+
+
+class EventListener:
+    """Follow the event stream of a host/vCenter in a background thread.
+
+    Events are read in pages from an EventHistoryCollector, starting at the
+    persisted cursor. Instead of polling, the thread blocks in WaitForUpdatesEx
+    on the collector's latestPage and only reads when new events arrive.
+    """
+
+    def __init__(self, hass, client):
+        """Initialize the listener."""
+        self.hass = hass
+        self.client = client
+        self._store = Store(
+            hass, EVENTS_STORAGE_VERSION, f"{DOMAIN}.{client.entry}.events"
+        )
+        self._cursor = {}
+        self._stop = Event()
+        self._thread = None
+        self._property_collector = None
+
+    async def async_start(self):
+        """Restore the cursor and start following events."""
+        self._cursor = await self._store.async_load() or {}
+        self._thread = Thread(
+            target=self._run, name=f"{DOMAIN}_events_{self.client.host}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop following events."""
+        self._stop.set()
+        if self._property_collector is not None:
+            try:
+                self._property_collector.CancelWaitForUpdates()
+            except Exception as error:  # pylint: disable=broad-except
+                _LOGGER.debug("Could not cancel event wait: %s", error)
+
+    def as_dict(self):
+        """Return listener state for diagnostics."""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "cursor": dict(self._cursor),
+        }
+
+    @callback
+    def _async_save_cursor(self):
+        self._store.async_delay_save(lambda: dict(self._cursor), EVENTS_SAVE_DELAY)
+
+    def _run(self):
+        delay = RETRY_DELAY
+        while not self._stop.is_set():
+            conn = None
+            try:
+                details = dict(self.client.conn_details)
+                # WaitForUpdatesEx legitimately blocks for EVENTS_WAIT_SECONDS
+                details["read_timeout"] = max(
+                    details.get("read_timeout") or 0, EVENTS_WAIT_SECONDS + 15
+                )
+                conn = esx_connect(**details)
+                if conn is None:
+                    raise ConnectionError(f"Failed to connect to {self.client.host}")
+                delay = RETRY_DELAY
+                self._follow(conn)
+            except Exception as error:  # pylint: disable=broad-except
+                if self._stop.is_set():
+                    break
+                _LOGGER.debug(
+                    "Event stream of %s interrupted - retrying in %s seconds: %s",
+                    self.client.host,
+                    delay,
+                    error,
+                )
+                self._stop.wait(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+            finally:
+                self._property_collector = None
+                if conn is not None:
+                    esx_disconnect(conn)
+
+    def _follow(self, conn):
+        content = conn.RetrieveContent()
+
+        # resume at the persisted cursor, or start now on first run
+        now = conn.CurrentTime()
+        begin = self._cursor.get("created_time")
+        begin = datetime.fromisoformat(begin) if begin else now
+        if begin > now:
+            # the clock of the host/vCenter went back - the cursor is lost
+            _LOGGER.debug(
+                "Event cursor of %s is in the future - starting now", self.client.host
+            )
+            self._cursor = {}
+            begin = now
+        event_filter = vim.event.EventFilterSpec(
+            time=vim.event.EventFilterSpec.ByTime(beginTime=begin)
+        )
+        collector = content.eventManager.CreateCollectorForEvents(event_filter)
+
+        try:
+            self._property_collector = content.propertyCollector.CreatePropertyCollector()
+            self._property_collector.CreateFilter(
+                vmodl.query.PropertyCollector.FilterSpec(
+                    objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=collector)],
+                    propSet=[
+                        vmodl.query.PropertyCollector.PropertySpec(
+                            type=vim.event.EventHistoryCollector, pathSet=["latestPage"]
+                        )
+                    ],
+                ),
+                True,
+            )
+            _LOGGER.debug("Following events of %s from %s", self.client.host, begin)
+
+            # catch up on everything since the cursor before waiting
+            self._read_pages(collector)
+
+            version = ""
+            options = vmodl.query.PropertyCollector.WaitOptions(
+                maxWaitSeconds=EVENTS_WAIT_SECONDS
+            )
+            while not self._stop.is_set():
+                update = self._property_collector.WaitForUpdatesEx(version, options)
+                if update is None:
+                    continue
+                version = update.version
+                self._read_pages(collector)
+        finally:
+            try:
+                collector.DestroyCollector()
+            except Exception as error:  # pylint: disable=broad-except
+                _LOGGER.debug("Could not destroy event collector: %s", error)
+
+    def _read_pages(self, collector):
+        while not self._stop.is_set():
+            events = collector.ReadNextEvents(EVENTS_PAGE_SIZE)
+            if not events:
+                return
+            self._dispatch(events)
+
+    def _dispatch(self, events):
+        last_key = self._cursor.get("key", -1)
+        refresh = set()
+
+        last_time = self._cursor.get("created_time")
+        last_time = datetime.fromisoformat(last_time) if last_time else None
+
+        for event in events:
+            # beginTime is inclusive, skip what was already delivered
+            if event.key <= last_key:
+                if last_time is None or event.createdTime <= last_time:
+                    continue
+                # a lower key created later - hostd/vCenter restarted its keys
+                _LOGGER.debug(
+                    "Event keys of %s restarted at %s", self.client.host, event.key
+                )
+
+            data = get_event_info(event)
+            data["host"] = self.client.host
+            self.hass.bus.fire(EVENT_ESXI_STATS, data)
+
+            if data["event_type"] in MEMBERSHIP_EVENTS:
+                self.client.invalidate_membership()
+
+            # refresh the affected object once per page
+            if getattr(event, "vm", None) is not None and event.vm.vm is not None:
+                refresh.add(event.vm.vm._moId)  # pylint: disable=protected-access
+            elif getattr(event, "host", None) is not None and event.host.host is not None:
+                refresh.add(event.host.host._moId)  # pylint: disable=protected-access
+
+            self._cursor = {"key": event.key, "created_time": data["created_time"]}
+            last_key = event.key
+            last_time = event.createdTime
+
+        self.hass.loop.call_soon_threadsafe(self._async_save_cursor)
+
+        for moref in refresh:
+            self.client.refresh_object(moref)
+
+
+def get_event_info(event):
+    """Get event information."""
+    event_data = {
+        "event_type": type(event).__name__,
+        "key": event.key,
+        "chain_id": event.chainId,
+        "created_time": event.createdTime.isoformat(),
+        "user": event.userName or None,
+        "message": event.fullFormattedMessage,
+        "vm": None,
+        "vmhost": None,
+        "datastore": None,
+    }
+
+    if getattr(event, "vm", None) is not None:
+        event_data["vm"] = event.vm.name
+    if getattr(event, "host", None) is not None:
+        event_data["vmhost"] = event.host.name
+    if getattr(event, "ds", None) is not None:
+        event_data["datastore"] = event.ds.name
+
+    _LOGGER.debug(event_data)
+
+    return event_data
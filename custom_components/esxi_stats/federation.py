@@ -0,0 +1,161 @@
+"""Coordination of all ESXi Stats endpoints."""
+import logging
+import time
+from threading import Condition, Lock
+
+from .const import (
+    DEFAULT_FEDERATION_CALLS,
+    DEFAULT_FEDERATION_CONCURRENCY,
+    FEDERATION_CLAIM_INTERVALS,
+    FEDERATION_CLAIM_TTL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Federation:
+    """Schedule the refresh cycles of all entries against one budget.
+
+    At most concurrency cycles run at the same time and API calls (SOAP
+    round trips) of all entries draw from one bucket that refills with
+    calls_per_minute (0 for no limit). Every entry configures the limits, the
+    largest values of all loaded entries apply. A cycle that finds no free
+    slot or an empty bucket is deferred, so the load on the infrastructure
+    stays bounded however many hosts and vCenters are configured.
+
+    VMs are claimed by instance UUID, a VM visible on its host and through
+    vCenter is only collected once, preferably by the vCenter entry.
+    """
+
+    def __init__(self):
+        """Initialize an idle federation with a full bucket."""
+        self._lock = Lock()
+        self._slot_freed = Condition(self._lock)
+        self._running = 0
+        self._limits = {}
+        self.concurrency = DEFAULT_FEDERATION_CONCURRENCY
+        self.calls_per_minute = DEFAULT_FEDERATION_CALLS
+        self._budget = float(self.calls_per_minute)
+        self._refilled = time.monotonic()
+        self._claims = {}
+        self.metrics = {"cycles": 0, "deferred": 0, "calls": 0}
+
+    def configure(self, entry, concurrency, calls_per_minute, max_interval):
+        """Set the limits an entry asks for and its maximum refresh interval."""
+        with self._lock:
+            self._limits[entry] = (
+                concurrency,
+                calls_per_minute,
+                max(FEDERATION_CLAIM_TTL, FEDERATION_CLAIM_INTERVALS * max_interval),
+            )
+            self._apply_limits()
+
+    def remove(self, entry):
+        """Drop the limits and claims of an entry that is unloaded."""
+        with self._lock:
+            self._limits.pop(entry, None)
+            self._apply_limits()
+        self.release_claims(entry)
+
+    def _apply_limits(self):
+        if self._limits:
+            self.concurrency = max(limit[0] for limit in self._limits.values())
+            calls = [limit[1] for limit in self._limits.values()]
+            self.calls_per_minute = 0 if 0 in calls else max(calls)
+        self._slot_freed.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.calls_per_minute:
+            self._budget = min(
+                self.calls_per_minute,
+                self._budget + (now - self._refilled) * self.calls_per_minute / 60,
+            )
+        self._refilled = now
+
+    def acquire(self, host, timeout=None):
+        """Return True if host may run a cycle now, release() it afterwards.
+
+        With a timeout (used for the first cycle, which entities are created
+        from) the budget is ignored and a slot is waited for.
+        """
+        with self._lock:
+            if timeout is None:
+                self._refill()
+                if self.calls_per_minute and self._budget <= 0:
+                    self.metrics["deferred"] += 1
+                    _LOGGER.debug(
+                        "API budget is used up - deferring refresh of %s", host
+                    )
+                    return False
+            if not self._slot_freed.wait_for(
+                lambda: self._running < self.concurrency, timeout or 0
+            ):
+                self.metrics["deferred"] += 1
+                _LOGGER.debug(
+                    "All refresh slots are busy - deferring refresh of %s", host
+                )
+                return False
+            self._running += 1
+            self.metrics["cycles"] += 1
+        return True
+
+    def release(self):
+        """Free the slot of a finished cycle."""
+        with self._lock:
+            self._running -= 1
+            self._slot_freed.notify()
+
+    def charge(self, calls):
+        """Draw the API calls of a cycle or single refresh from the bucket.
+
+        Calls are charged after they were made, the bucket may run into debt
+        which defers the next cycles until it has refilled.
+        """
+        with self._lock:
+            self._refill()
+            if self.calls_per_minute:
+                self._budget -= calls
+            self.metrics["calls"] += calls
+
+    def claim(self, instance_uuid, entry, vcenter):
+        """Return True if entry collects the VM with instance_uuid.
+
+        A vCenter entry takes over VMs of standalone host entries. Claims
+        expire when their owner stops renewing them (e.g. the VM left), an
+        idle owner keeps them over its longest refresh interval.
+        """
+        now = time.monotonic()
+        with self._lock:
+            limits = self._limits.get(entry)
+            ttl = limits[2] if limits is not None else FEDERATION_CLAIM_TTL
+            owner = self._claims.get(instance_uuid)
+            if (
+                owner is None
+                or owner[0] == entry
+                or owner[2] < now
+                or (vcenter and not owner[1])
+            ):
+                self._claims[instance_uuid] = (entry, vcenter, now + ttl)
+                return True
+            return False
+
+    def release_claims(self, entry):
+        """Drop the claims of an entry that is unloaded."""
+        with self._lock:
+            self._claims = {
+                uuid: owner for uuid, owner in self._claims.items() if owner[0] != entry
+            }
+
+    def as_dict(self):
+        """Return the state for diagnostics."""
+        with self._lock:
+            self._refill()
+            return {
+                "concurrency": self.concurrency,
+                "calls_per_minute": self.calls_per_minute,
+                "running": self._running,
+                "budget": round(self._budget) if self.calls_per_minute else None,
+                "claimed_vms": len(self._claims),
+                **self.metrics,
+            }
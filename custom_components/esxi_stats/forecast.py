@@ -0,0 +1,92 @@
+"""Datastore fill-rate forecasting for ESXi Stats."""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Older samples lose half their weight every HALF_LIFE_DAYS
+HALF_LIFE_DAYS = 7
+# Minimum history before a forecast is published
+MIN_SAMPLES = 3
+MIN_SPAN_DAYS = 1 / 24
+
+
+class FillRateEstimator:
+    """Running, exponentially weighted regression of used space over time.
+
+    Every sample updates five sums in O(1), so no history has to be kept.
+    """
+
+    def __init__(self, state=None):
+        """Initialize the estimator, optionally from persisted state."""
+        state = state or {}
+        self.origin = state.get("origin")
+        self.first = state.get("first")
+        self.last = state.get("last")
+        self.free_gb = state.get("free_gb")
+        self.samples = state.get("samples", 0)
+        self._sums = list(state.get("sums", [0.0, 0.0, 0.0, 0.0, 0.0]))
+
+    def add_sample(self, timestamp, free_gb, total_gb):
+        """Add a free/total space sample taken at timestamp (seconds)."""
+        if self.origin is None:
+            self.origin = timestamp
+            self.first = 0.0
+
+        day = (timestamp - self.origin) / 86400
+        if self.last is not None:
+            elapsed = day - self.last
+            if elapsed <= 0:
+                return
+            decay = 0.5 ** (elapsed / HALF_LIFE_DAYS)
+            self._sums = [value * decay for value in self._sums]
+
+        used_gb = total_gb - free_gb
+        self._sums[0] += 1
+        self._sums[1] += day
+        self._sums[2] += used_gb
+        self._sums[3] += day * day
+        self._sums[4] += day * used_gb
+
+        self.last = day
+        self.free_gb = free_gb
+        self.samples += 1
+
+    def growth_gb_per_day(self):
+        """Return the used space growth in GB/day or None if unknown."""
+        if self.samples < MIN_SAMPLES or self.last - self.first < MIN_SPAN_DAYS:
+            return None
+
+        weight, sum_t, sum_y, sum_tt, sum_ty = self._sums
+        denom = weight * sum_tt - sum_t * sum_t
+        if denom <= 0:
+            return None
+        return (weight * sum_ty - sum_t * sum_y) / denom
+
+    def days_until_full(self):
+        """Return the projected days until the datastore is full or None."""
+        growth = self.growth_gb_per_day()
+        if growth is None or growth <= 0:
+            return None
+        return self.free_gb / growth
+
+    def as_dict(self):
+        """Return serializable estimator state."""
+        return {
+            "origin": self.origin,
+            "first": self.first,
+            "last": self.last,
+            "free_gb": self.free_gb,
+            "samples": self.samples,
+            "sums": self._sums,
+        }
+
+
+def get_forecast_info(estimator):
+    """Get datastore forecast information."""
+    growth = estimator.growth_gb_per_day()
+    days = estimator.days_until_full()
+
+    return {
+        "growth_gb_per_day": round(growth, 2) if growth is not None else "n/a",
+        "days_until_full": round(days, 1) if days is not None else "n/a",
+    }
@@ -0,0 +1,166 @@
+"""In-memory metric history for ESXi Stats."""
+import logging
+import time
+from array import array
+from threading import Lock
+
+_LOGGER = logging.getLogger(__name__)
+
+# Raw samples kept per metric (~90 minutes at the default refresh rate)
+RAW_POINTS = 120
+# Downsampled samples kept per metric, each one averaging COARSE_FACTOR raw samples
+COARSE_POINTS = 144
+COARSE_FACTOR = 10
+
+
+class _Ring:
+    """Fixed-size ring of (timestamp, value) pairs backed by compact arrays."""
+
+    __slots__ = ("_count", "_next", "_size", "_ts", "_val")
+
+    def __init__(self, size):
+        """Initialize the ring."""
+        self._ts = array("I", bytes(4 * size))
+        self._val = array("f", bytes(4 * size))
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def append(self, timestamp, value):
+        """Add a point, overwriting the oldest one when full."""
+        self._ts[self._next] = int(timestamp)
+        self._val[self._next] = value
+        self._next = (self._next + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def oldest(self):
+        """Return the timestamp of the oldest point or None."""
+        if not self._count:
+            return None
+        return self._ts[(self._next - self._count) % self._size]
+
+    def points(self, since=0, until=None):
+        """Yield points in chronological order within [since, until)."""
+        start = self._next - self._count
+        for offset in range(self._count):
+            idx = (start + offset) % self._size
+            timestamp = self._ts[idx]
+            if timestamp < since or (until is not None and timestamp >= until):
+                continue
+            yield timestamp, self._val[idx]
+
+
+class _Series:
+    """Raw ring plus a downsampled ring for older points."""
+
+    __slots__ = ("_acc_n", "_acc_ts", "_acc_val", "coarse", "raw")
+
+    def __init__(self, raw_points, coarse_points):
+        """Initialize the series."""
+        self.raw = _Ring(raw_points)
+        self.coarse = _Ring(coarse_points)
+        self._acc_ts = 0.0
+        self._acc_val = 0.0
+        self._acc_n = 0
+
+    def append(self, timestamp, value, coarse_factor):
+        """Add a raw point and roll it into the downsampled ring."""
+        self.raw.append(timestamp, value)
+
+        self._acc_ts += timestamp
+        self._acc_val += value
+        self._acc_n += 1
+        if self._acc_n >= coarse_factor:
+            self.coarse.append(self._acc_ts / self._acc_n, self._acc_val / self._acc_n)
+            self._acc_ts = 0.0
+            self._acc_val = 0.0
+            self._acc_n = 0
+
+    def points(self, since):
+        """Return points newer than since, preferring raw resolution."""
+        raw_start = self.raw.oldest()
+        if raw_start is None:
+            return []
+        # Downsampled points only fill the gap before the oldest raw point
+        older = list(self.coarse.points(since, raw_start)) if since < raw_start else []
+        return older + list(self.raw.points(since))
+
+
+class MetricHistory:
+    """Bounded per-object metric history fed by each refresh."""
+
+    def __init__(
+        self, raw_points=RAW_POINTS, coarse_points=COARSE_POINTS, coarse_factor=COARSE_FACTOR
+    ):
+        """Initialize the history."""
+        self._raw_points = raw_points
+        self._coarse_points = coarse_points
+        self._coarse_factor = coarse_factor
+        self._series = {}
+        self._lock = Lock()
+
+    def record(self, cond, obj, data, timestamp=None):
+        """Record every numeric value of an object's data dictionary."""
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            for key, value in data.items():
+                # bool is an int subclass but is not a metric
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+
+                series = self._series.get((cond, obj, key))
+                if series is None:
+                    series = _Series(self._raw_points, self._coarse_points)
+                    self._series[(cond, obj, key)] = series
+                series.append(timestamp, value, self._coarse_factor)
+
+    def forget(self, cond, obj):
+        """Drop all series of an object."""
+        with self._lock:
+            for key in [key for key in self._series if key[:2] == (cond, obj)]:
+                del self._series[key]
+
+    def metrics(self, cond, obj):
+        """Return the metric names recorded for an object."""
+        with self._lock:
+            return sorted(key[2] for key in self._series if key[:2] == (cond, obj))
+
+    def query(self, cond, obj, metric, window, now=None):
+        """Return min/max/avg/slope of a metric over the last window seconds."""
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            series = self._series.get((cond, obj, metric))
+            if series is None:
+                return None
+            points = series.points(now - window)
+
+        if not points:
+            return {"count": 0}
+
+        count = len(points)
+        values = [value for _, value in points]
+        mean_ts = sum(ts for ts, _ in points) / count
+        mean_val = sum(values) / count
+
+        # least-squares slope, reported per hour
+        denom = sum((ts - mean_ts) ** 2 for ts, _ in points)
+        if denom:
+            slope = sum((ts - mean_ts) * (val - mean_val) for ts, val in points) / denom
+            slope = round(slope * 3600, 4)
+        else:
+            slope = 0.0
+
+        return {
+            "count": count,
+            "start": points[0][0],
+            "end": points[-1][0],
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+            "avg": round(mean_val, 4),
+            "last": round(values[-1], 4),
+            "slope_per_hour": slope,
+        }
@@ -0,0 +1,137 @@
+"""OpenMetrics endpoint for ESXi Stats."""
+import logging
+import re
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+
+from .const import CONF_METRICS, DEFAULT_METRICS, DOMAIN, DOMAIN_DATA
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Conditions exported and the label that names their objects
+EXPORTED_CONDITIONS = {
+    "vmhost": "vmhost",
+    "datastore": "datastore",
+    "vm": "vm",
+    "cluster": "cluster",
+    "resource_pool": "resource_pool",
+}
+# Detail lists exported as labelled series and the label naming each item
+EXPORTED_DETAILS = {
+    "disks": ("disk", "disk"),
+    "nics": ("nic", "nic"),
+    "guest_filesystems": ("guest_fs", "path"),
+}
+
+
+def _metric_name(*parts):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join([DOMAIN, *parts]))
+
+
+def _labels(labels):
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in labels.values()
+    )
+    return ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def collect_families(client, data):
+    """Return metric families of one entry as {name: [sample lines]}."""
+    families = {}
+
+    def add(name, labels, value):
+        families.setdefault(name, []).append(f"{name}{{{_labels(labels)}}} {value}")
+
+    add(_metric_name("up"), {"host": client.host}, int(client.available))
+    if client.metrics["last_cycle_seconds"] is not None:
+        add(
+            _metric_name("cycle_seconds"),
+            {"host": client.host},
+            client.metrics["last_cycle_seconds"],
+        )
+
+    for cond, label in EXPORTED_CONDITIONS.items():
+        for obj, obj_data in list(data.get(cond, {}).items()):
+            labels = {"host": client.host, label: obj}
+            for key, value in list(obj_data.items()):
+                if _is_number(value):
+                    # per disk keys are exported from the disk list instead
+                    if not key.startswith("disk_"):
+                        add(_metric_name(cond, key), labels, value)
+                elif key in EXPORTED_DETAILS and isinstance(value, list):
+                    prefix, item_label = EXPORTED_DETAILS[key]
+                    for item in value:
+                        item_labels = {**labels, item_label: item.get(item_label)}
+                        for item_key, item_value in item.items():
+                            if _is_number(item_value):
+                                add(
+                                    _metric_name(cond, prefix, item_key),
+                                    item_labels,
+                                    item_value,
+                                )
+
+    return families
+
+
+class ESXiStatsMetricsView(HomeAssistantView):
+    """Serve collected data of all entries in OpenMetrics text format.
+
+    Data is rendered straight from memory, so metrics do not need entities.
+    Rendered families are cached per entry and client until its next
+    refresh cycle or targeted refresh of a VM or host.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    def __init__(self):
+        """Initialize the view."""
+        self._cache = {}
+
+    def forget(self, entry_id):
+        """Drop the cached metrics of an unloaded entry."""
+        self._cache.pop(entry_id, None)
+
+    async def get(self, request):
+        """Return metrics of all entries that enabled the endpoint."""
+        hass = request.app["hass"]
+        merged = {}
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if not entry.options.get(CONF_METRICS, DEFAULT_METRICS):
+                continue
+            data = hass.data.get(DOMAIN_DATA, {}).get(entry.entry_id)
+            if data is None or "client" not in data:
+                continue
+
+            client = data["client"]
+            generation = (
+                client.metrics["cycles"],
+                client.metrics["object_refreshes"],
+            )
+            cached = self._cache.get(entry.entry_id)
+            # counters start over on the client of a reloaded entry
+            if cached is None or cached[0] is not client or cached[1] != generation:
+                cached = (client, generation, collect_families(client, data))
+                self._cache[entry.entry_id] = cached
+
+            for name, samples in cached[2].items():
+                merged.setdefault(name, []).extend(samples)
+
+        lines = []
+        for name, samples in merged.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        lines.append("# EOF")
+
+        return web.Response(
+            body="\n".join(lines) + "\n", headers={"Content-Type": CONTENT_TYPE}
+        )
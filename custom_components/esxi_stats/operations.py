@@ -0,0 +1,173 @@
+"""Operations on many hosts for ESXi Stats."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
+
+from .const import BULK_WORKERS
+from .esxi import esx_checkin, esx_checkout, retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def select_hosts(content, path_set, host_names=None, cluster=None):
+    """Return {name: (host, props)} of the hosts an operation targets.
+
+    Hosts are selected by name (host_names), by cluster or all hosts when
+    neither is given. Properties of all hosts are read in one batch.
+    """
+    root = content.rootFolder
+    if cluster:
+        cluster_view = content.viewManager.CreateContainerView(
+            root, [vim.ClusterComputeResource], True
+        )
+        clusters = cluster_view.view
+        names = retrieve_properties(
+            content, vim.ClusterComputeResource, ["name"], container=cluster_view
+        )
+        cluster_view.Destroy()
+        root = next(
+            (
+                obj
+                for obj in clusters
+                if names.get(obj._moId, {}).get("name", "").lower() == cluster.lower()  # pylint: disable=protected-access
+            ),
+            None,
+        )
+        if root is None:
+            raise ValueError(f"Cluster '{cluster}' not found")
+
+    host_view = content.viewManager.CreateContainerView(root, [vim.HostSystem], True)
+    esxi_hosts = host_view.view
+    props = retrieve_properties(
+        content, vim.HostSystem, ["name"] + path_set, container=host_view
+    )
+    host_view.Destroy()
+
+    hosts = {
+        props[esxi_host._moId]["name"]: (esxi_host, props[esxi_host._moId])  # pylint: disable=protected-access
+        for esxi_host in esxi_hosts
+        if esxi_host._moId in props  # pylint: disable=protected-access
+    }
+    if host_names:
+        wanted = {name.lower() for name in host_names}
+        missing = wanted - {name.lower() for name in hosts}
+        if missing:
+            raise ValueError(
+                f"Host(s) {', '.join(sorted(missing))} not found. "
+                f"Available hosts: {', '.join(sorted(hosts))}"
+            )
+        hosts = {name: host for name, host in hosts.items() if name.lower() in wanted}
+    if not hosts:
+        raise ValueError("No ESXi hosts found")
+
+    return hosts
+
+
+def bulk_power_policy(conn_details, policy, host_names=None, cluster=None):
+    """Apply a power policy to many hosts at once.
+
+    Policies are changed concurrently over one session and verified with a
+    single batched read of config.powerSystemInfo. Returns per-host results.
+    """
+    conn = esx_checkout(conn_details)
+    if conn is None:
+        raise ValueError(f"Failed to connect to {conn_details['host']}")
+    discard = False
+    try:
+        content = conn.RetrieveContent()
+        hosts = select_hosts(
+            content,
+            [
+                "runtime.connectionState",
+                "config.powerSystemCapability",
+                "config.powerSystemInfo",
+                "configManager.powerSystem",
+            ],
+            host_names,
+            cluster,
+        )
+
+        results = {}
+        pending = {}
+        for name, (_, props) in hosts.items():
+            if props.get("runtime.connectionState") != "connected":
+                results[name] = {"result": "skipped", "error": "host is not connected"}
+                continue
+            capability = props.get("config.powerSystemCapability")
+            available = {
+                available_policy.shortName: available_policy
+                for available_policy in (capability.availablePolicy if capability else [])
+            }
+            # accept the short name (static) or the display name (High performance)
+            match = available.get(policy) or next(
+                (
+                    available_policy
+                    for available_policy in available.values()
+                    if available_policy.name.lower() == policy.lower()
+                ),
+                None,
+            )
+            if match is None:
+                results[name] = {
+                    "result": "failed",
+                    "error": f"policy not available, available: {', '.join(available)}",
+                }
+                continue
+            current = props.get("config.powerSystemInfo")
+            if current is not None and current.currentPolicy.key == match.key:
+                results[name] = {"result": "unchanged", "policy": match.shortName}
+                continue
+            pending[name] = (props["configManager.powerSystem"], match)
+
+        def configure(item):
+            name, (power_system, match) = item
+            try:
+                power_system.ConfigurePowerPolicy(match.key)
+            except vmodl.MethodFault as error:
+                return name, error.msg
+            return name, None
+
+        _LOGGER.info(
+            "Applying power policy '%s' to %s host(s)", policy, len(pending)
+        )
+        with ThreadPoolExecutor(max_workers=BULK_WORKERS) as executor:
+            for name, error in executor.map(configure, pending.items()):
+                if error is not None:
+                    results[name] = {"result": "failed", "error": error}
+
+        # verify all changed hosts in one read
+        verified = retrieve_properties(
+            content,
+            vim.HostSystem,
+            ["config.powerSystemInfo"],
+            objects=[hosts[name][0] for name in pending if name not in results],
+        )
+        for name, (_, match) in pending.items():
+            if name in results:
+                continue
+            info = verified.get(hosts[name][0]._moId, {}).get("config.powerSystemInfo")  # pylint: disable=protected-access
+            if info is not None and info.currentPolicy.key == match.key:
+                results[name] = {"result": "applied", "policy": match.shortName}
+            else:
+                results[name] = {
+                    "result": "failed",
+                    "error": "policy was not applied",
+                    "policy": info.currentPolicy.shortName if info is not None else None,
+                }
+    except ValueError:
+        raise
+    except Exception:
+        # the session may be logged out or broken, do not reuse it
+        discard = True
+        raise
+    finally:
+        esx_checkin(conn_details, conn, discard)
+
+    summary = {
+        outcome: sum(1 for result in results.values() if result["result"] == outcome)
+        for outcome in ["applied", "unchanged", "failed", "skipped"]
+    }
+    _LOGGER.info("Power policy '%s': %s", policy, summary)
+
+    return {"policy": policy, **summary, "hosts": results}
@@ -0,0 +1,262 @@
+"""Performance counters for ESXi Stats."""
+import logging
+
+from pyVmomi import vim  # pylint: disable=no-name-in-module
+
+from .const import VIRTUAL_DISK_PREFIX, VIRTUAL_DISK_STATES
+from .esxi import retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+# Real-time statistics are sampled every 20 seconds, average the last minute
+PERF_INTERVAL = 20
+PERF_SAMPLES = 3
+
+DATASTORE_COUNTERS = {
+    "read_iops": "datastore.numberReadAveraged.average",
+    "write_iops": "datastore.numberWriteAveraged.average",
+    "read_kbps": "datastore.read.average",
+    "write_kbps": "datastore.write.average",
+    "read_latency": "datastore.totalReadLatency.average",
+    "write_latency": "datastore.totalWriteLatency.average",
+}
+
+NETWORK_COUNTERS = {
+    "rx_kbps": "net.received.average",
+    "tx_kbps": "net.transmitted.average",
+    "rx_dropped": "net.droppedRx.summation",
+    "tx_dropped": "net.droppedTx.summation",
+}
+
+VIRTUAL_DISK_COUNTERS = {
+    "disk_read_iops": "virtualDisk.numberReadAveraged.average",
+    "disk_write_iops": "virtualDisk.numberWriteAveraged.average",
+    "disk_read_latency": "virtualDisk.totalReadLatency.average",
+    "disk_write_latency": "virtualDisk.totalWriteLatency.average",
+}
+
+
+class PerfCounters:
+    """Resolve and cache performance counter ids by name.
+
+    The counter catalog of a host/vCenter does not change while connected,
+    so it is read once instead of on every query.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._ids = None
+
+    def ids(self, perf_manager, names):
+        """Return a dict of counter name to id for the names that exist."""
+        if self._ids is None:
+            self._ids = {
+                f"{counter.groupInfo.key}.{counter.nameInfo.key}.{counter.rollupType}": counter.key
+                for counter in perf_manager.perfCounter
+            }
+            _LOGGER.debug("Cached %s performance counter(s)", len(self._ids))
+        return {name: self._ids[name] for name in names if name in self._ids}
+
+    def query(self, perf_manager, entities, counters):
+        """Query the latest samples of counters for many entities at once.
+
+        counters maps a short key to a counter name. Returns a dict of entity
+        id to a dict of short key to a dict of instance to the mean value.
+        The aggregate of all instances is reported as instance "".
+        """
+        ids = self.ids(perf_manager, counters.values())
+        if not ids or not entities:
+            return {}
+        keys = {ids[name]: key for key, name in counters.items() if name in ids}
+
+        metric_ids = [
+            vim.PerformanceManager.MetricId(counterId=counter_id, instance="*")
+            for counter_id in keys
+        ]
+        query_specs = [
+            vim.PerformanceManager.QuerySpec(
+                entity=entity,
+                metricId=metric_ids,
+                intervalId=PERF_INTERVAL,
+                maxSample=PERF_SAMPLES,
+            )
+            for entity in entities
+        ]
+
+        values = {}
+        for entity_metric in perf_manager.QueryPerf(querySpec=query_specs) or []:
+            entity_values = values.setdefault(entity_metric.entity._moId, {})  # pylint: disable=protected-access
+            for series in entity_metric.value:
+                samples = [value for value in series.value if value >= 0]
+                if not samples:
+                    continue
+                entity_values.setdefault(keys[series.id.counterId], {})[
+                    series.id.instance
+                ] = sum(samples) / len(samples)
+
+        return values
+
+
+def get_connected_hosts(content, esxi_hosts=None, states=None):
+    """Return hosts that are connected and can report statistics.
+
+    esxi_hosts and their states ({moId: {"runtime.connectionState": ...}})
+    already read in the cycle are reused, otherwise all hosts are read.
+    """
+    if esxi_hosts is None or states is None:
+        host_objview = content.viewManager.CreateContainerView(
+            content.rootFolder, [vim.HostSystem], True
+        )
+        esxi_hosts = host_objview.view
+        states = retrieve_properties(
+            content, vim.HostSystem, ["runtime.connectionState"], container=host_objview
+        )
+        host_objview.Destroy()
+
+    return [
+        esxi_host
+        for esxi_host in esxi_hosts
+        if states.get(esxi_host._moId, {}).get("runtime.connectionState") == "connected"  # pylint: disable=protected-access
+    ]
+
+
+def aggregate_datastore_perf(host_values):
+    """Aggregate per-host datastore counters per datastore.
+
+    IOPS and throughput are summed across hosts, latencies are averaged
+    weighted by the IOPS each host issued.
+    """
+    totals = {}
+    for values in host_values.values():
+        for instance in set().union(*values.values()) - {""}:
+            total = totals.setdefault(
+                instance,
+                {
+                    "read_iops": 0.0,
+                    "write_iops": 0.0,
+                    "read_kbps": 0.0,
+                    "write_kbps": 0.0,
+                    "read_latency": 0.0,
+                    "write_latency": 0.0,
+                },
+            )
+            read_iops = values.get("read_iops", {}).get(instance, 0.0)
+            write_iops = values.get("write_iops", {}).get(instance, 0.0)
+            total["read_iops"] += read_iops
+            total["write_iops"] += write_iops
+            total["read_kbps"] += values.get("read_kbps", {}).get(instance, 0.0)
+            total["write_kbps"] += values.get("write_kbps", {}).get(instance, 0.0)
+            total["read_latency"] += read_iops * values.get("read_latency", {}).get(instance, 0.0)
+            total["write_latency"] += write_iops * values.get("write_latency", {}).get(instance, 0.0)
+
+    return totals
+
+
+def get_datastore_perf_info(total):
+    """Get datastore performance information."""
+    if total is None:
+        return {
+            "read_iops": "n/a",
+            "write_iops": "n/a",
+            "read_mbps": "n/a",
+            "write_mbps": "n/a",
+            "latency_ms": "n/a",
+        }
+
+    iops = total["read_iops"] + total["write_iops"]
+    latency = (total["read_latency"] + total["write_latency"]) / iops if iops else 0.0
+
+    return {
+        "read_iops": round(total["read_iops"]),
+        "write_iops": round(total["write_iops"]),
+        "read_mbps": round(total["read_kbps"] / 1024, 2),
+        "write_mbps": round(total["write_kbps"] / 1024, 2),
+        "latency_ms": round(latency, 1),
+    }
+
+
+def _network_rates(values, instance):
+    """Return throughput and drop rates of one NIC instance."""
+    # drops are summed per sample interval, turn them into a rate
+    return {
+        "rx_kbps": round(values.get("rx_kbps", {}).get(instance, 0.0)),
+        "tx_kbps": round(values.get("tx_kbps", {}).get(instance, 0.0)),
+        "rx_dropped": round(values.get("rx_dropped", {}).get(instance, 0.0) / PERF_INTERVAL, 2),
+        "tx_dropped": round(values.get("tx_dropped", {}).get(instance, 0.0) / PERF_INTERVAL, 2),
+    }
+
+
+def get_network_info(values):
+    """Get network throughput information of a VM or host.
+
+    values are the NETWORK_COUNTERS results of one entity, an empty dict for
+    an entity without samples (e.g. powered off) or None if not queried.
+    """
+    if values is not None:
+        values = {key: values[key] for key in NETWORK_COUNTERS if key in values}
+    else:
+        return {
+            "net_rx_kbps": "n/a",
+            "net_tx_kbps": "n/a",
+            "net_rx_dropped": "n/a",
+            "net_tx_dropped": "n/a",
+            "nics": [],
+        }
+
+    # per vNIC (device key) for VMs, per physical NIC (vmnicN) for hosts
+    nics = [
+        {"nic": instance, **_network_rates(values, instance)}
+        for instance in sorted(set().union(*values.values()) - {""})
+    ]
+    if any("" in instances for instances in values.values()):
+        total = _network_rates(values, "")
+    else:
+        total = {
+            key: round(sum(nic[key] for nic in nics), 2)
+            for key in ["rx_kbps", "tx_kbps", "rx_dropped", "tx_dropped"]
+        }
+
+    net_data = {
+        "net_rx_kbps": total["rx_kbps"],
+        "net_tx_kbps": total["tx_kbps"],
+        "net_rx_dropped": total["rx_dropped"],
+        "net_tx_dropped": total["tx_dropped"],
+        "nics": nics,
+    }
+
+    return net_data
+
+
+def get_virtual_disk_info(disks, values):
+    """Get per virtual disk size and I/O information of a VM.
+
+    disks come from get_virtual_disks, values are the VIRTUAL_DISK_COUNTERS
+    results of the VM ({} without samples, None if not queried).
+    """
+    disk_data = {"disks": []}
+    for disk in disks:
+        instance = disk["disk"]
+        if values is None:
+            disk_io = {"read_iops": "n/a", "write_iops": "n/a", "latency_ms": "n/a"}
+        else:
+            read_iops = values.get("disk_read_iops", {}).get(instance, 0.0)
+            write_iops = values.get("disk_write_iops", {}).get(instance, 0.0)
+            iops = read_iops + write_iops
+            latency = (
+                read_iops * values.get("disk_read_latency", {}).get(instance, 0.0)
+                + write_iops * values.get("disk_write_latency", {}).get(instance, 0.0)
+            ) / iops if iops else 0.0
+            disk_io = {
+                "read_iops": round(read_iops),
+                "write_iops": round(write_iops),
+                "latency_ms": round(latency, 1),
+            }
+        disk = {**disk, **disk_io}
+        disk_data["disks"].append(disk)
+
+        # flat keys become (disabled by default) sensors on the VM device
+        label = instance.replace(":", "_")
+        for metric in VIRTUAL_DISK_STATES:
+            disk_data[f"{VIRTUAL_DISK_PREFIX}{label}_{metric}"] = disk[metric]
+
+    return disk_data
@@ -0,0 +1,115 @@
+"""Adaptive refresh interval for ESXi Stats."""
+import logging
+import time
+from threading import Lock
+
+from .const import (
+    POLL_ACTIVITY_HOLD,
+    POLL_BACKOFF,
+    POLL_CHANGE_KEYS,
+    POLL_MIN_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_state_snapshot(entry_data, conditions):
+    """Return the state-like values of all objects, without the metrics."""
+    return {
+        (cond, obj): tuple(obj_data.get(key) for key in POLL_CHANGE_KEYS)
+        for cond in conditions
+        for obj, obj_data in entry_data.get(cond, {}).items()
+    }
+
+
+def count_changes(previous, current):
+    """Return the number of objects added, removed or changed in state."""
+    if previous is None:
+        return 0
+    return sum(
+        1
+        for key in previous.keys() | current.keys()
+        if previous.get(key) != current.get(key)
+    )
+
+
+class AdaptiveInterval:
+    """Refresh interval that follows how much the inventory changes.
+
+    A cycle that saw state changes (power, connection, maintenance mode,
+    alarms, migrations, ...) or tasks in flight, and any activity reported
+    in between (events, actions), sets the interval to the minimum for
+    POLL_ACTIVITY_HOLD seconds. Every quiet cycle after that grows it by
+    POLL_BACKOFF up to the configured maximum. The minimum is at least twice
+    the last cycle duration, so slow inventories are not polled back to back.
+    """
+
+    def __init__(self, maximum):
+        """Initialize at the minimum interval, the first refresh is due."""
+        self.maximum = max(maximum, POLL_MIN_INTERVAL)
+        self.minimum = POLL_MIN_INTERVAL
+        self.interval = POLL_MIN_INTERVAL
+        self.changes = 0
+        self.in_flight = 0
+        self._active_until = 0.0
+        self._next = 0.0
+        self._lock = Lock()
+
+    def due(self):
+        """Return True if the next refresh is due and schedule the one after."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next:
+                return False
+            self._next = now + self.interval
+            return True
+
+    def defer(self):
+        """Retry soon a refresh that due() let through but that did not run."""
+        with self._lock:
+            self._next = time.monotonic() + POLL_MIN_INTERVAL
+
+    def mark_activity(self):
+        """Poll at the minimum interval for a while, e.g. after an action."""
+        now = time.monotonic()
+        with self._lock:
+            self._active_until = now + POLL_ACTIVITY_HOLD
+            if self.interval > self.minimum:
+                self._next = min(self._next, now + self.minimum)
+                self.interval = self.minimum
+
+    def record_cycle(self, started, duration, changes, in_flight):
+        """Adapt the interval to the result of the cycle that started at started."""
+        with self._lock:
+            self.changes = changes
+            self.in_flight = in_flight
+            self.minimum = min(self.maximum, max(POLL_MIN_INTERVAL, round(duration * 2)))
+            if changes or in_flight:
+                self._active_until = started + duration + POLL_ACTIVITY_HOLD
+            if time.monotonic() < self._active_until:
+                interval = self.minimum
+            else:
+                interval = min(self.maximum, max(self.minimum, self.interval * POLL_BACKOFF))
+            if interval != self.interval:
+                _LOGGER.debug(
+                    "Refresh interval %s -> %s seconds (%s change(s), %s task(s) in flight)",
+                    round(self.interval),
+                    round(interval),
+                    changes,
+                    in_flight,
+                )
+            self.interval = interval
+            self._next = started + interval
+
+    def as_dict(self):
+        """Return the current interval for diagnostics."""
+        with self._lock:
+            return {
+                "interval": round(self.interval),
+                "minimum": round(self.minimum),
+                "maximum": self.maximum,
+                "changes": self.changes,
+                "in_flight": self.in_flight,
+                "active": time.monotonic() < self._active_until,
+                "next_in": max(0, round(self._next - time.monotonic())),
+            }
@@ -0,0 +1,234 @@
+"""Shared connection pool and rate limiter for ESXi Stats."""
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Event, Lock
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sessions kept per host/vCenter, shared by collection and actions
+POOL_SIZE = 4
+# Checkouts allowed per second and burst size
+POOL_RATE = 5
+POOL_BURST = 10
+# Idle sessions are re-validated after this many seconds and dropped after
+# POOL_IDLE_TIMEOUT (vCenter expires idle sessions after 30 minutes by default)
+POOL_VALIDATE_AFTER = 30
+POOL_IDLE_TIMEOUT = 1200
+
+_POOLS = {}
+_POOLS_LOCK = Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate, burst):
+        """Initialize the bucket full."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """Take tokens and return how long the caller has to wait for them."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class ConnectionPool:
+    """Pool of authenticated sessions with FIFO queuing and rate limiting."""
+
+    def __init__(self, name, connect, disconnect, size=POOL_SIZE, rate=POOL_RATE, burst=POOL_BURST):
+        """Initialize the pool.
+
+        connect must return a new service instance or raise,
+        disconnect logs a service instance out.
+        """
+        self.name = name
+        self._connect = connect
+        self._disconnect = disconnect
+        self.size = size
+        self.bucket = TokenBucket(rate, burst)
+        self._idle = []  # (service_instance, released_at)
+        self._in_use = 0
+        self._lent = set()
+        self._waiters = deque()
+        self._lock = Lock()
+        self._closed = False
+        self.stats = {"logins": 0, "reused": 0, "discarded": 0, "waits": 0}
+
+    def acquire(self, timeout=None):
+        """Borrow a session, waiting in FIFO order for a free slot."""
+        waiter = None
+        with self._lock:
+            if self._closed:
+                raise ConnectionError(f"Connection pool for {self.name} is closed")
+            if self._in_use < self.size and not self._waiters:
+                self._in_use += 1
+            else:
+                waiter = Event()
+                self._waiters.append(waiter)
+                self.stats["waits"] += 1
+
+        # released slots are handed directly to the oldest waiter
+        if waiter is not None and not waiter.wait(timeout):
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise TimeoutError(f"Timed out waiting for a session to {self.name}")
+            # slot was handed over while timing out - keep it
+
+        try:
+            if self._closed:
+                raise ConnectionError(f"Connection pool for {self.name} is closed")
+            self.bucket.acquire()
+            return self._checkout()
+        except BaseException:
+            self._free_slot()
+            raise
+
+    def release(self, conn, discard=False):
+        """Return a borrowed session to the pool."""
+        with self._lock:
+            lent = id(conn) in self._lent
+            self._lent.discard(id(conn))
+            keep = lent and not discard and not self._closed
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+
+        # sessions of a closed or replaced pool are simply logged out
+        try:
+            if not keep:
+                self.stats["discarded"] += 1
+                self._safe_disconnect(conn)
+        finally:
+            if lent:
+                self._free_slot()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a session for the duration of a with block."""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (ConnectionError, OSError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard)
+
+    def close(self):
+        """Log out all idle sessions and refuse new checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            waiters, self._waiters = list(self._waiters), deque()
+        for waiter in waiters:
+            waiter.set()
+        for conn, _ in idle:
+            self._safe_disconnect(conn)
+
+    def as_dict(self):
+        """Return pool state for diagnostics."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "closed": self._closed,
+                **self.stats,
+            }
+
+    def _free_slot(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._in_use -= 1
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released = self._idle.pop()
+
+            idle_for = time.monotonic() - released
+            if idle_for < POOL_VALIDATE_AFTER or (
+                idle_for < POOL_IDLE_TIMEOUT and _session_alive(conn)
+            ):
+                self.stats["reused"] += 1
+                return self._lend(conn)
+
+            self.stats["discarded"] += 1
+            self._safe_disconnect(conn)
+
+        conn = self._connect()
+        if conn is None:
+            raise ConnectionError(f"Failed to connect to {self.name}")
+        self.stats["logins"] += 1
+        return self._lend(conn)
+
+    def _safe_disconnect(self, conn):
+        """Log a session out, dead or expired sessions may fail to."""
+        try:
+            self._disconnect(conn)
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.debug("Could not log out a session of %s: %s", self.name, error)
+
+    def _lend(self, conn):
+        with self._lock:
+            self._lent.add(id(conn))
+        return conn
+
+
+def _session_alive(conn):
+    """Return True if the session of a service instance is still valid."""
+    try:
+        return conn.content.sessionManager.currentSession is not None
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+def get_pool(key, name, connect, disconnect):
+    """Return the shared pool for key, creating it on first use."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(name, connect, disconnect)
+            _POOLS[key] = pool
+        return pool
+
+
+def find_pool(key):
+    """Return the shared pool for key if it exists."""
+    with _POOLS_LOCK:
+        return _POOLS.get(key)
+
+
+def close_pool(key):
+    """Close and forget the shared pool for key."""
+    with _POOLS_LOCK:
+        pool = _POOLS.pop(key, None)
+    if pool is not None:
+        pool.close()
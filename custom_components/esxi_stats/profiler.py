@@ -0,0 +1,96 @@
+"""On-demand profiling of a refresh cycle for ESXi Stats."""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from datetime import datetime
+from threading import Lock
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lines of the written report per sort order
+REPORT_LINES = 60
+
+# Only one profiler can be active per interpreter
+_PROFILE_LOCK = Lock()
+
+
+def _function_name(func):
+    """Return a readable name for a pstats function key."""
+    filename, line, name = func
+    if filename == "~":
+        # built-in functions have no file
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def profile_cycle(client, path, top):
+    """Run one refresh cycle of client under cProfile.
+
+    A sorted text report and a pstats file are written to path, the top
+    functions by cumulative time are returned. Raises HomeAssistantError if
+    no cycle ran (already running, host unreachable, deferred, no session).
+    """
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        raise HomeAssistantError("A refresh cycle is already being profiled")
+
+    try:
+        cycles = client.metrics["cycles"]
+        profiler = cProfile.Profile()
+        started = time.monotonic()
+        profiler.enable()
+        try:
+            client.update_data(no_throttle=True)
+        finally:
+            profiler.disable()
+        duration = round(time.monotonic() - started, 3)
+    finally:
+        _PROFILE_LOCK.release()
+
+    # update_data returns without a cycle when it cannot run one now
+    if client.metrics["cycles"] == cycles:
+        raise HomeAssistantError(
+            f"No refresh of {client.host} ran - it is already running, "
+            "deferred or the host is unreachable"
+        )
+
+    base = os.path.join(
+        path, f"{DOMAIN}_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    profiler.dump_stats(f"{base}.pstats")
+
+    report = io.StringIO()
+    report.write(f"Refresh of {client.host} took {duration} seconds\n")
+    stats = pstats.Stats(profiler, stream=report)
+    for sort_key in ["cumulative", "tottime"]:
+        report.write(f"\nSorted by {sort_key}:\n")
+        stats.sort_stats(sort_key).print_stats(REPORT_LINES)
+    with open(f"{base}.txt", "w", encoding="utf-8") as report_file:
+        report_file.write(report.getvalue())
+
+    _LOGGER.info("Profile of %s written to %s.txt", client.host, base)
+
+    top_functions = sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:top]
+
+    return {
+        "duration": duration,
+        "report": f"{base}.txt",
+        "pstats": f"{base}.pstats",
+        "top_functions": [
+            {
+                "function": _function_name(func),
+                "calls": calls,
+                "own_seconds": round(own_time, 4),
+                "cumulative_seconds": round(cumulative_time, 4),
+            }
+            for func, (_, calls, own_time, cumulative_time, _) in top_functions
+        ],
+    }
@@ -0,0 +1,302 @@
+"""Rolling host reboots for ESXi Stats."""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event, Lock, Thread
+
+from homeassistant.helpers.dispatcher import dispatcher_send
+from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
+
+from .const import (
+    DOMAIN,
+    ROLLING_MAINTENANCE_TIMEOUT,
+    ROLLING_POLL_INTERVAL,
+    ROLLING_REBOOT_TIMEOUT,
+    ROLLING_TASK_TIMEOUT,
+    SIGNAL_ROLLING_REBOOT,
+)
+from .esxi import esx_connect, esx_disconnect, retrieve_properties
+from .operations import select_hosts
+
+_LOGGER = logging.getLogger(__name__)
+
+HOST_PROPERTIES = [
+    "runtime.connectionState",
+    "runtime.inMaintenanceMode",
+    "runtime.bootTime",
+]
+
+
+class RollingReboot:
+    """Reboot a set of vCenter hosts with a limit on hosts down at once.
+
+    Each host enters maintenance mode (DRS evacuates its VMs), reboots,
+    reconnects and exits maintenance mode. A host takes one of max_down
+    slots for all of its phases, so the next host starts entering maintenance
+    mode while others are still rebooting. After a failure no further hosts
+    are started, the failed host is left in maintenance mode.
+    """
+
+    def __init__(self, hass, client):
+        """Initialize an idle orchestrator for the vCenter of client."""
+        self.hass = hass
+        self.client = client
+        self.progress = {"state": "idle"}
+        self._lock = Lock()
+        self._conn_lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        self._conn = None
+        self._hosts = {}
+        self._busy = False
+
+    @property
+    def running(self):
+        """Return True from prepare until a rolling reboot has finished."""
+        return self._busy
+
+    def prepare(self, host_names=None, cluster=None, max_down=1):
+        """Connect and select the hosts to reboot, raise on invalid targets.
+
+        Reserves the orchestrator until the run started by start finishes.
+        """
+        with self._lock:
+            if self._busy:
+                raise ValueError("A rolling reboot is already running")
+            self._busy = True
+
+        # the run can take hours, it does not hold a pooled session
+        conn = esx_connect(**self.client.conn_details)
+        if conn is None:
+            self._busy = False
+            raise ValueError(f"Failed to connect to {self.client.host}")
+        try:
+            content = conn.RetrieveContent()
+            if content.about.apiType != "VirtualCenter":
+                raise ValueError("Rolling reboots require vCenter")
+            hosts = select_hosts(content, HOST_PROPERTIES, host_names, cluster)
+            disconnected = [
+                name
+                for name, (_, props) in hosts.items()
+                if props.get("runtime.connectionState") != "connected"
+            ]
+            if disconnected:
+                raise ValueError(f"Host(s) not connected: {', '.join(disconnected)}")
+        except Exception:
+            esx_disconnect(conn)
+            self._busy = False
+            raise
+
+        self._conn = conn
+        self._hosts = hosts
+        self._stop.clear()
+        self.progress = {
+            "state": "pending",
+            "max_down": max_down,
+            "total": len(hosts),
+            "completed": 0,
+            "failed": 0,
+            "skipped": 0,
+            "in_progress": [],
+            "hosts": {name: "pending" for name in hosts},
+            "errors": {},
+            "started": None,
+            "finished": None,
+            "duration": None,
+        }
+        return {"hosts": sorted(hosts), "max_down": max_down}
+
+    def start(self):
+        """Run the prepared rolling reboot in the background."""
+        self._thread = Thread(
+            target=self._run,
+            name=f"{DOMAIN}_rolling_reboot_{self.client.host}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def as_dict(self):
+        """Return a copy of the progress that is safe to read in the event loop."""
+        with self._lock:
+            return {
+                key: value.copy() if isinstance(value, (dict, list)) else value
+                for key, value in self.progress.items()
+            }
+
+    def cancel(self):
+        """Do not start further hosts, hosts in progress are finished."""
+        self._stop.set()
+
+    def _publish(self):
+        dispatcher_send(self.hass, SIGNAL_ROLLING_REBOOT.format(self.client.entry))
+
+    def _set_phase(self, name, phase, error=None):
+        with self._lock:
+            self.progress["hosts"][name] = phase
+            if phase in ["done", "failed", "skipped"]:
+                key = "completed" if phase == "done" else phase
+                self.progress[key] += 1
+            self.progress["in_progress"] = [
+                host
+                for host, host_phase in self.progress["hosts"].items()
+                if host_phase not in ["pending", "done", "failed", "skipped"]
+            ]
+            if error is not None:
+                self.progress["errors"][name] = error
+        _LOGGER.info("Rolling reboot: %s %s", name, phase)
+        self._publish()
+
+    def _run(self):
+        started = time.monotonic()
+        self.progress["state"] = "running"
+        self.progress["started"] = datetime.now().isoformat(timespec="seconds")
+        self._publish()
+        try:
+            with ThreadPoolExecutor(max_workers=self.progress["max_down"]) as executor:
+                list(executor.map(self._reboot_host, list(self._hosts)))
+        finally:
+            esx_disconnect(self._conn)
+            self._conn = None
+            if self.progress["failed"]:
+                self.progress["state"] = "failed"
+            elif self._stop.is_set():
+                self.progress["state"] = "cancelled"
+            else:
+                self.progress["state"] = "completed"
+            self.progress["finished"] = datetime.now().isoformat(timespec="seconds")
+            self.progress["duration"] = round(time.monotonic() - started)
+            _LOGGER.info(
+                "Rolling reboot %s after %s seconds",
+                self.progress["state"],
+                self.progress["duration"],
+            )
+            self._busy = False
+            self._publish()
+
+    def _reboot_host(self, name):
+        if self._stop.is_set() or self.progress["failed"]:
+            self._set_phase(name, "skipped")
+            return
+
+        host, props = self._hosts[name]
+        # hosts already in maintenance mode are left in it
+        in_maintenance = props.get("runtime.inMaintenanceMode")
+        try:
+            if not in_maintenance:
+                self._set_phase(name, "entering_maintenance")
+                self._wait_task(
+                    self._call(host, lambda obj: obj.EnterMaintenanceMode_Task(timeout=0)),
+                    ROLLING_MAINTENANCE_TIMEOUT,
+                )
+
+            self._set_phase(name, "rebooting")
+            self._wait_task(
+                self._call(host, lambda obj: obj.RebootHost_Task(force=False)),
+                ROLLING_TASK_TIMEOUT,
+            )
+
+            self._set_phase(name, "waiting_for_reconnect")
+            self._wait_reconnect(host, props.get("runtime.bootTime"))
+
+            if not in_maintenance:
+                self._set_phase(name, "exiting_maintenance")
+                self._wait_task(
+                    self._call(host, lambda obj: obj.ExitMaintenanceMode_Task(timeout=0)),
+                    ROLLING_MAINTENANCE_TIMEOUT,
+                )
+        except (vmodl.MethodFault, RuntimeError, OSError) as error:
+            self._set_phase(name, "failed", getattr(error, "msg", None) or str(error))
+            return
+
+        self._set_phase(name, "done")
+
+    def _bind(self, obj):
+        """Return obj (host or task) bound to the current session."""
+        with self._conn_lock:
+            return type(obj)(obj._moId, self._conn._stub)  # pylint: disable=protected-access
+
+    def _call(self, obj, func):
+        """Return func(obj) on the current session.
+
+        Sessions are replaced by any worker that finds its session gone, a
+        call rejected as not authenticated is retried once on the new one.
+        """
+        conn = self._conn
+        try:
+            return func(self._bind(obj))
+        except vim.fault.NotAuthenticated:
+            self._reconnect(conn)
+            return func(self._bind(obj))
+
+    def _poll(self, obj, func):
+        """Return func(obj) for a read, or None after a connection error."""
+        conn = self._conn
+        try:
+            return self._call(obj, func)
+        except (OSError, vim.fault.NotAuthenticated) as error:
+            # e.g. vCenter itself restarted - keep waiting on a new session
+            _LOGGER.debug("Rolling reboot: reconnecting after %s", error)
+            try:
+                self._reconnect(conn)
+            except OSError as reconnect_error:
+                _LOGGER.debug("Rolling reboot: %s", reconnect_error)
+            return None
+
+    def _wait_task(self, task, timeout):
+        """Wait for a task, cancel it and raise if it fails or times out."""
+        state = vim.TaskInfo.State
+        deadline = time.monotonic() + timeout
+        while True:
+            info = self._poll(task, lambda obj: obj.info)
+            if info is not None and info.state == state.success:
+                return
+            if info is not None and info.state == state.error:
+                raise RuntimeError(info.error.msg)
+            if time.monotonic() > deadline:
+                try:
+                    self._call(task, lambda obj: obj.CancelTask())
+                except (vmodl.MethodFault, OSError) as error:
+                    _LOGGER.debug("Could not cancel task: %s", error)
+                raise RuntimeError(
+                    f"{getattr(info, 'descriptionId', 'Task')} timed out after {timeout} seconds"
+                )
+            time.sleep(ROLLING_POLL_INTERVAL)
+
+    def _reconnect(self, stale):
+        """Replace the session stale by a new one, unless another worker did."""
+        with self._conn_lock:
+            if self._conn is stale:
+                esx_disconnect(stale)
+                conn = esx_connect(**self.client.conn_details)
+                if conn is None:
+                    raise ConnectionError(f"Failed to connect to {self.client.host}")
+                self._conn = conn
+
+    def _wait_reconnect(self, host, boot_time):
+        """Wait until the host is connected again after it booted.
+
+        Connection errors while waiting (e.g. vCenter itself restarted) open
+        a new session.
+        """
+        deadline = time.monotonic() + ROLLING_REBOOT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(ROLLING_POLL_INTERVAL)
+            props = self._poll(
+                host,
+                lambda obj: retrieve_properties(
+                    self._conn.RetrieveContent(),
+                    vim.HostSystem,
+                    ["runtime.connectionState", "runtime.bootTime"],
+                    objects=[obj],
+                ).get(obj._moId, {}),  # pylint: disable=protected-access
+            )
+            if (
+                props is not None
+                and props.get("runtime.connectionState") == "connected"
+                and props.get("runtime.bootTime") != boot_time
+            ):
+                return
+        raise RuntimeError(
+            f"Host did not reconnect within {ROLLING_REBOOT_TIMEOUT} seconds"
+        )
@@ -0,0 +1,238 @@
+"""Inventory scoping for ESXi Stats."""
+import logging
+import time
+from fnmatch import fnmatch
+
+from pyVmomi import vim  # pylint: disable=no-name-in-module
+
+from .const import (
+    CONF_ATTRIBUTES,
+    CONF_CLUSTERS,
+    CONF_EXCLUDE,
+    CONF_FOLDERS,
+    CONF_INCLUDE,
+    CONF_RESOURCE_POOLS,
+    CONF_TAGS,
+    CONF_TEMPLATES,
+    DEFAULT_TEMPLATES,
+    MEMBERSHIP_TTL,
+)
+from .esxi import retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+# Child type a folder must hold to contain objects of a type
+FOLDER_CHILD_TYPES = {
+    vim.HostSystem: "ComputeResource",
+    vim.Datastore: "Datastore",
+    vim.VirtualMachine: "VirtualMachine",
+}
+
+
+def _split(value):
+    """Return the items of a comma separated option."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class InventoryScope:
+    """Select the hosts, datastores and VMs that are monitored.
+
+    Folders, clusters and resource pools are the roots of the container views
+    objects are listed from, so objects outside of them are never read. The
+    remaining objects are filtered on their name, template flag and custom
+    attributes, read in one batch, before any per-object data is collected.
+    Objects must match every kind of root that applies to their type.
+
+    With tags, only objects attached to one of them are monitored. Tag
+    membership is read by TagMembership, which sets tagged.
+    """
+
+    def __init__(self, options):
+        """Initialize the scope from the entry options."""
+        self.include = [pattern.lower() for pattern in _split(options.get(CONF_INCLUDE))]
+        self.exclude = [pattern.lower() for pattern in _split(options.get(CONF_EXCLUDE))]
+        self.folders = _split(options.get(CONF_FOLDERS))
+        self.clusters = [name.lower() for name in _split(options.get(CONF_CLUSTERS))]
+        self.resource_pools = [
+            name.lower() for name in _split(options.get(CONF_RESOURCE_POOLS))
+        ]
+        self.templates = options.get(CONF_TEMPLATES, DEFAULT_TEMPLATES)
+        self.tags = [tag.lower() for tag in _split(options.get(CONF_TAGS))]
+        # "name=value" requires a value, "name" any non-empty value
+        self.attributes = {}
+        for attribute in _split(options.get(CONF_ATTRIBUTES)):
+            name, _, value = attribute.partition("=")
+            self.attributes[name.strip().lower()] = value.strip() or None
+        self.tagged = None
+        self._fields = {}
+        self._roots = None
+        self._roots_expires = 0.0
+
+    @property
+    def unrestricted(self):
+        """Return True if every object is monitored."""
+        return not (
+            self.include
+            or self.exclude
+            or self.folders
+            or self.clusters
+            or self.resource_pools
+            or self.tags
+            or self.attributes
+            or not self.templates
+        )
+
+    def invalidate(self):
+        """Resolve folders, clusters and resource pools again."""
+        self._roots_expires = 0.0
+
+    def _resolve_roots(self, content):
+        """Return the managed object ids of the configured roots by kind.
+
+        Inventory paths and names change rarely, the result is cached.
+        """
+        if self._roots is not None and self._roots_expires > time.monotonic():
+            return self._roots
+
+        roots = {"folders": [], "clusters": [], "resource_pools": []}
+        for path in self.folders:
+            folder = content.searchIndex.FindByInventoryPath(path)
+            if folder is None:
+                _LOGGER.warning("Inventory path %s was not found", path)
+                continue
+            roots["folders"].append(
+                (type(folder), folder._moId, list(getattr(folder, "childType", [])))  # pylint: disable=protected-access
+            )
+
+        for kind, obj_type, names in [
+            ("clusters", vim.ClusterComputeResource, self.clusters),
+            ("resource_pools", vim.ResourcePool, self.resource_pools),
+        ]:
+            if not names:
+                continue
+            view = content.viewManager.CreateContainerView(
+                content.rootFolder, [obj_type], True
+            )
+            found = retrieve_properties(content, obj_type, ["name"], container=view)
+            view.Destroy()
+            roots[kind] = [
+                (obj_type, moid, [])
+                for moid, props in found.items()
+                if props.get("name", "").lower() in names
+            ]
+            if not roots[kind]:
+                _LOGGER.warning("None of the %s %s were found", kind, ", ".join(names))
+
+        if self.attributes:
+            # custom attribute values are reported by key
+            self._fields = {
+                field.key: field.name.lower()
+                for field in content.customFieldsManager.field
+            }
+
+        self._roots = roots
+        self._roots_expires = time.monotonic() + MEMBERSHIP_TTL
+        return roots
+
+    def _root_kinds(self, roots, obj_type):
+        """Return the roots that restrict obj_type, grouped by kind."""
+        kinds = []
+        folders = [
+            root
+            for root in roots["folders"]
+            # datacenters and other containers hold every type
+            if root[0] is not vim.Folder or FOLDER_CHILD_TYPES[obj_type] in root[2]
+        ]
+        if folders:
+            kinds.append(folders)
+        if self.clusters and obj_type is not vim.Datastore:
+            kinds.append(roots["clusters"])
+        if self.resource_pools and obj_type is vim.VirtualMachine:
+            kinds.append(roots["resource_pools"])
+        return kinds
+
+    def _list(self, content, root, obj_type):
+        """Return the obj_type objects below a root."""
+        root_type, moid, _ = root
+        container = root_type(moid, content.rootFolder._stub)  # pylint: disable=protected-access
+        view = content.viewManager.CreateContainerView(container, [obj_type], True)
+        objects = view.view
+        view.Destroy()
+        return objects
+
+    def select(self, content, obj_type):
+        """Return the monitored objects of obj_type."""
+        kinds = self._root_kinds(self._resolve_roots(content), obj_type)
+        if self.tags and not self.tagged:
+            # unlabelled objects are never collected
+            return []
+
+        if kinds:
+            selected = None
+            for roots in kinds:
+                objects = {}
+                for root in roots:
+                    for obj in self._list(content, root, obj_type):
+                        objects[obj._moId] = obj  # pylint: disable=protected-access
+                selected = (
+                    objects
+                    if selected is None
+                    else {moid: obj for moid, obj in selected.items() if moid in objects}
+                )
+        else:
+            selected = {
+                obj._moId: obj  # pylint: disable=protected-access
+                for obj in self._list(content, (vim.Folder, content.rootFolder._moId, []), obj_type)  # pylint: disable=protected-access
+            }
+
+        if self.tags:
+            selected = {
+                moid: obj for moid, obj in selected.items() if moid in self.tagged
+            }
+        if not selected:
+            return []
+
+        # filter on cheap properties before anything else is read
+        path_set = ["name"]
+        if obj_type is vim.VirtualMachine and not self.templates:
+            path_set.append("config.template")
+        if self.attributes:
+            path_set.append("customValue")
+        props = retrieve_properties(
+            content, obj_type, path_set, objects=list(selected.values())
+        )
+
+        objects = [
+            obj
+            for moid, obj in selected.items()
+            if moid in props and self._matches(props[moid])
+        ]
+        _LOGGER.debug(
+            "%s of %s %s object(s) are in scope",
+            len(objects),
+            len(selected),
+            obj_type.__name__,
+        )
+        return objects
+
+    def _matches(self, props):
+        """Return True if an object passes the name and template filters."""
+        name = props.get("name", "").lower()
+        if self.include and not any(fnmatch(name, pattern) for pattern in self.include):
+            return False
+        if any(fnmatch(name, pattern) for pattern in self.exclude):
+            return False
+        if not self.templates and props.get("config.template"):
+            return False
+        if self.attributes:
+            values = {
+                self._fields.get(custom_value.key): custom_value.value
+                for custom_value in props.get("customValue", [])
+                if custom_value.value
+            }
+            if not any(
+                name in values and (value is None or values[name] == value)
+                for name, value in self.attributes.items()
+            ):
+                return False
+        return True
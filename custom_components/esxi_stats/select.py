@@ -8,7 +8,8 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, DOMAIN_DATA
-from .esxi import esx_connect, esx_disconnect
+from .entity import ESXiEntity
+from .esxi import esx_checkin, esx_checkout, get_conn_details
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,7 +40,7 @@ async def async_setup_entry(
         _LOGGER.debug("No power policy select entities to add")
 
 
-class ESXiPowerPolicySelect(SelectEntity):
+class ESXiPowerPolicySelect(ESXiEntity, SelectEntity):
     """ESXi Power Policy Select Entity."""
 
     def __init__(self, hass, config, host_name, config_entry):
@@ -49,6 +50,7 @@ class ESXiPowerPolicySelect(SelectEntity):
         self._host_name = host_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vmhost", host_name)
         self._host_data = {}
         self._friendly_name = host_name.replace("_", " ").title()
 
@@ -80,11 +82,9 @@ class ESXiPowerPolicySelect(SelectEntity):
         # Using None instead of "config" to ensure visibility
         return None
 
-    def update(self):
-        """Update the select state."""
+    def _read_data(self):
+        """Read the select state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._host_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vmhost"][self._host_name]
         except KeyError:
             _LOGGER.error("Host %s not found in data", self._host_name)
@@ -126,6 +126,8 @@ class ESXiPowerPolicySelect(SelectEntity):
     @property
     def available(self) -> bool:
         """Return if entity is available."""
+        if not super().available:
+            return False
         if self._host_data is None:
             _LOGGER.debug("Host %s: no host data available", self._host_name)
             return False
@@ -160,8 +162,10 @@ class ESXiPowerPolicySelect(SelectEntity):
         )
 
         if success:
-            # Trigger a data update to refresh the UI
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new policy to the host's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vmhost", self._host_name
+            )
 
             # Show notification
             try:
@@ -180,16 +184,10 @@ class ESXiPowerPolicySelect(SelectEntity):
     def _set_power_policy(self, policy: str) -> bool:
         """Set the power policy on the ESXi host."""
         try:
-            # Get connection details from config
-            conn_details = {
-                "host": self.config.get("host"),
-                "user": self.config.get("username"),
-                "pwd": self.config.get("password"),
-                "port": self.config.get("port", 443),
-                "ssl": self.config.get("verify_ssl", False),
-            }
-
-            conn = esx_connect(**conn_details)
+            # Borrow a pooled connection for the configured host/vCenter
+            conn_details = get_conn_details(self.config, self._config_entry.options)
+
+            conn = esx_checkout(conn_details)
             if not conn:
                 _LOGGER.error("Failed to connect to ESXi host %s", self._host_name)
                 return False
@@ -251,7 +249,7 @@ class ESXiPowerPolicySelect(SelectEntity):
                 _LOGGER.error("Unexpected error while setting power policy: %s", error)
                 return False
             finally:
-                esx_disconnect(conn)
+                esx_checkin(conn_details, conn)
 
         except Exception as error:
             _LOGGER.error("Error setting power policy for %s: %s", self._host_name, error)
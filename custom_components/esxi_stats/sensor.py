@@ -2,17 +2,28 @@
 import logging
 from string import capwords
 from datetime import timedelta
-from homeassistant.helpers.entity import Entity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity, EntityCategory
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC, format_mac
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 
 from .const import (
+    ATTRIBUTE_DETAILS,
+    DATASTORE_ALARM_STATES,
+    DATASTORE_FORECAST_STATES,
+    DATASTORE_PERF_STATES,
+    DISABLED_ATTRIBUTES,
     DOMAIN,
     DOMAIN_DATA,
     DEFAULT_NAME,
     DEFAULT_OPTIONS,
     MAP_TO_MEASUREMENT,
+    SIGNAL_ROLLING_REBOOT,
+    VIRTUAL_DISK_PREFIX,
+    VIRTUAL_DISK_STATES,
 )
+from .entity import ESXiEntity
 
 SCAN_INTERVAL = timedelta(seconds=15)
 
@@ -40,13 +51,18 @@ async def async_setup_entry(hass, config_entry, async_add_devices):
                 # Create individual sensors for each VM attribute
                 vm_data = hass.data[DOMAIN_DATA][entry_id][cond][obj]
                 for attr_key, attr_value in vm_data.items():
-                    if attr_key not in ["uuid", "vm_name"]:  # Skip internal fields
+                    if attr_key not in ["uuid", "vm_name", "alarms", "nics", "disks", "guest_filesystems"]:  # Skip internal fields
                         sensors.append(ESXiSensor(hass, config, cond, obj, config_entry, attr_key))
             elif cond == "vmhost":
                 # Create individual sensors for each host attribute
                 host_data = hass.data[DOMAIN_DATA][entry_id][cond][obj]
                 for attr_key, attr_value in host_data.items():
-                    if attr_key not in ["original_name"]:  # Skip internal fields
+                    if attr_key not in ["original_name", "alarms", "nics"]:  # Skip internal fields
+                        sensors.append(ESXiSensor(hass, config, cond, obj, config_entry, attr_key))
+            elif cond in ["cluster", "resource_pool"]:
+                # Aggregate sensors go to the cluster/resource pool device
+                for attr_key in hass.data[DOMAIN_DATA][entry_id][cond][obj]:
+                    if attr_key not in ["cluster", "name"]:
                         sensors.append(ESXiSensor(hass, config, cond, obj, config_entry, attr_key))
             elif cond == "license":
                 # License entities go to their respective host devices, except vCenter license
@@ -56,14 +72,31 @@ async def async_setup_entry(hass, config_entry, async_add_devices):
                 else:
                     # Host licenses go to their respective host devices
                     sensors.append(ESXiSensor(hass, config, cond, obj, config_entry))
+            elif cond == "datastore":
+                # Datastore sensor plus dedicated forecast and alarm sensors
+                sensors.append(ESXiSensor(hass, config, cond, obj, config_entry))
+                ds_data = hass.data[DOMAIN_DATA][entry_id][cond][obj]
+                for attr_key in (
+                    DATASTORE_FORECAST_STATES + DATASTORE_ALARM_STATES + DATASTORE_PERF_STATES
+                ):
+                    if attr_key in ds_data:
+                        sensors.append(ESXiSensor(hass, config, cond, obj, config_entry, attr_key))
             else:
-                # Datastore and other entities stay under ESXi Stats device
+                # Other entities stay under ESXi Stats device
                 sensors.append(ESXiSensor(hass, config, cond, obj, config_entry))
 
+    # progress of rolling host reboots (vCenter only)
+    client = hass.data[DOMAIN_DATA][entry_id]["client"]
+    if "vmhost" in hass.data[DOMAIN_DATA][entry_id]["monitored_conditions"] and client.vcenter:
+        sensors.append(ESXiRollingRebootSensor(hass, config_entry))
+
+    # effective refresh interval of the adaptive polling
+    sensors.append(ESXiPollIntervalSensor(hass, config_entry))
+
     async_add_devices(sensors, True)
 
 
-class ESXiSensor(Entity):
+class ESXiSensor(ESXiEntity, Entity):
     """ESXi_stats Sensor class."""
 
     def __init__(self, hass, config, cond, obj, config_entry=None, attribute_key=None):
@@ -85,18 +118,21 @@ class ESXiSensor(Entity):
             self._options = DEFAULT_OPTIONS
         self._cond = cond
         self._obj = obj
+        self._target = (cond, obj) if cond in ["vm", "vmhost"] else None
 
-    def update(self):
-        """Update the sensor."""
-        self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
+    def _read_data(self):
+        """Read the sensor state from the collected data."""
         self._data = self.hass.data[DOMAIN_DATA][self._entry_id][self._cond][self._obj]
 
         if self._attribute_key:
             # For individual attribute sensors, state is the attribute value
             self._state = self._data.get(self._attribute_key, "Unknown")
             self._measurement = measure_format(self._attribute_key)
-            # No additional attributes for individual sensors
+            # Only detail lists (e.g. triggered alarms) are exposed as attributes
             self._attr = {}
+            if self._attribute_key in ATTRIBUTE_DETAILS:
+                details_key = ATTRIBUTE_DETAILS[self._attribute_key]
+                self._attr[details_key] = self._data.get(details_key, [])
         else:
             # For legacy sensors (datastore, vCenter license), use configured state
             if self._options[self._cond] not in self._data.keys():
@@ -139,7 +175,7 @@ class ESXiSensor(Entity):
             if self._cond == "vm":
                 vm_name = self._data.get("vm_name", self._obj)
                 return f"{vm_name} {capwords(self._attribute_key.replace('_', ' '))}"
-            elif self._cond == "vmhost":
+            elif self._cond in ["vmhost", "cluster", "resource_pool"]:
                 return f"{self._obj.replace('_', ' ').title()} {capwords(self._attribute_key.replace('_', ' '))}"
             else:
                 return f"{self._obj} {capwords(self._attribute_key.replace('_', ' '))}"
@@ -181,8 +217,14 @@ class ESXiSensor(Entity):
             "cpu_temp_celsius", "cpuusage_ghz", "cputotal_ghz",
             "memusage_gb", "memtotal_gb", "uptime_hours",
             "cpu_use_pct", "memory_used_mb", "memory_active_mb",
-            "free_space_gb", "total_space_gb", "cpu_fan_rpm"
-        ]:
+            "free_space_gb", "total_space_gb", "cpu_fan_rpm",
+            "days_until_full", "growth_gb_per_day", "active_alarms",
+            "read_iops", "write_iops", "read_mbps", "write_mbps", "latency_ms",
+            "net_rx_kbps", "net_tx_kbps", "net_rx_dropped", "net_tx_dropped",
+            "guest_disk_used_pct", "cpu_usage_pct", "mem_usage_pct",
+            "vms", "vms_running", "vcpus", "memory_allocated_gb", "memory_used_gb",
+            "used_space_gb"
+        ] or (self._attribute_key or "").startswith(VIRTUAL_DISK_PREFIX):
             return SensorStateClass.MEASUREMENT
         return None
 
@@ -199,6 +241,10 @@ class ESXiSensor(Entity):
             return "mdi:thermometer"
         elif self._attribute_key == "cpu_fan_rpm":
             return "mdi:fan"
+        elif self._attribute_key == "active_alarms":
+            return "mdi:alarm-light"
+        elif self._attribute_key == "guest_disk_used_pct":
+            return "mdi:harddisk"
         return None
 
     @property
@@ -229,6 +275,16 @@ class ESXiSensor(Entity):
                 identifier = {(DOMAIN, f"host_{self._obj}")}
                 device_name = f"ESXi Host: {host_name}"
                 manufacturer = "VMware ESXi"
+            elif self._cond == "cluster":
+                # Cluster aggregates go to the cluster device
+                identifier = {(DOMAIN, f"cluster_{self._obj}")}
+                device_name = f"Cluster: {self._obj.replace('_', ' ').title()}"
+                manufacturer = "VMware vSphere Cluster"
+            elif self._cond == "resource_pool":
+                # Resource pool aggregates go to the resource pool device
+                identifier = {(DOMAIN, f"resource_pool_{self._obj}")}
+                device_name = f"Resource Pool: {self._data.get('name') or self._obj.replace('_', ' ').title()}"
+                manufacturer = "VMware vSphere Resource Pool"
             elif self._cond == "license" and self._obj != "vcenter_license":
                 # Host license sensors go to their respective host device
                 # Extract host name from license entity name
@@ -254,12 +310,159 @@ class ESXiSensor(Entity):
         if self._cond == "vmhost":
             if self._attribute_key == 'cpu_temp_celsius' or self._attribute_key == 'cpu_fan_rpm':
                 return False
+        if self._cond == "datastore" and self._attribute_key in DATASTORE_PERF_STATES:
+            return False
+        if self._attribute_key in DISABLED_ATTRIBUTES:
+            return False
+        if self._cond == "vm" and (self._attribute_key or "").startswith(VIRTUAL_DISK_PREFIX):
+            return False
+        return True
+
+
+class ESXiRollingRebootSensor(Entity):
+    """Progress of the rolling reboot of an entry, updated as hosts move on."""
+
+    def __init__(self, hass, config_entry):
+        """Init."""
+        self.hass = hass
+        self._config_entry = config_entry
+        self._entry_id = config_entry.entry_id
+
+    async def async_added_to_hass(self):
+        """Subscribe to progress updates."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ROLLING_REBOOT.format(self._entry_id),
+                self._async_progress_updated,
+            )
+        )
+
+    @callback
+    def _async_progress_updated(self):
+        self.async_write_ha_state()
+
+    @property
+    def _progress(self):
+        orchestrator = self.hass.data[DOMAIN_DATA][self._entry_id]["rolling_reboot"]
+        return orchestrator.as_dict() if orchestrator is not None else {"state": "idle"}
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{DEFAULT_NAME} Rolling Reboot"
+
+    @property
+    def unique_id(self):
+        """Return a unique ID to use for this sensor."""
+        return "{}_{}_rolling_reboot".format(
+            self._config_entry.data["host"].replace(".", "_"), self._entry_id
+        )
+
+    @property
+    def state(self):
+        """Return the state of the rolling reboot."""
+        return self._progress["state"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the progress per host."""
+        return {
+            key: value for key, value in self._progress.items() if key != "state"
+        }
+
+    @property
+    def icon(self):
+        """Return the icon for the sensor."""
+        return "mdi:restart"
+
+    @property
+    def should_poll(self):
+        """Progress is pushed by the orchestrator."""
+        return False
+
+    @property
+    def device_info(self):
+        """Return device info for this sensor."""
+        return {
+            "identifiers": {(DOMAIN, self._config_entry.entry_id)},
+            "name": "ESXi Stats",
+            "manufacturer": "VMware, Inc.",
+        }
+
+
+class ESXiPollIntervalSensor(Entity):
+    """Effective refresh interval of an entry."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hass, config_entry):
+        """Init."""
+        self.hass = hass
+        self._config_entry = config_entry
+        self._entry_id = config_entry.entry_id
+        self._poll = {}
+
+    def update(self):
+        """Read the interval of the last refresh."""
+        self._poll = self.hass.data[DOMAIN_DATA][self._entry_id]["client"].poll.as_dict()
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{DEFAULT_NAME} Refresh Interval"
+
+    @property
+    def unique_id(self):
+        """Return a unique ID to use for this sensor."""
+        return "{}_{}_poll_interval".format(
+            self._config_entry.data["host"].replace(".", "_"), self._entry_id
+        )
+
+    @property
+    def state(self):
+        """Return the current refresh interval."""
+        return self._poll.get("interval")
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return "s"
+
+    @property
+    def extra_state_attributes(self):
+        """Return the bounds and the activity the interval follows."""
+        return {key: value for key, value in self._poll.items() if key != "interval"}
+
+    @property
+    def icon(self):
+        """Return the icon for the sensor."""
+        return "mdi:timer-sync-outline"
+
+    @property
+    def should_poll(self):
+        """Return True if entity has to be polled for state."""
         return True
 
+    @property
+    def device_info(self):
+        """Return device info for this sensor."""
+        return {
+            "identifiers": {(DOMAIN, self._config_entry.entry_id)},
+            "name": "ESXi Stats",
+            "manufacturer": "VMware, Inc.",
+        }
+
 
 def measure_format(input):
     """Return measurement in readable form."""
     if input in MAP_TO_MEASUREMENT.keys():
         return MAP_TO_MEASUREMENT[input]
+    elif input.startswith(VIRTUAL_DISK_PREFIX):
+        # per virtual disk keys end in the metric name
+        for metric in VIRTUAL_DISK_STATES:
+            if input.endswith(metric):
+                return MAP_TO_MEASUREMENT[metric]
+        return None
     else:
         return capwords(input.replace("_", " "))
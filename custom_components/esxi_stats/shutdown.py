@@ -0,0 +1,286 @@
+"""Prioritised emergency shutdown for ESXi Stats."""
+import logging
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+
+from pyVmomi import vim, vmodl  # pylint: disable=no-name-in-module
+
+from .const import (
+    BULK_WORKERS,
+    CHECKOUT_TIMEOUT,
+    SHUTDOWN_DEADLINE,
+    SHUTDOWN_HOST_RESERVE,
+    SHUTDOWN_POLL_INTERVAL,
+    SHUTDOWN_POWEROFF_TIMEOUT,
+)
+from .esxi import esx_checkin, esx_checkout, retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+VM_PROPERTIES = [
+    "name",
+    "runtime.powerState",
+    "runtime.host",
+    "guest.toolsRunningStatus",
+    "guest.ipAddress",
+    "guest.hostName",
+]
+
+
+def _key(name):
+    return name.replace(" ", "_").lower()
+
+
+def _matches(name, patterns):
+    return any(
+        fnmatch(name.lower(), pattern.lower()) or fnmatch(_key(name), pattern.lower())
+        for pattern in patterns
+    )
+
+
+def _find_vcenter_vm(content, host, vms, props):
+    """Return the VM running the vCenter the session is connected to, if any."""
+    if content.about.apiType != "VirtualCenter":
+        return None
+    names = {host.lower(), host.split(".")[0].lower()}
+    try:
+        names.add(socket.gethostbyname(host))
+    except OSError:
+        pass
+    for vm in vms:
+        guest = props.get(vm._moId, {})  # pylint: disable=protected-access
+        hostname = (guest.get("guest.hostName") or "").lower()
+        if guest.get("guest.ipAddress") in names or (
+            hostname and (hostname in names or hostname.split(".")[0] in names)
+        ):
+            return vm
+    return None
+
+
+def _powered_on(content, vms):
+    """Return the VMs of vms that are not powered off, read in one batch."""
+    if not vms:
+        return []
+    states = retrieve_properties(
+        content, vim.VirtualMachine, ["runtime.powerState"], objects=vms
+    )
+    return [
+        vm
+        for vm in vms
+        if states.get(vm._moId, {}).get("runtime.powerState") != "poweredOff"  # pylint: disable=protected-access
+    ]
+
+
+def _wait_powered_off(content, vms, deadline):
+    """Poll until all vms are powered off or deadline, return the rest."""
+    remaining = _powered_on(content, vms)
+    while remaining and time.monotonic() < deadline:
+        time.sleep(SHUTDOWN_POLL_INTERVAL)
+        remaining = _powered_on(content, remaining)
+    return remaining
+
+
+def _parallel(func, items):
+    """Run func over items concurrently, return {item: error message}."""
+
+    def call(item):
+        try:
+            func(item)
+        except vmodl.MethodFault as error:
+            return item, error.msg
+        except Exception as error:  # pylint: disable=broad-except
+            # e.g. a dropped connection, the other items still run
+            return item, str(error) or type(error).__name__
+        return item, None
+
+    with ThreadPoolExecutor(max_workers=BULK_WORKERS) as executor:
+        return {item: error for item, error in executor.map(call, items) if error}
+
+
+def emergency_shutdown(conn_details, groups, runtime=None, exclude=None, hosts=True):
+    """Shut down all VMs group by group, then the hosts.
+
+    groups is an ordered list of {"name", "vms" (name patterns), "deadline"}.
+    Powered-on VMs that match no group form a last "remaining" group with
+    the deadline of the last group. Via vCenter its own VM is left running
+    and its host is shut down last, so the session lasts to the end. Guest
+    shutdowns of a group run in parallel and VMs still running at the group
+    deadline are powered off. With runtime (seconds of battery left) every
+    deadline, and the wait for a session, is capped so the hosts can be shut
+    down before it runs out. Returns the time to safe state and the result
+    per group, or the error if no session was free in time.
+    """
+    started = time.monotonic()
+    final_deadline = started + runtime - SHUTDOWN_HOST_RESERVE if runtime else None
+    exclude = exclude or []
+
+    # waiting for a busy pool must not use up the battery
+    timeout = CHECKOUT_TIMEOUT
+    if final_deadline is not None:
+        timeout = max(0, min(timeout, final_deadline - time.monotonic()))
+    conn = esx_checkout(conn_details, timeout)
+    if conn is None:
+        _LOGGER.error(
+            "Emergency shutdown failed: no session to %s within %s seconds",
+            conn_details["host"],
+            round(timeout),
+        )
+        return {
+            "time_to_safe_state": None,
+            "vms_off_seconds": None,
+            "within_runtime": False if runtime else None,
+            "error": f"No session to {conn_details['host']} within {round(timeout)} seconds",
+            "groups": [],
+            "hosts": {},
+        }
+    discard = False
+    try:
+        content = conn.RetrieveContent()
+        vm_view = content.viewManager.CreateContainerView(
+            content.rootFolder, [vim.VirtualMachine], True
+        )
+        props = retrieve_properties(
+            content, vim.VirtualMachine, VM_PROPERTIES, container=vm_view
+        )
+        all_vms = vm_view.view
+        vm_view.Destroy()
+        vcenter_vm = _find_vcenter_vm(content, conn_details["host"], all_vms, props)
+
+        running = [
+            vm
+            for vm in all_vms
+            if props.get(vm._moId, {}).get("runtime.powerState") == "poweredOn"  # pylint: disable=protected-access
+            and not _matches(props[vm._moId]["name"], exclude)  # pylint: disable=protected-access
+            and vm is not vcenter_vm
+        ]
+        plan = []
+        for group in groups:
+            members = [
+                vm
+                for vm in running
+                if _matches(props[vm._moId]["name"], group["vms"])  # pylint: disable=protected-access
+            ]
+            running = [vm for vm in running if vm not in members]
+            plan.append((group["name"], group["deadline"], members))
+        if running:
+            deadline = groups[-1]["deadline"] if groups else SHUTDOWN_DEADLINE
+            plan.append(("remaining", deadline, running))
+
+        _LOGGER.warning(
+            "Emergency shutdown of %s VM(s) in %s group(s)",
+            sum(len(members) for _, _, members in plan),
+            len(plan),
+        )
+
+        results = []
+        for name, group_deadline, members in plan:
+            group_started = time.monotonic()
+            deadline = group_started + group_deadline
+            if final_deadline is not None:
+                deadline = min(deadline, final_deadline)
+
+            # graceful shutdown needs VMware Tools, others are powered off
+            graceful = [
+                vm
+                for vm in members
+                if props[vm._moId].get("guest.toolsRunningStatus") == "guestToolsRunning"  # pylint: disable=protected-access
+            ]
+            shutdown_errors = _parallel(lambda vm: vm.ShutdownGuest(), graceful)
+            remaining = _wait_powered_off(
+                content, [vm for vm in graceful if vm not in shutdown_errors], deadline
+            )
+
+            # escalate to a hard power off at the group deadline
+            forced = (
+                [vm for vm in members if vm not in graceful]
+                + remaining
+                + list(shutdown_errors)
+            )
+            errors = _parallel(lambda vm: vm.PowerOffVM_Task(), forced)
+            failed = _wait_powered_off(
+                content,
+                [vm for vm in forced if vm not in errors],
+                time.monotonic() + SHUTDOWN_POWEROFF_TIMEOUT,
+            ) + list(errors)
+
+            result = {
+                "group": name,
+                "vms": len(members),
+                "graceful": len(graceful) - len(remaining) - len(shutdown_errors),
+                "forced": len(forced) - len(failed),
+                "failed": sorted(props[vm._moId]["name"] for vm in failed),  # pylint: disable=protected-access
+                "seconds": round(time.monotonic() - group_started, 1),
+            }
+            results.append(result)
+            _LOGGER.warning("Emergency shutdown: %s", result)
+
+        vms_off = round(time.monotonic() - started, 1)
+
+        host_results = {}
+        if hosts:
+            # hosts go last, a standalone host ends the session with it
+            host_view = content.viewManager.CreateContainerView(
+                content.rootFolder, [vim.HostSystem], True
+            )
+            host_props = retrieve_properties(
+                content,
+                vim.HostSystem,
+                ["name", "runtime.connectionState"],
+                container=host_view,
+            )
+            esxi_hosts = [
+                esxi_host
+                for esxi_host in host_view.view
+                if host_props.get(esxi_host._moId, {}).get("runtime.connectionState")  # pylint: disable=protected-access
+                == "connected"
+            ]
+            host_view.Destroy()
+            discard = True
+            # the host running vCenter would end the session for the others
+            vcenter_host = (
+                props[vcenter_vm._moId].get("runtime.host")  # pylint: disable=protected-access
+                if vcenter_vm is not None
+                else None
+            )
+            errors = _parallel(
+                lambda esxi_host: esxi_host.ShutdownHost_Task(True),
+                [esxi_host for esxi_host in esxi_hosts if esxi_host != vcenter_host],
+            )
+            if vcenter_host in esxi_hosts:
+                errors.update(
+                    _parallel(
+                        lambda esxi_host: esxi_host.ShutdownHost_Task(True),
+                        [vcenter_host],
+                    )
+                )
+            host_results = {
+                host_props[esxi_host._moId]["name"]: errors.get(esxi_host, "shutdown")  # pylint: disable=protected-access
+                for esxi_host in esxi_hosts
+            }
+    except Exception:
+        # the session may be logged out or broken, do not reuse it
+        discard = True
+        raise
+    finally:
+        esx_checkin(conn_details, conn, discard)
+
+    # safe once all VMs are off and the hosts were told to shut down
+    safe_state = round(time.monotonic() - started, 1)
+    report = {
+        "time_to_safe_state": safe_state,
+        "vms_off_seconds": vms_off,
+        "within_runtime": safe_state <= runtime if runtime else None,
+        "vcenter_vm": (
+            props[vcenter_vm._moId]["name"]  # pylint: disable=protected-access
+            if vcenter_vm is not None
+            else None
+        ),
+        "groups": results,
+        "hosts": host_results,
+    }
+    _LOGGER.warning(
+        "Emergency shutdown reached a safe state after %s seconds", safe_state
+    )
+    return report
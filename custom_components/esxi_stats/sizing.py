@@ -0,0 +1,102 @@
+"""Inventory sizing for the ESXi Stats config flow."""
+import logging
+import math
+import time
+
+from pyVmomi import vim  # pylint: disable=no-name-in-module
+
+from .const import (
+    SIZING_CALLS_PER_OBJECT,
+    SIZING_ENTITIES_PER_OBJECT,
+    SIZING_FIXED_CALLS,
+    SIZING_MIN_INTERVAL,
+    SIZING_SCOPE_ENTITIES,
+)
+from .esxi import retrieve_properties
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _read(content, obj_type, path_set):
+    view = content.viewManager.CreateContainerView(content.rootFolder, [obj_type], True)
+    try:
+        return retrieve_properties(content, obj_type, path_set, container=view)
+    finally:
+        view.Destroy()
+
+
+def probe_inventory(conn):
+    """Count the objects of a host/vCenter with a few batched reads.
+
+    The time of the reads is used as the latency of one API call.
+    """
+    content = conn.RetrieveContent()
+    started = time.monotonic()
+    vms = _read(content, vim.VirtualMachine, ["config.template"])
+    latency = time.monotonic() - started
+    pools = _read(content, vim.ResourcePool, ["parent"])
+
+    counts = {
+        "vmhost": len(_read(content, vim.HostSystem, ["name"])),
+        "datastore": len(_read(content, vim.Datastore, ["name"])),
+        "vm": len(vms),
+        "templates": sum(1 for props in vms.values() if props.get("config.template")),
+        "cluster": len(_read(content, vim.ClusterComputeResource, ["name"])),
+        # root pools ("Resources") are not reported
+        "resource_pool": sum(
+            1 for props in pools.values() if isinstance(props.get("parent"), vim.ResourcePool)
+        ),
+        # view creation, retrieval and destruction
+        "latency": latency / 3,
+    }
+    _LOGGER.debug("Inventory size: %s", counts)
+    return counts
+
+
+def estimate_cost(counts, conditions):
+    """Project entities, API calls and refresh duration of a configuration.
+
+    conditions are the monitored conditions selected in the config flow.
+    Returns the projection and a list of suggestions to reduce it.
+    """
+    # aggregates are computed from the host/VM data
+    monitored = list(conditions)
+    if "vmhost" in monitored:
+        monitored.append("cluster")
+    if "vm" in monitored:
+        monitored.append("resource_pool")
+
+    entities = sum(
+        counts[cond] * SIZING_ENTITIES_PER_OBJECT[cond]
+        for cond in monitored
+        if cond in SIZING_ENTITIES_PER_OBJECT
+    )
+    api_calls = SIZING_FIXED_CALLS + sum(
+        counts[cond] * SIZING_CALLS_PER_OBJECT[cond]
+        for cond in monitored
+        if cond in SIZING_CALLS_PER_OBJECT
+    )
+    cycle_seconds = math.ceil(api_calls * counts["latency"])
+    # leave headroom for a refresh to finish before the next one is due
+    interval = max(SIZING_MIN_INTERVAL, 15 * math.ceil(cycle_seconds * 2 / 15))
+
+    suggestions = []
+    if entities > SIZING_SCOPE_ENTITIES:
+        if "vm" in conditions:
+            suggestions.append(
+                "limit VMs with the include/exclude, folders, clusters, "
+                "resource_pools or tags options"
+            )
+        if "vm" in conditions and counts["templates"]:
+            suggestions.append(f"skip the {counts['templates']} VM templates")
+        if "datastore" in conditions and counts["datastore"] > counts["vmhost"] * 4:
+            suggestions.append("exclude local or unused datastores by name")
+        suggestions.append("disable unneeded sensors after setup")
+
+    return {
+        "entities": entities,
+        "api_calls": api_calls,
+        "cycle_seconds": cycle_seconds,
+        "interval": interval,
+        "suggestions": suggestions,
+    }
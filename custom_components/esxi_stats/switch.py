@@ -8,7 +8,8 @@ from .const import (
     DOMAIN_DATA,
     DEFAULT_NAME,
 )
-from .esxi import vm_pwr, host_pwr
+from .entity import ESXiEntity
+from .esxi import get_conn_details, vm_pwr, host_pwr
 
 SCAN_INTERVAL = timedelta(seconds=15)
 
@@ -35,7 +36,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         async_add_entities(switches, True)
 
 
-class ESXiVMSwitch(SwitchEntity):
+class ESXiVMSwitch(ESXiEntity, SwitchEntity):
     """ESXi VM Power Switch."""
 
     def __init__(self, hass, config, vm_name, config_entry):
@@ -45,14 +46,13 @@ class ESXiVMSwitch(SwitchEntity):
         self._vm_name = vm_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vm", vm_name)
         self._state = None
         self._vm_data = {}
 
-    def update(self):
-        """Update the switch state."""
+    def _read_data(self):
+        """Read the switch state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._vm_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vm"][self._vm_name]
 
             # Set state based on VM power state
@@ -87,6 +87,8 @@ class ESXiVMSwitch(SwitchEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         return self._vm_data is not None and "state" in self._vm_data
 
     @property
@@ -123,13 +125,7 @@ class ESXiVMSwitch(SwitchEntity):
                 _LOGGER.error("Cannot power on VM %s: UUID not found", self._vm_name)
                 return
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_pwr,
@@ -142,8 +138,10 @@ class ESXiVMSwitch(SwitchEntity):
                 False  # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new power state to the VM's entities
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to power on VM %s: %s", self._vm_name, e)
@@ -170,13 +168,7 @@ class ESXiVMSwitch(SwitchEntity):
 
             _LOGGER.info("VM %s: Using %s", self._vm_name, shutdown_method)
 
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             await self.hass.async_add_executor_job(
                 vm_pwr,
@@ -189,8 +181,10 @@ class ESXiVMSwitch(SwitchEntity):
                 False  # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new power state, a guest shutdown is followed up
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vm", self._vm_name, follow_up=power_command == "shutdown"
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to power off VM %s: %s", self._vm_name, e)
@@ -203,7 +197,7 @@ class ESXiVMSwitch(SwitchEntity):
         return "mdi:server-off"
 
 
-class ESXiHostSwitch(SwitchEntity):
+class ESXiHostSwitch(ESXiEntity, SwitchEntity):
     """ESXi Host Power Switch."""
 
     def __init__(self, hass, config, host_name, config_entry):
@@ -213,14 +207,13 @@ class ESXiHostSwitch(SwitchEntity):
         self._host_name = host_name
         self._config_entry = config_entry
         self._entry_id = config_entry.entry_id
+        self._target = ("vmhost", host_name)
         self._state = None
         self._host_data = {}
 
-    def update(self):
-        """Update the switch state."""
+    def _read_data(self):
+        """Read the switch state from the collected data."""
         try:
-            # Get fresh data from the coordinator
-            self.hass.data[DOMAIN_DATA][self._entry_id]["client"].update_data()
             self._host_data = self.hass.data[DOMAIN_DATA][self._entry_id]["vmhost"][self._host_name]
 
             # Set state based on host power state
@@ -254,6 +247,8 @@ class ESXiHostSwitch(SwitchEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not super().available:
+            return False
         return self._host_data is not None and "state" in self._host_data
 
     @property
@@ -294,13 +289,7 @@ class ESXiHostSwitch(SwitchEntity):
     async def async_turn_off(self, **kwargs):
         """Turn the host off (shutdown)."""
         try:
-            conn_details = {
-                "host": self.config["host"],
-                "user": self.config["username"],
-                "pwd": self.config["password"],
-                "port": self.config["port"],
-                "ssl": self.config["verify_ssl"],
-            }
+            conn_details = get_conn_details(self.config, self._config_entry.options)
 
             # Use the original host name from stored data for exact matching
             target_host = self._host_data.get("original_name", self._host_name)
@@ -319,8 +308,10 @@ class ESXiHostSwitch(SwitchEntity):
                 True    # notify
             )
 
-            # Request immediate update
-            await self.hass.async_add_executor_job(self.update)
+            # Push the new state, the host goes down after the task
+            await self.hass.data[DOMAIN_DATA][self._entry_id]["client"].async_refresh_after_action(
+                "vmhost", self._host_name, follow_up=True
+            )
 
         except Exception as e:
             _LOGGER.error("Failed to shutdown host %s: %s", self._host_name, e)
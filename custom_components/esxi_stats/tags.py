@@ -0,0 +1,152 @@
+"""vSphere tag membership for ESXi Stats."""
+import logging
+
+import aiohttp
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import TAG_OBJECT_TYPES, TAG_REFRESH_INTERVAL, TAG_REQUEST_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TagMembership:
+    """Keep the ids of objects carrying any of the scope tags.
+
+    Tags are only available from the vSphere Automation REST API of vCenter.
+    Membership is read at setup and then on a slow timer, the inventory scope
+    uses the cached ids in every refresh cycle. The ids of the scope tags are
+    resolved once, later refreshes only re-read their associations.
+    """
+
+    def __init__(self, hass, client):
+        """Initialize the membership of the tags in the scope of client."""
+        self.hass = hass
+        self.client = client
+        self._base = f"https://{client.host}:{client.port}/api"
+        self._unsub = None
+        self._tag_ids = None
+
+    async def async_start(self):
+        """Read membership and refresh it periodically.
+
+        Raises ConfigEntryNotReady if the first read fails, without it no
+        object would be in scope.
+        """
+        if not await self.async_refresh():
+            raise ConfigEntryNotReady(
+                f"Could not read tag membership from {self.client.host}"
+            )
+        self._unsub = async_track_time_interval(
+            self.hass, self.async_refresh, TAG_REFRESH_INTERVAL
+        )
+
+    def stop(self):
+        """Stop refreshing membership."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def async_refresh(self, _now=None):
+        """Read the objects attached to the scope tags.
+
+        On errors the previous membership is kept and the tag ids are
+        resolved again in the next refresh. Returns True if it was read.
+        """
+        session = async_get_clientsession(self.hass, verify_ssl=self.client.ssl)
+        timeout = aiohttp.ClientTimeout(total=TAG_REQUEST_TIMEOUT)
+        try:
+            async with session.post(
+                f"{self._base}/session",
+                auth=aiohttp.BasicAuth(self.client.user, self.client.passwd),
+                timeout=timeout,
+            ) as resp:
+                resp.raise_for_status()
+                token = await resp.json()
+            headers = {"vmware-api-session-id": token}
+            try:
+                # tags created after an empty lookup are picked up
+                if not self._tag_ids:
+                    self._tag_ids = await self._async_scope_tag_ids(
+                        session, headers, timeout
+                    )
+                tagged = await self._async_attached_objects(
+                    session, headers, timeout, self._tag_ids
+                )
+            finally:
+                async with session.delete(
+                    f"{self._base}/session", headers=headers, timeout=timeout
+                ):
+                    pass
+        except (aiohttp.ClientError, TimeoutError) as error:
+            # e.g. a scope tag was deleted
+            self._tag_ids = None
+            _LOGGER.warning(
+                "Could not read tag membership from %s: %s", self.client.host, error
+            )
+            return False
+
+        _LOGGER.debug("%s object(s) carry the scope tags", len(tagged))
+        if tagged != self.client.scope.tagged:
+            self.client.scope.tagged = tagged
+            # objects may have entered or left the scope
+            self.client.invalidate_membership()
+        return True
+
+    async def _async_get(self, session, headers, timeout, path):
+        async with session.get(
+            f"{self._base}{path}", headers=headers, timeout=timeout
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def _async_scope_tag_ids(self, session, headers, timeout):
+        """Return the ids of the tags named in the scope.
+
+        Tags are given as "category:tag" or just the tag name.
+        """
+        categories = {}
+        tag_ids = []
+        for tag_id in await self._async_get(session, headers, timeout, "/cis/tagging/tag"):
+            tag = await self._async_get(
+                session, headers, timeout, f"/cis/tagging/tag/{tag_id}"
+            )
+            if tag["category_id"] not in categories:
+                category = await self._async_get(
+                    session, headers, timeout, f"/cis/tagging/category/{tag['category_id']}"
+                )
+                categories[tag["category_id"]] = category["name"]
+            name = tag["name"].lower()
+            qualified = f"{categories[tag['category_id']]}:{tag['name']}".lower()
+            if name in self.client.scope.tags or qualified in self.client.scope.tags:
+                tag_ids.append(tag_id)
+
+        if not tag_ids:
+            _LOGGER.warning(
+                "None of the tags %s exist on %s",
+                ", ".join(self.client.scope.tags),
+                self.client.host,
+            )
+        return tag_ids
+
+    async def _async_attached_objects(self, session, headers, timeout, tag_ids):
+        """Return the managed object ids attached to any of tag_ids."""
+        if not tag_ids:
+            return set()
+        async with session.post(
+            f"{self._base}/cis/tagging/tag-association",
+            params={"action": "list-attached-objects-on-tags"},
+            json={"tag_ids": tag_ids},
+            headers=headers,
+            timeout=timeout,
+        ) as resp:
+            resp.raise_for_status()
+            associations = await resp.json()
+
+        return {
+            obj["id"]
+            for association in associations
+            for obj in association["object_ids"]
+            if obj["type"] in TAG_OBJECT_TYPES
+        }